@@ -0,0 +1,98 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import os        # Per operazioni sul filesystem
+import threading # Per i contatori condivisi tra le richieste
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Server HTTP locale che imita l'archivio storico CFTC per provare bulkFetcher.py offline.
+# Serve i file di una cartella con supporto a Range e può iniettare guasti
+# sulle prime N richieste di ogni file:
+# - fail_first: risposta 503
+# - truncate_first: invia metà del corpo e chiude la connessione
+# - corrupt_first: corpo completo ma con byte alterati
+
+
+def make_server(directory, host="127.0.0.1", port=8800, fail_first=0, truncate_first=0, corrupt_first=0):
+    counts = {}
+    request_log = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            name = os.path.basename(self.path.split("?", 1)[0])
+            path = os.path.join(directory, name)
+            if not name or not os.path.isfile(path):
+                self._send_status(404)
+                return
+            with lock:
+                counts[name] = counts.get(name, 0) + 1
+                request = counts[name]
+                request_log.append((name, self.headers.get("Range")))
+            if request <= fail_first:
+                self._send_status(503)
+                return
+
+            with open(path, "rb") as file:
+                data = file.read()
+            start, status = 0, 200
+            header = self.headers.get("Range", "")
+            if header.startswith("bytes=") and header[6:].split("-")[0].isdigit():
+                start, status = int(header[6:].split("-")[0]), 206
+                if start >= len(data):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(data)}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            body = data[start:]
+            if fail_first < request <= fail_first + corrupt_first:
+                body = bytes(b ^ 0xFF for b in body[:64]) + body[64:]
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Accept-Ranges", "bytes")
+            if status == 206:
+                self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+            if fail_first + corrupt_first < request <= fail_first + corrupt_first + truncate_first:
+                self.send_header("Connection", "close")
+                self.end_headers()
+                self.wfile.write(body[:len(body) // 2])
+                self.close_connection = True
+                return
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_status(self, status):
+            self.send_response(status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.request_counts = counts
+    # (nome file, intestazione Range) di ogni richiesta, per verificare le riprese
+    server.request_log = request_log
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirror locale dell'archivio CFTC con guasti simulati")
+    parser.add_argument("directory", help="Cartella con gli archivi (es. deacot2024.zip)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--fail-first", type=int, default=0, help="Richieste iniziali per file che ricevono 503")
+    parser.add_argument("--corrupt-first", type=int, default=0, help="Richieste successive con contenuto alterato")
+    parser.add_argument("--truncate-first", type=int, default=0, help="Richieste successive troncate a metà")
+    args = parser.parse_args()
+
+    server = make_server(args.directory, args.host, args.port, args.fail_first, args.truncate_first, args.corrupt_first)
+    print(f"Archivio locale su http://{args.host}:{args.port}/ ({args.directory})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
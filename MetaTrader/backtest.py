@@ -0,0 +1,197 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import os        # Per il numero di processi
+from concurrent.futures import ProcessPoolExecutor  # Per gli sweep di parametri in parallelo
+import numpy as np
+import pandas as pd
+from cotHistory import CotHistory
+from getData import MAJOR_PAIRS, all_pairs, classify_currencies_batch, currency_mapping, load_currency_ranges
+from priceStore import ANCHORS, PriceStore
+
+# Giorni tra la data "as of" del report (martedì) e la pubblicazione (venerdì):
+# il segnale può essere eseguito solo dopo la pubblicazione
+RELEASE_LAG_DAYS = 3
+
+
+def load_currency_deltas(history, mapping=None, start=None, end=None):
+    """
+    Costruisce la matrice settimane x valute dei delta semplici
+    (long_change - short_change) dall'archivio storico.
+    Le settimane in cui una valuta manca valgono NaN.
+    Restituisce (date, simboli, delta)
+    """
+    mapping = mapping or currency_mapping
+    data = history.select(names=list(mapping), start=start, end=end, fields=["long_change", "short_change"])
+    frame = pd.DataFrame({
+        "date": data["date"],
+        "symbol": pd.Series(data["name"]).map(mapping).to_numpy(),
+        "delta": (data["long_change"] - data["short_change"]).astype(np.float64)
+    })
+    wide = frame.pivot_table(index="date", columns="symbol", values="delta", aggfunc="first").sort_index()
+    return wide.index.to_numpy(dtype="datetime64[D]"), list(wide.columns), wide.to_numpy()
+
+
+def score_weeks(deltas, symbols, ranges=None, ranges_percent=None):
+    """
+    Punteggio finale di ogni valuta per ogni settimana (stessa logica di get_currency_data)
+    Le celle senza dati restano NaN
+    """
+    scores = np.full(deltas.shape, np.nan)
+    valid = ~np.isnan(deltas)
+    rows, cols = np.nonzero(valid)
+    _, _, final = classify_currencies_batch(deltas[valid], np.asarray(symbols)[cols], ranges, ranges_percent)
+    scores[rows, cols] = final
+    return scores
+
+
+def pair_scores(scores, symbols, pairs):
+    """
+    Punteggio di ogni coppia per ogni settimana: base meno quote
+    """
+    index = {s: i for i, s in enumerate(symbols)}
+    base = np.array([index[p[:3]] for p in pairs])
+    quote = np.array([index[p[3:]] for p in pairs])
+    return scores[:, base] - scores[:, quote]
+
+
+def load_prices(path, pairs):
+    """
+    Legge lo storico prezzi locale: CSV con colonna "date" e una colonna
+    di chiusura per ogni coppia (es. date,EURUSD,GBPUSD,...)
+    """
+    prices = pd.read_csv(path, parse_dates=["date"]).sort_values("date")
+    missing = [p for p in pairs if p not in prices.columns]
+    if missing:
+        raise ValueError(f"Coppie assenti nello storico prezzi: {', '.join(missing)}")
+    return prices["date"].to_numpy(dtype="datetime64[D]"), prices[list(pairs)].to_numpy(dtype=np.float64)
+
+
+def forward_returns(report_dates, price_dates, prices, lag_days=RELEASE_LAG_DAYS):
+    """
+    Rendimento di ogni coppia tra l'ingresso di una settimana e quello successivo.
+    Ingresso = primo prezzo disponibile dalla pubblicazione del report in poi.
+    """
+    entry_dates = report_dates + np.timedelta64(lag_days, "D")
+    entry = np.searchsorted(price_dates, entry_dates, side="left")
+    available = entry < len(price_dates)
+    entry_prices = np.full((len(report_dates), prices.shape[1]), np.nan)
+    entry_prices[available] = prices[entry[available]]
+
+    returns = np.full_like(entry_prices, np.nan)
+    returns[:-1] = entry_prices[1:] / entry_prices[:-1] - 1
+    # Due report che finiscono sullo stesso prezzo non producono un vero trade
+    same_bar = np.zeros(len(report_dates), dtype=bool)
+    same_bar[:-1] = entry[1:] == entry[:-1]
+    returns[same_bar] = np.nan
+    return returns
+
+
+def evaluate(scores, returns, pairs):
+    """
+    Metriche per coppia, calcolate su tutte le settimane in un colpo solo.
+    Posizione: +1 se BUY (punteggio > 0), -1 se SELL, 0 se NEUTRAL, come write_signals_to_csv
+    """
+    position = np.sign(np.nan_to_num(scores))
+    valid = ~np.isnan(returns) & ~np.isnan(scores)
+    strategy = np.where(valid, position * np.nan_to_num(returns), 0.0)
+    traded = valid & (position != 0)
+
+    equity = np.cumprod(1 + strategy, axis=0)
+    # Il capitale iniziale (1.0) è il primo massimo: una perdita dalla prima settimana è drawdown
+    peak = np.maximum(1.0, np.maximum.accumulate(equity, axis=0))
+    drawdown = (equity / peak - 1).min(axis=0) if len(equity) else np.zeros(len(pairs))
+
+    trades = traded.sum(axis=0)
+    hits = (traded & (strategy > 0)).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hit_rate = np.where(trades > 0, hits / trades, np.nan)
+        mean_return = np.where(trades > 0, np.where(traded, strategy, 0).sum(axis=0) / trades, np.nan)
+
+    return pd.DataFrame({
+        "pair": list(pairs),
+        "trades": trades,
+        "hit_rate": hit_rate,
+        "mean_return": mean_return,
+        "total_return": equity[-1] - 1 if len(equity) else np.zeros(len(pairs)),
+        "max_drawdown": drawdown
+    })
+
+
+def run_backtest(dates, symbols, deltas, price_dates, prices, pairs=None, ranges=None, ranges_percent=None):
+    """
+    Backtest completo della strategia COT su tutte le settimane
+    Process:
+    1. Classificazione vettoriale di tutte le valute per tutte le settimane
+    2. Punteggio coppie (base - quote) e segnale BUY/SELL/NEUTRAL
+    3. Rendimenti forward dallo storico prezzi e metriche per coppia
+    """
+    pairs = list(pairs or MAJOR_PAIRS)
+    scores = pair_scores(score_weeks(deltas, symbols, ranges, ranges_percent), symbols, pairs)
+    returns = forward_returns(dates, price_dates, prices)
+    return evaluate(scores, returns, pairs)
+
+
+# Dati condivisi dai processi dello sweep: inviati una sola volta per processo
+_sweep_data = {}
+
+def _init_sweep(data):
+    _sweep_data.update(data)
+
+def _run_sweep_task(task):
+    ranges, ranges_percent = task
+    return run_backtest(ranges=ranges, ranges_percent=ranges_percent, **_sweep_data)
+
+def sweep(dates, symbols, deltas, price_dates, prices, range_tables, pairs=None, workers=None):
+    """
+    Esegue il backtest per ogni tabella di range in parallelo su un pool di processi
+    range_tables: lista di (ranges, ranges_percent); None usa i valori di getData
+    Restituisce un'unica tabella con la colonna "run" (indice della tabella)
+    """
+    data = {
+        "dates": dates, "symbols": symbols, "deltas": deltas,
+        "price_dates": price_dates, "prices": prices, "pairs": list(pairs or MAJOR_PAIRS)
+    }
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep, initargs=(data,)) as executor:
+        results = list(executor.map(_run_sweep_task, range_tables))
+    for run, result in enumerate(results):
+        result.insert(0, "run", run)
+    return pd.concat(results, ignore_index=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest della strategia COT sulle coppie forex")
+    parser.add_argument("--history", default="cot_history", help="Cartella dell'archivio storico COT")
+    prices_source = parser.add_mutually_exclusive_group(required=True)
+    prices_source.add_argument("--prices", help="CSV prezzi: date + una colonna per coppia")
+    prices_source.add_argument("--price-store", help="Archivio delle barre MT5 (priceStore.py)")
+    parser.add_argument("--anchor", choices=sorted(ANCHORS), default="friday",
+                        help="Chiusura settimanale usata con --price-store")
+    parser.add_argument("--start", help="Data iniziale (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Data finale (YYYY-MM-DD)")
+    parser.add_argument("--ranges", nargs="*", help="Tabelle dei range (JSON, anche solo alcune valute come per getData.py) da confrontare")
+    parser.add_argument("--all-pairs", action="store_true", help="Tutte le coppie major e cross, non solo MAJOR_PAIRS")
+    parser.add_argument("--workers", type=int, help="Processi per lo sweep dei parametri")
+    parser.add_argument("--output", help="CSV dei risultati")
+    args = parser.parse_args()
+
+    dates, symbols, deltas = load_currency_deltas(CotHistory(args.history), start=args.start, end=args.end)
+    pairs = all_pairs(symbols) if args.all_pairs else MAJOR_PAIRS
+    if args.price_store:
+        price_dates, prices = PriceStore(args.price_store).weekly_closes(pairs, args.anchor)
+    else:
+        price_dates, prices = load_prices(args.prices, pairs)
+
+    if args.ranges:
+        missing = [path for path in args.ranges if not os.path.exists(path)]
+        if missing:
+            parser.error(f"file dei range non trovati: {', '.join(missing)}")
+        # Stesso formato di getData.py: le valute assenti dal file restano ai valori di default
+        tables = [(load_currency_ranges(path), None) for path in args.ranges]
+        results = sweep(dates, symbols, deltas, price_dates, prices, tables, pairs, args.workers)
+    else:
+        results = run_backtest(dates, symbols, deltas, price_dates, prices, pairs)
+
+    print(results.to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
@@ -0,0 +1,284 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import csv       # Per generare i report sintetici
+import datetime  # Per le settimane dello storico sintetico
+import hashlib   # Per l'ETag del server locale
+import io        # Per i report in memoria
+import json      # Per risultati e baseline
+import os        # Per operazioni sul filesystem
+import platform  # Per descrivere la macchina
+import statistics  # Per la mediana dei tempi
+import sys       # Per il codice di uscita
+import tempfile  # Per le cartelle di lavoro
+import time      # Per le misure
+import tracemalloc  # Per memoria di picco e allocazioni
+import numpy as np
+from cotHistory import CotHistory
+from cotReport import CotReport, parse_report
+from getData import (analyze_pairs, classify_currencies_batch, currencies, currency_mapping,
+                     get_currency_data, signal_targets)
+from publisher import Publisher
+from reportCache import ReportCache, fetch_report
+
+# Report incluso nel repository, usato come base per tutti i dataset
+BUNDLED_REPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "COT_Report.csv")
+RESULTS_FILE = "benchmark_results.json"
+# Una fase è in regressione se più lenta (o più pesante) del 20% rispetto alla baseline
+TOLERANCE = 0.20
+# Sotto questa durata le differenze sono rumore di misura
+MIN_SECONDS = 0.005
+
+
+class LocalResponse:
+    """
+    Risposta HTTP servita dalla memoria: il benchmark non accede mai alla rete
+    """
+
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def iter_content(self, chunk_size=64 * 1024):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class LocalSession:
+    """
+    Sessione con la stessa interfaccia usata da fetch_report(), con supporto a If-None-Match
+    """
+
+    def __init__(self, content):
+        self.content = content
+        self.etag = '"%s"' % hashlib.md5(content).hexdigest()
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        if (headers or {}).get("If-None-Match") == self.etag:
+            return LocalResponse(304)
+        return LocalResponse(200, self.content, {"ETag": self.etag})
+
+
+# ---------- Dataset ----------
+
+def _read_rows(path=BUNDLED_REPORT):
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        return [row for row in csv.reader(file) if row]
+
+
+def _to_bytes(rows):
+    buffer = io.StringIO(newline="")
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def scaled_report(rows, scale):
+    """
+    Report con `scale` volte i mercati: le copie hanno nomi distinti (es. "... #3"),
+    la prima conserva i nomi originali così le valute vengono trovate
+    """
+    result = []
+    for copy in range(scale):
+        for row in rows:
+            row = list(row)
+            if copy:
+                row[0] = f"{row[0]} #{copy}"
+            result.append(row)
+    return _to_bytes(result)
+
+
+def history_report(rows, weeks):
+    """
+    Archivio multi-settimana come quelli annuali CFTC: il report incluso ripetuto
+    per `weeks` settimane consecutive all'indietro
+    """
+    last = datetime.date.fromisoformat(rows[0][2].strip())
+    result = []
+    for week in range(weeks):
+        date = last - datetime.timedelta(weeks=week)
+        for row in rows:
+            row = list(row)
+            row[1] = date.strftime("%y%m%d")
+            row[2] = date.isoformat()
+            result.append(row)
+    return _to_bytes(result)
+
+
+# ---------- Misure ----------
+
+def measure(function, repeat):
+    """
+    Esegue `function` `repeat` volte per i tempi, poi una volta sotto tracemalloc.
+    Ogni chiamata riceve lo stesso stato iniziale: function() restituisce una funzione già pronta
+    """
+    times = []
+    for _ in range(repeat):
+        stage = function()
+        start = time.perf_counter()
+        stage()
+        times.append(time.perf_counter() - start)
+
+    stage = function()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    stage()
+    peak = tracemalloc.get_traced_memory()[1]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    return {
+        "seconds": round(min(times), 6),
+        "median_seconds": round(statistics.median(times), 6),
+        "peak_bytes": peak,
+        "allocated_blocks": sum(max(stat.count_diff, 0) for stat in diff),
+        "retained_bytes": sum(stat.size_diff for stat in diff)
+    }
+
+
+def report_stages(content, workdir):
+    """
+    Fasi della pipeline di getData.py su un singolo report (in byte).
+    Ogni voce prepara lo stato e restituisce la funzione da misurare.
+    """
+    report = parse_report(io.BytesIO(content))
+    npz_path = os.path.join(workdir, "report.npz")
+    report.save(npz_path)
+    session = LocalSession(content)
+    warm_cache = ReportCache(os.path.join(workdir, "warm"))
+    fetch_report("local", warm_cache, session=session)
+    currencies_data = {currency: get_currency_data(currency, report) for currency in currencies}
+    simple_deltas = report["long_change"] - report["short_change"]
+    symbols = np.resize(list(currency_mapping.values()), len(report))
+    pairs = sorted(analyze_pairs(currencies_data), key=lambda x: x["score"], reverse=True)
+    publisher = Publisher(signal_targets(os.path.join(workdir, "pair_signals.csv"), None,
+                                         [os.path.join(workdir, "pair_signals.json"), os.path.join(workdir, "pair_signals.bin")]))
+    publisher.publish(pairs, report.report_date)
+
+    def fresh_fetch():
+        cache = ReportCache(tempfile.mkdtemp(dir=workdir))
+        return lambda: fetch_report("local", cache, session=session)
+
+    def fresh_publish():
+        for path in publisher.targets:
+            os.remove(path)
+        return lambda: publisher.publish(pairs, report.report_date)
+
+    return {
+        "fetch": fresh_fetch,
+        "fetch_not_modified": lambda: (lambda: fetch_report("local", warm_cache, session=session)),
+        "parse": lambda: (lambda: parse_report(io.BytesIO(content))),
+        "cache_load": lambda: (lambda: CotReport.load(npz_path)),
+        "currencies": lambda: (lambda: {currency: get_currency_data(currency, report) for currency in currencies}),
+        "classify_all_markets": lambda: (lambda: classify_currencies_batch(simple_deltas, symbols)),
+        "pairs": lambda: (lambda: sorted(analyze_pairs(currencies_data), key=lambda x: x["score"], reverse=True)),
+        "publish": fresh_publish,
+        "publish_unchanged": lambda: (lambda: publisher.publish(pairs, report.report_date))
+    }
+
+
+def history_stages(content, workdir):
+    """
+    Fasi dell'archivio storico (cotHistory.py) su un file multi-settimana
+    """
+    source = os.path.join(workdir, "history.txt")
+    with open(source, "wb") as file:
+        file.write(content)
+    store = CotHistory(os.path.join(workdir, "store"))
+    store.ingest(source)
+
+    return {
+        "parse": lambda: (lambda: parse_report(io.BytesIO(content))),
+        "history_ingest": lambda: (lambda: CotHistory(tempfile.mkdtemp(dir=workdir)).ingest(source)),
+        "history_select": lambda: (lambda: store.select(list(currency_mapping))),
+        "history_reload": lambda: (lambda: CotHistory(store.root).select(list(currency_mapping)))
+    }
+
+
+def run_benchmarks(scales=(1, 10, 100), years=5, repeat=5, quiet=False):
+    """
+    Misura tutte le fasi su tutti i dataset, senza accedere alla rete.
+    Restituisce {"meta": ..., "results": {dataset: {fase: misure}}}
+    """
+    rows = _read_rows()
+    datasets = [(f"report_x{scale}", report_stages, lambda scale=scale: scaled_report(rows, scale)) for scale in scales]
+    if years:
+        datasets.append((f"history_{years}y", history_stages, lambda: history_report(rows, years * 52)))
+
+    results = {}
+    for name, stages, build in datasets:
+        content = build()
+        with tempfile.TemporaryDirectory() as workdir:
+            results[name] = {"bytes": len(content)}
+            for stage, function in stages(content, workdir).items():
+                results[name][stage] = measure(function, repeat)
+                if not quiet:
+                    print(f"{name:>16} {stage:<22} {results[name][stage]['seconds'] * 1000:10.2f} ms "
+                          f"{results[name][stage]['peak_bytes'] / 1e6:10.2f} MB")
+
+    meta = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "repeat": repeat
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Confronta tempi e memoria di picco con la baseline.
+    Restituisce la lista delle regressioni (dataset, fase, metrica, baseline, attuale).
+    """
+    regressions = []
+    for dataset, stages in results["results"].items():
+        for stage, current in stages.items():
+            previous = baseline.get("results", {}).get(dataset, {}).get(stage)
+            if not isinstance(current, dict) or not previous:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                old, new = previous[metric], current[metric]
+                if metric == "seconds" and max(old, new) < MIN_SECONDS:
+                    continue
+                if new > old * (1 + tolerance):
+                    regressions.append((dataset, stage, metric, old, new))
+    return regressions
+
+
+def _save(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, indent=2)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline delle fasi della pipeline COT")
+    parser.add_argument("--scales", type=int, nargs="*", default=[1, 10, 100], help="Moltiplicatori del numero di mercati")
+    parser.add_argument("--years", type=int, default=5, help="Anni di storico sintetico (0 per saltare)")
+    parser.add_argument("--repeat", type=int, default=5, help="Ripetizioni per fase (vale il tempo minimo)")
+    parser.add_argument("--output", default=RESULTS_FILE, help="File JSON dei risultati")
+    parser.add_argument("--baseline", help="Risultati precedenti da confrontare")
+    parser.add_argument("--save-baseline", help="Salva i risultati anche come nuova baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="Peggioramento tollerato (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.years, args.repeat)
+    _save(args.output, results)
+    if args.save_baseline:
+        _save(args.save_baseline, results)
+    print(f"\nRisultati salvati in '{args.output}'")
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for dataset, stage, metric, old, new in regressions:
+            print(f"⚠️ Regressione {dataset}/{stage} {metric}: {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print("✅ Nessuna regressione rispetto alla baseline")
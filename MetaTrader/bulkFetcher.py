@@ -0,0 +1,223 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import hashlib   # Per la verifica dei checksum
+import json      # Per il manifest dei checksum
+import os        # Per operazioni sul filesystem
+import random    # Per il jitter tra i tentativi
+import time      # Per le attese tra i tentativi
+import zipfile   # Per verificare gli archivi CFTC
+from concurrent.futures import ThreadPoolExecutor, as_completed  # Per i download in parallelo
+import requests  # Per le richieste HTTP
+from requests.adapters import HTTPAdapter  # Per il pool di connessioni
+from urllib3.exceptions import HTTPError as TransportError  # Connessione interrotta durante la lettura
+from cotHistory import CotHistory
+from cotReport import CHUNK_SIZE, REPORT_TYPES
+
+# Archivi storici annuali pubblicati dalla CFTC, per tipo di report
+ARCHIVE_URLS = {
+    "legacy_futures": "https://www.cftc.gov/files/dea/history/deacot{year}.zip",
+    "legacy_combined": "https://www.cftc.gov/files/dea/history/deahistfo{year}.zip",
+    "disaggregated_futures": "https://www.cftc.gov/files/dea/history/fut_disagg_txt_{year}.zip",
+    "disaggregated_combined": "https://www.cftc.gov/files/dea/history/com_disagg_txt_{year}.zip",
+    "tff_futures": "https://www.cftc.gov/files/dea/history/fut_fin_txt_{year}.zip",
+    "tff_combined": "https://www.cftc.gov/files/dea/history/com_fin_txt_{year}.zip"
+}
+
+# Stati HTTP per cui ha senso riprovare
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    """Download non riuscito dopo tutti i tentativi, o non ripetibile (es. 404)"""
+
+
+class RetryableError(Exception):
+    """Errore temporaneo: risposta troncata, checksum errato, stato 5xx"""
+
+
+def archive_urls(report_type, years):
+    """
+    URL degli archivi annuali di un tipo di report
+    """
+    return [ARCHIVE_URLS[report_type].format(year=year) for year in years]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _valid_zip(path):
+    # Gli archivi zip hanno un CRC per ogni file: è il checksum quando manca un manifest
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return archive.testzip() is None
+    except zipfile.BadZipFile:
+        return False
+
+
+class BulkFetcher:
+    """
+    Download concorrente e riprendibile degli archivi CFTC.
+    Process:
+    1. Pool di thread limitato con una sola requests.Session (connessioni riutilizzate)
+    2. Ogni file viene scritto in <nome>.part; dopo un'interruzione si riprende con Range
+    3. Lunghezza e checksum (SHA-256 dal manifest, altrimenti CRC dello zip) verificati prima del rename
+    4. Errori temporanei ripetuti con attesa esponenziale e jitter
+    5. Gli archivi completati vengono importati subito nell'archivio storico, mentre gli altri scaricano
+    """
+
+    def __init__(self, download_dir="cot_archives", workers=4, retries=5, backoff=1.0,
+                 timeout=60, session=None, checksums=None, sleep=time.sleep):
+        self.download_dir = download_dir
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.checksums = checksums or {}
+        self.sleep = sleep
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def _path(self, url):
+        return os.path.join(self.download_dir, url.rstrip("/").rsplit("/", 1)[-1])
+
+    def _verify(self, url, path, name=None):
+        # name: nome del file finale, quando si verifica il .part
+        name = name or os.path.basename(path)
+        expected = self.checksums.get(name) or self.checksums.get(url)
+        if expected:
+            return file_sha256(path) == expected.lower()
+        if name.lower().endswith(".zip"):
+            return _valid_zip(path)
+        return True
+
+    def fetch(self, url):
+        """
+        Scarica un URL con ripresa e nuovi tentativi
+        Restituisce (percorso, stato) con stato "cached" o "downloaded"
+        """
+        path = self._path(url)
+        if os.path.exists(path) and self._verify(url, path):
+            return path, "cached"
+        os.makedirs(self.download_dir, exist_ok=True)
+
+        for attempt in range(self.retries + 1):
+            try:
+                self._download(url, path)
+                return path, "downloaded"
+            except (RetryableError, requests.RequestException) as e:
+                if attempt == self.retries:
+                    raise FetchError(f"{url}: {e}") from e
+                delay = self.backoff * 2 ** attempt
+                self.sleep(delay + random.uniform(0, delay / 2))
+
+    def _download(self, url, path):
+        part_path = f"{path}.part"
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416 and offset:
+                # Il file parziale è già completo (o più lungo del file remoto): si verifica sotto
+                total = offset
+            elif response.status_code in (200, 206):
+                if response.status_code == 200:
+                    # Il server ignora il Range: si riparte da zero
+                    offset = 0
+                length = response.headers.get("Content-Length")
+                total = offset + int(length) if length is not None else None
+                # Letture dirette dal socket: a differenza di iter_content, i byte ricevuti prima
+                # di un'interruzione finiscono comunque nel .part e la ripresa parte da lì
+                with open(part_path, "ab" if offset else "wb") as file:
+                    try:
+                        for chunk in iter(lambda: response.raw.read(CHUNK_SIZE, decode_content=False), b""):
+                            file.write(chunk)
+                    except TransportError as e:
+                        raise RetryableError(f"connessione interrotta: {e}") from e
+            elif response.status_code in RETRY_STATUSES:
+                raise RetryableError(f"stato HTTP {response.status_code}")
+            else:
+                raise FetchError(f"{url}: stato HTTP {response.status_code}")
+
+        size = os.path.getsize(part_path)
+        if total is not None and size < total:
+            # Risposta troncata: il prossimo tentativo riprende da qui
+            raise RetryableError(f"ricevuti {size} byte su {total}")
+        if not self._verify(url, part_path, os.path.basename(path)):
+            os.remove(part_path)
+            raise RetryableError("checksum non valido")
+        os.replace(part_path, path)
+
+    def fetch_all(self, urls, history=None, schema="legacy", group=None, on_result=None):
+        """
+        Scarica tutti gli URL con al massimo `workers` download contemporanei.
+        Con `history` (CotHistory) ogni archivio viene importato appena completato;
+        l'importazione avviene in questo thread, quindi l'archivio storico non è mai condiviso tra thread.
+        Restituisce url -> {"path", "status", "rows"} oppure {"error"}
+        (con "path" e "status" se il download è riuscito ma l'importazione no)
+        """
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.fetch, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    path, status = future.result()
+                    results[url] = {"path": path, "status": status}
+                except (FetchError, OSError) as e:
+                    results[url] = {"error": str(e)}
+                if history is not None and "error" not in results[url]:
+                    # Un archivio illeggibile non interrompe gli altri: l'errore resta nel suo risultato
+                    try:
+                        results[url]["rows"] = history.ingest(path, schema, group)
+                    except (OSError, zipfile.BadZipFile, ValueError, KeyError, IndexError) as e:
+                        results[url]["error"] = f"importazione non riuscita: {type(e).__name__}: {e}"
+                if on_result:
+                    on_result(url, results[url])
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download in parallelo degli archivi storici CFTC")
+    parser.add_argument("urls", nargs="*", help="URL da scaricare (in alternativa a --years)")
+    parser.add_argument("--report", default="legacy_futures", choices=sorted(ARCHIVE_URLS), help="Tipo di report")
+    parser.add_argument("--years", nargs=2, type=int, metavar=("DAL", "AL"), help="Intervallo di anni (inclusi)")
+    parser.add_argument("--base-url", help="Sostituisce https://www.cftc.gov/files/dea/history (es. un mirror locale)")
+    parser.add_argument("--download-dir", default="cot_archives", help="Cartella degli archivi scaricati")
+    parser.add_argument("--store", help="Archivio storico (cotHistory.py) in cui importare gli archivi")
+    parser.add_argument("--group", help="Gruppo di trader da importare")
+    parser.add_argument("--checksums", help="JSON nome file -> SHA-256 atteso")
+    parser.add_argument("--workers", type=int, default=4, help="Download contemporanei")
+    parser.add_argument("--retries", type=int, default=5, help="Nuovi tentativi per file")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.years:
+        urls += archive_urls(args.report, range(args.years[0], args.years[1] + 1))
+    if args.base_url:
+        urls = [url.replace("https://www.cftc.gov/files/dea/history", args.base_url.rstrip("/")) for url in urls]
+    checksums = None
+    if args.checksums:
+        with open(args.checksums, "r") as file:
+            checksums = json.load(file)
+
+    def print_result(url, result):
+        if "error" in result:
+            print(f"⚠️ {url}: {result['error']}")
+        else:
+            rows = f" ({result['rows']} righe importate)" if "rows" in result else ""
+            print(f"✅ {url}: {result['status']}{rows}")
+
+    fetcher = BulkFetcher(args.download_dir, args.workers, args.retries, checksums=checksums)
+    history = CotHistory(args.store) if args.store else None
+    results = fetcher.fetch_all(urls, history, REPORT_TYPES[args.report][0], args.group, on_result=print_result)
+    if any("error" in result for result in results.values()):
+        raise SystemExit(1)
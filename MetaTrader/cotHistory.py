@@ -0,0 +1,228 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import json      # Per metadati e dizionario dei mercati
+import os        # Per operazioni sul filesystem
+import zipfile   # Per gli archivi annuali CFTC (.zip)
+import numpy as np  # Per le colonne tipizzate
+from cotReport import REPORT_COLUMNS, CotReport, parse_report
+
+# Tipi fissi delle colonne su disco: ogni colonna è un file binario
+# a larghezza fissa, leggibile con np.memmap senza parsing
+COLUMN_DTYPES = {"date": np.dtype("<M8[D]"), "market": np.dtype("<i4")}
+for _field in REPORT_COLUMNS:
+    if _field != "name":
+        COLUMN_DTYPES[_field] = np.dtype("<i8")
+
+
+class CotHistory:
+    """
+    Archivio storico dei report COT, append-only e partizionato per anno.
+    Struttura su disco:
+    - markets.json: nomi dei mercati, la posizione nella lista è l'id
+    - <anno>/meta.json: numero di righe valide e date già presenti
+    - <anno>/<colonna>.bin: una colonna a larghezza fissa per file
+    Le letture usano np.memmap: si carica solo ciò che si affetta.
+    """
+
+    def __init__(self, root="cot_history"):
+        self.root = root
+        self.markets = []
+        self.market_ids = {}
+        self._memmaps = {}
+        markets_path = os.path.join(root, "markets.json")
+        if os.path.exists(markets_path):
+            with open(markets_path, "r") as file:
+                self.markets = json.load(file)
+            self.market_ids = {name: i for i, name in enumerate(self.markets)}
+
+    # ---------- Scrittura ----------
+
+    def ingest(self, source, schema="legacy", group=None):
+        """
+        Importa un report (settimanale o archivio annuale) nell'archivio.
+        Accetta un percorso TXT/CSV, un file .zip CFTC o un oggetto file-like.
+        Le date già presenti non vengono riscritte (append-only).
+        Un archivio contiene un solo schema/gruppo: usare cartelle diverse per report diversi.
+        Restituisce il numero di righe aggiunte.
+        """
+        if isinstance(source, (str, os.PathLike)) and str(source).lower().endswith(".zip"):
+            added = 0
+            with zipfile.ZipFile(source) as archive:
+                for member in archive.namelist():
+                    with archive.open(member) as file:
+                        added += self.ingest_report(parse_report(file, schema, group))
+            return added
+        return self.ingest_report(parse_report(source, schema, group))
+
+    def ingest_report(self, report):
+        """
+        Aggiunge un CotReport già parsato, una partizione annuale alla volta
+        """
+        if len(report) == 0:
+            return 0
+
+        market = np.array([self._market_id(name) for name in report.names], dtype=np.int32)
+        self._save_markets()
+
+        added = 0
+        years = report.dates.astype("datetime64[Y]")
+        for year in np.unique(years):
+            rows = np.flatnonzero(years == year)
+            added += self._append_partition(str(year), report, market, rows)
+        return added
+
+    def _market_id(self, name):
+        market_id = self.market_ids.get(name)
+        if market_id is None:
+            market_id = len(self.markets)
+            self.markets.append(name)
+            self.market_ids[name] = market_id
+        return market_id
+
+    def _save_markets(self):
+        os.makedirs(self.root, exist_ok=True)
+        _write_json(os.path.join(self.root, "markets.json"), self.markets)
+
+    def _append_partition(self, year, report, market, rows):
+        meta = self._load_meta(year)
+        known = set(meta["dates"])
+        rows = rows[[str(date) not in known for date in report.dates[rows]]]
+        if rows.size == 0:
+            return 0
+
+        # Ordina per data e mercato così le fette per data sono contigue
+        rows = rows[np.lexsort((market[rows], report.dates[rows]))]
+        columns = {"date": report.dates[rows], "market": market[rows]}
+        for field, values in report.columns.items():
+            if field in COLUMN_DTYPES:
+                columns[field] = values[rows]
+
+        partition = os.path.join(self.root, year)
+        os.makedirs(partition, exist_ok=True)
+        for field, dtype in COLUMN_DTYPES.items():
+            path = os.path.join(partition, f"{field}.bin")
+            with open(path, "ab") as file:
+                # Scarta eventuali code di una scrittura interrotta
+                file.truncate(meta["rows"] * dtype.itemsize)
+                file.write(np.ascontiguousarray(columns[field], dtype=dtype).tobytes())
+
+        # I metadati vengono aggiornati per ultimi: fino a quel momento
+        # le nuove righe non sono visibili ai lettori
+        meta["rows"] += int(rows.size)
+        meta["dates"] = sorted(known | {str(date) for date in columns["date"]})
+        _write_json(os.path.join(partition, "meta.json"), meta)
+        self._memmaps = {key: value for key, value in self._memmaps.items() if key[0] != year}
+        return int(rows.size)
+
+    # ---------- Lettura ----------
+
+    def _load_meta(self, year):
+        path = os.path.join(self.root, year, "meta.json")
+        if not os.path.exists(path):
+            return {"rows": 0, "dates": []}
+        with open(path, "r") as file:
+            return json.load(file)
+
+    def years(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if entry.isdigit() and os.path.exists(os.path.join(self.root, entry, "meta.json")))
+
+    def dates(self):
+        """
+        Tutte le date dei report presenti, in ordine crescente
+        """
+        dates = []
+        for year in self.years():
+            dates.extend(self._load_meta(year)["dates"])
+        return np.array(sorted(dates), dtype="datetime64[D]")
+
+    def column(self, year, field):
+        """
+        Colonna di una partizione come array memory-mapped in sola lettura
+        """
+        key = (year, field)
+        if key not in self._memmaps:
+            rows = self._load_meta(year)["rows"]
+            path = os.path.join(self.root, year, f"{field}.bin")
+            if rows == 0:
+                self._memmaps[key] = np.empty(0, dtype=COLUMN_DTYPES[field])
+            else:
+                self._memmaps[key] = np.memmap(path, dtype=COLUMN_DTYPES[field], mode="r", shape=(rows,))
+        return self._memmaps[key]
+
+    def _years_between(self, start, end):
+        first = int(str(np.datetime64(start, "Y"))) if start is not None else None
+        last = int(str(np.datetime64(end, "Y"))) if end is not None else None
+        for year in self.years():
+            if (first is None or int(year) >= first) and (last is None or int(year) <= last):
+                yield year
+
+    def select(self, names=None, start=None, end=None, fields=None):
+        """
+        Seleziona le righe di uno o più mercati in un intervallo di date.
+        Legge solo le partizioni che cadono nell'intervallo.
+        Restituisce un dizionario colonna -> array, con i nomi dei mercati in "name".
+        """
+        fields = list(fields or [f for f in COLUMN_DTYPES if f not in ("date", "market")])
+        wanted = None
+        if names is not None:
+            wanted = np.array([self.market_ids[n] for n in names if n in self.market_ids], dtype=np.int32)
+
+        parts = {field: [] for field in ["date", "market"] + fields}
+        for year in self._years_between(start, end):
+            dates = self.column(year, "date")
+            market = self.column(year, "market")
+            mask = np.ones(dates.shape[0], dtype=bool)
+            if start is not None:
+                mask &= dates >= np.datetime64(start, "D")
+            if end is not None:
+                mask &= dates <= np.datetime64(end, "D")
+            if wanted is not None:
+                mask &= np.isin(market, wanted)
+            rows = np.flatnonzero(mask)
+            for field in parts:
+                parts[field].append(np.asarray(self.column(year, field)[rows]))
+
+        result = {}
+        for field, chunks in parts.items():
+            result[field] = np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMN_DTYPES[field])
+        result["name"] = np.array(self.markets, dtype=object)[result["market"]] if self.markets else np.empty(0, dtype=object)
+        return result
+
+    def series(self, name, start=None, end=None, fields=None):
+        """
+        Serie storica di un singolo mercato (es. una valuta), ordinata per data
+        """
+        data = self.select([name], start, end, fields)
+        order = np.argsort(data["date"], kind="stable")
+        return {field: values[order] for field, values in data.items()}
+
+    def report(self, date):
+        """
+        Ricostruisce il CotReport di una singola settimana
+        """
+        data = self.select(start=date, end=date)
+        columns = {field: data[field] for field in COLUMN_DTYPES if field not in ("date", "market")}
+        return CotReport(data["name"].tolist(), columns, data["date"])
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file)
+    os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa report COT (anche archivi annuali CFTC) nell'archivio storico")
+    parser.add_argument("files", nargs="+", help="File TXT/CSV o archivi .zip della CFTC")
+    parser.add_argument("--store", default="cot_history", help="Cartella dell'archivio storico")
+    args = parser.parse_args()
+
+    history = CotHistory(args.store)
+    for path in args.files:
+        added = history.ingest(path)
+        print(f"{path}: {added} righe aggiunte")
+    print(f"Archivio: {len(history.dates())} settimane, {len(history.markets)} mercati")
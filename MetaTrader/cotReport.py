@@ -0,0 +1,274 @@
+# Importazione librerie necessarie
+import codecs  # Per decodificare il testo a blocchi
+import csv     # Per il parsing delle righe del report
+import os      # Per operazioni sul filesystem
+import numpy as np  # Per le colonne tipizzate
+
+# Schemi dei report CFTC: nome campo -> indice di colonna nel file
+# Le prime 7 colonne (nome, date, codici) sono comuni a tutti i report
+REPORT_SCHEMAS = {
+    # Legacy: non-commercial / commercial / non-reportable
+    "legacy": {
+        "fields": {
+            "open_interest": 7,
+            "noncomm_long": 8, "noncomm_short": 9, "noncomm_spread": 10,
+            "comm_long": 11, "comm_short": 12,
+            "nonrept_long": 15, "nonrept_short": 16,
+            "open_interest_change": 37,
+            "noncomm_long_change": 38, "noncomm_short_change": 39, "noncomm_spread_change": 40,
+            "comm_long_change": 41, "comm_short_change": 42,
+            "nonrept_long_change": 45, "nonrept_short_change": 46
+        },
+        "groups": ["noncomm", "comm", "nonrept"],
+        "default_group": "noncomm"
+    },
+    # Disaggregated: producer/merchant, swap dealer, managed money, other reportable
+    "disaggregated": {
+        "fields": {
+            "open_interest": 7,
+            "prod_merc_long": 8, "prod_merc_short": 9,
+            "swap_long": 10, "swap_short": 11, "swap_spread": 12,
+            "m_money_long": 13, "m_money_short": 14, "m_money_spread": 15,
+            "other_rept_long": 16, "other_rept_short": 17, "other_rept_spread": 18,
+            "nonrept_long": 21, "nonrept_short": 22,
+            "open_interest_change": 55,
+            "prod_merc_long_change": 56, "prod_merc_short_change": 57,
+            "swap_long_change": 58, "swap_short_change": 59, "swap_spread_change": 60,
+            "m_money_long_change": 61, "m_money_short_change": 62, "m_money_spread_change": 63,
+            "other_rept_long_change": 64, "other_rept_short_change": 65, "other_rept_spread_change": 66,
+            "nonrept_long_change": 69, "nonrept_short_change": 70
+        },
+        "groups": ["prod_merc", "swap", "m_money", "other_rept", "nonrept"],
+        "default_group": "m_money"
+    },
+    # Traders in Financial Futures: dealer, asset manager, leveraged funds, other reportable
+    "tff": {
+        "fields": {
+            "open_interest": 7,
+            "dealer_long": 8, "dealer_short": 9, "dealer_spread": 10,
+            "asset_mgr_long": 11, "asset_mgr_short": 12, "asset_mgr_spread": 13,
+            "lev_money_long": 14, "lev_money_short": 15, "lev_money_spread": 16,
+            "other_rept_long": 17, "other_rept_short": 18, "other_rept_spread": 19,
+            "nonrept_long": 22, "nonrept_short": 23,
+            "open_interest_change": 24,
+            "dealer_long_change": 25, "dealer_short_change": 26, "dealer_spread_change": 27,
+            "asset_mgr_long_change": 28, "asset_mgr_short_change": 29, "asset_mgr_spread_change": 30,
+            "lev_money_long_change": 31, "lev_money_short_change": 32, "lev_money_spread_change": 33,
+            "other_rept_long_change": 34, "other_rept_short_change": 35, "other_rept_spread_change": 36,
+            "nonrept_long_change": 39, "nonrept_short_change": 40
+        },
+        "groups": ["dealer", "asset_mgr", "lev_money", "other_rept", "nonrept"],
+        "default_group": "lev_money"
+    }
+}
+
+# Report pubblicati dalla CFTC ogni settimana: (schema, URL)
+# Le versioni "combined" includono le opzioni e hanno lo stesso schema dei soli futures
+REPORT_TYPES = {
+    "legacy_futures": ("legacy", "https://www.cftc.gov/dea/newcot/deafut.txt"),
+    "legacy_combined": ("legacy", "https://www.cftc.gov/dea/newcot/deacom.txt"),
+    "disaggregated_futures": ("disaggregated", "https://www.cftc.gov/dea/newcot/f_disagg.txt"),
+    "disaggregated_combined": ("disaggregated", "https://www.cftc.gov/dea/newcot/c_disagg.txt"),
+    "tff_futures": ("tff", "https://www.cftc.gov/dea/newcot/FinFutWk.txt"),
+    "tff_combined": ("tff", "https://www.cftc.gov/dea/newcot/FinComWk.txt")
+}
+
+# Colonna con il nome del mercato, comune a tutti gli schemi
+NAME_COLUMN = 0
+
+def report_columns(schema="legacy", group=None, fields=()):
+    """
+    Colonne da estrarre per uno schema.
+    I campi standard usati dallo scoring (long_positions, short_positions,
+    long_change, short_change) puntano al gruppo di trader scelto
+    (di default: non-commercial, managed money o leveraged funds).
+    `fields` aggiunge altri campi dello schema con il loro nome; "all" li prende tutti.
+    """
+    spec = REPORT_SCHEMAS[schema]
+    group = group or spec["default_group"]
+    if group not in spec["groups"]:
+        raise ValueError(f"Gruppo '{group}' non presente nello schema '{schema}'")
+    names = spec["fields"]
+    columns = {
+        "name": NAME_COLUMN,
+        "long_positions": names[f"{group}_long"],
+        "short_positions": names[f"{group}_short"],
+        "long_change": names[f"{group}_long_change"],
+        "short_change": names[f"{group}_short_change"]
+    }
+    for field in (names if fields == "all" else fields):
+        columns[field] = names[field]
+    return columns
+
+# Colonne del report legacy usate dallo scoring di default
+# Tutte le altre ~120 colonne vengono scartate durante il parsing
+REPORT_COLUMNS = report_columns("legacy")
+
+# Colonna con la data del report nel formato YYYY-MM-DD (es. 2025-06-10)
+DATE_COLUMN = 2
+
+# Dimensione dei blocchi letti da file o dalla risposta HTTP
+CHUNK_SIZE = 64 * 1024
+
+
+class CotReport:
+    """
+    Report COT caricato una sola volta in memoria.
+    Process:
+    1. Colonne tipizzate (nome, data, posizioni, variazioni) come array NumPy
+    2. Costruzione di un indice nome mercato -> riga
+    3. Lookup O(1) per ogni mercato, senza rileggere il file
+    """
+
+    def __init__(self, names, columns, dates=None):
+        self.names = list(names)
+        self.columns = columns
+        if dates is None:
+            dates = np.full(len(self.names), np.datetime64("NaT"), dtype="datetime64[D]")
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+        # In caso di nomi duplicati vale la prima riga, come nel vecchio filtro
+        self.index = {}
+        for row, name in enumerate(self.names):
+            self.index.setdefault(name, row)
+
+    @classmethod
+    def from_csv(cls, path, schema="legacy", group=None, fields=()):
+        """
+        Legge un report COT (TXT o CSV, stesso formato) con il parser in streaming
+        """
+        return parse_report(path, schema, group, fields)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carica un report salvato con save() (cache compatta .npz)
+        """
+        with np.load(path, allow_pickle=False) as data:
+            columns = {field: data[field] for field in data.files if field not in ("names", "dates")}
+            return cls(data["names"].tolist(), columns, data["dates"])
+
+    def save(self, path):
+        """
+        Salva il report in formato .npz, scrivendo prima su un file temporaneo
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(file, names=np.array(self.names, dtype=str), dates=self.dates, **self.columns)
+        os.replace(tmp_path, path)
+
+    @property
+    def report_date(self):
+        """
+        Data del report (la più recente se il file contiene più settimane)
+        """
+        valid = self.dates[~np.isnat(self.dates)]
+        if valid.size == 0:
+            return None
+        return str(valid.max())
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def __getitem__(self, field):
+        return self.columns[field]
+
+    def get(self, name):
+        """
+        Restituisce i valori di un mercato come dizionario, o None se assente
+        """
+        row = self.index.get(name)
+        if row is None:
+            return None
+        result = {"name": name}
+        for field, values in self.columns.items():
+            result[field] = int(values[row])
+        return result
+
+
+def _iter_chunks(source, chunk_size=CHUNK_SIZE):
+    """
+    Normalizza la sorgente in una sequenza di blocchi:
+    - percorso su disco
+    - oggetto file-like (binario o testo) con read()
+    - iterabile di blocchi, es. response.iter_content()
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            yield from iter(lambda: file.read(chunk_size), b"")
+    elif hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    else:
+        yield from source
+
+
+def _iter_lines(chunks):
+    """
+    Ricompone le righe a partire da blocchi che possono spezzarle a metà
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        pending += chunk
+        lines = pending.split("\n")
+        pending = lines.pop()
+        yield from lines
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _to_int(value):
+    # Alcuni mercati riportano "." al posto delle variazioni: valgono come 0
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+
+def parse_report(source, schema="legacy", group=None, fields=(), chunk_size=CHUNK_SIZE):
+    """
+    Parser in streaming del report COT, unico per tutti gli schemi.
+    Process:
+    1. Legge la sorgente a blocchi, senza caricare tutto il file in memoria
+    2. Tiene solo le colonne richieste (report_columns), convertite in int64
+    3. Salta righe vuote e intestazioni (es. gli archivi annuali CFTC)
+    """
+    columns = report_columns(schema, group, fields)
+    fields = {field: column for field, column in columns.items() if field != "name"}
+    last_column = max(max(columns.values()), DATE_COLUMN)
+
+    names = []
+    dates = []
+    values = {field: [] for field in fields}
+    for row in csv.reader(_iter_lines(_iter_chunks(source, chunk_size))):
+        if len(row) <= last_column:
+            continue
+        try:
+            date = np.datetime64(row[DATE_COLUMN].strip(), "D")
+        except ValueError:
+            continue
+        names.append(row[NAME_COLUMN].strip())
+        dates.append(date)
+        for field, column in fields.items():
+            values[field].append(_to_int(row[column]))
+
+    typed = {field: np.array(column, dtype=np.int64) for field, column in values.items()}
+    return CotReport(names, typed, np.array(dates, dtype="datetime64[D]"))
+
+
+def load_report(path, schema="legacy", group=None, fields=()):
+    """
+    Carica un report dalla cache .npz oppure dal testo CFTC (TXT/CSV)
+    """
+    if str(path).endswith(".npz"):
+        return CotReport.load(path)
+    return parse_report(path, schema, group, fields)
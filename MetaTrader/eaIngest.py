@@ -0,0 +1,303 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import asyncio   # Per gestire molte connessioni su un solo core
+import json      # Per i payload degli Expert Advisor
+import os        # Per operazioni sul filesystem
+import time      # Per il timestamp di ricezione
+
+# Schema fisso dei record inviati da connexus.mq5
+# campo -> (tipi ammessi, obbligatorio)
+EA_SCHEMA = {
+    "id": ((int,), True),
+    "name": ((str,), True),
+    "creator": ((str,), True),
+    "description": ((str,), False),
+    "performance": ((dict,), True),
+    "price": ((int, float), True),
+    "stars": ((int,), True),
+    "reviews": ((int,), True),
+    "image": ((str,), False),
+    "historical_data": ((str,), True)
+}
+PERFORMANCE_SCHEMA = {
+    "roi": ((int, float), True),
+    "risk_level": ((str,), True),
+    "win_rate": ((int, float), True)
+}
+RISK_LEVELS = ("Basso", "Medio", "Alto")
+
+# Limiti per mantenere la memoria limitata anche sotto raffica
+MAX_BODY_SIZE = 64 * 1024
+MAX_HEADER_SIZE = 8 * 1024
+QUEUE_SIZE = 10000
+BATCH_SIZE = 1000
+BATCH_DELAY = 0.005  # secondi di attesa massima per riempire un gruppo
+# Connessioni lente o inattive non possono occupare il server per sempre
+READ_TIMEOUT = 30.0  # secondi per ricevere header o corpo (anche tra due richieste keep-alive)
+MAX_CONNECTIONS = 1000  # oltre questo numero le nuove connessioni ricevono 503 e vengono chiuse
+
+
+def _check_fields(record, schema, prefix=""):
+    errors = []
+    for field, (types, required) in schema.items():
+        if field not in record:
+            if required:
+                errors.append(f"campo mancante: {prefix}{field}")
+            continue
+        value = record[field]
+        # bool è una sottoclasse di int ma non è un valore valido qui
+        if isinstance(value, bool) or not isinstance(value, types):
+            errors.append(f"tipo non valido: {prefix}{field}")
+    return errors
+
+
+def validate_ea(record):
+    """
+    Valida un record EA contro lo schema fisso
+    Restituisce la lista degli errori (vuota se il record è valido)
+    """
+    if not isinstance(record, dict):
+        return ["il corpo deve essere un oggetto JSON"]
+    errors = _check_fields(record, EA_SCHEMA)
+    performance = record.get("performance")
+    if isinstance(performance, dict):
+        errors += _check_fields(performance, PERFORMANCE_SCHEMA, "performance.")
+        if isinstance(performance.get("risk_level"), str) and performance["risk_level"] not in RISK_LEVELS:
+            errors.append("valore non valido: performance.risk_level")
+    if isinstance(record.get("stars"), int) and not 0 <= record["stars"] <= 5:
+        errors.append("valore non valido: stars")
+    if isinstance(record.get("reviews"), int) and record["reviews"] < 0:
+        errors.append("valore non valido: reviews")
+    return errors
+
+
+class EAStore:
+    """
+    Archivio append-only dei record EA (una riga JSON per record)
+    Scrive gruppi di record con una sola write + fsync (group commit)
+    """
+
+    def __init__(self, path="ea_records.jsonl", fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.file = open(path, "ab")
+
+    def append_batch(self, lines):
+        self.file.write(b"".join(lines))
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+
+class EAIngestServer:
+    """
+    Server asyncio per i POST degli Expert Advisor (http://127.0.0.1:5000/post).
+    Process:
+    1. Parsing HTTP minimale con keep-alive, un solo processo e un solo thread
+    2. Validazione del record contro EA_SCHEMA
+    3. Coda limitata: oltre QUEUE_SIZE record in attesa si risponde 503 invece di crescere in memoria
+    4. Un unico writer raccoglie i record in gruppi e li rende persistenti con una sola scrittura
+    5. Letture con timeout (read_timeout) e al massimo max_connections connessioni aperte
+    La risposta 200 arriva solo dopo che il gruppo del record è stato scritto.
+    """
+
+    def __init__(self, store, queue_size=QUEUE_SIZE, batch_size=BATCH_SIZE, batch_delay=BATCH_DELAY,
+                 read_timeout=READ_TIMEOUT, max_connections=MAX_CONNECTIONS):
+        self.store = store
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.read_timeout = read_timeout
+        self.max_connections = max_connections
+        self.connections = 0
+        self.stats = {"accepted": 0, "rejected": 0, "overloaded": 0, "batches": 0, "refused": 0, "timeouts": 0,
+                      "failed": 0}
+        self._writer_task = None
+
+    # ---------- Group commit ----------
+
+    async def _writer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+            while len(batch) < self.batch_size:
+                if self.queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self.queue.get_nowait())
+
+            lines = [line for line, _ in batch]
+            try:
+                # La scrittura su disco avviene fuori dal loop per non bloccare le connessioni
+                await loop.run_in_executor(None, self.store.append_batch, lines)
+                error = None
+            except Exception as e:
+                # Qualsiasi errore (disco, file chiuso, executor fermo) fallisce solo questo gruppo:
+                # il writer deve restare vivo, altrimenti ogni submit() attenderebbe per sempre
+                error = e
+            self.stats["batches"] += 1
+            for _, future in batch:
+                if not future.done():
+                    if error is None:
+                        future.set_result(True)
+                    else:
+                        future.set_exception(error)
+
+    async def submit(self, record):
+        """
+        Accoda un record valido e attende che il suo gruppo sia scritto
+        Restituisce False se la coda è piena
+        """
+        line = json.dumps({"received_at": time.time(), "record": record},
+                          ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((line, future))
+        except asyncio.QueueFull:
+            return False
+        await future
+        return True
+
+    # ---------- HTTP ----------
+
+    async def handle(self, reader, writer):
+        if self.connections >= self.max_connections:
+            # Troppe connessioni aperte: si rifiuta subito invece di accumulare socket
+            self.stats["refused"] += 1
+            try:
+                await self._respond(writer, 503, {"error": "troppe connessioni, riprovare"}, keep_alive=False)
+            except ConnectionError:
+                pass
+            finally:
+                writer.close()
+            return
+
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.read_timeout)
+                except asyncio.IncompleteReadError:
+                    break
+                except asyncio.TimeoutError:
+                    # Connessione inattiva (o header inviati troppo lentamente): si chiude senza risposta
+                    self.stats["timeouts"] += 1
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {"error": "header troppo grandi"}, keep_alive=False)
+                    break
+
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                parts = request_line.split(" ")
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {"error": "richiesta non valida"}, keep_alive=False)
+                    break
+                method, path, version = parts
+                headers = {}
+                for header in header_lines:
+                    if ":" in header:
+                        key, value = header.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, {"error": "corpo troppo grande"}, keep_alive=False)
+                    break
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), self.read_timeout) if length else b""
+                except asyncio.TimeoutError:
+                    self.stats["timeouts"] += 1
+                    await self._respond(writer, 408, {"error": "corpo non ricevuto in tempo"}, keep_alive=False)
+                    break
+
+                status, response = await self._route(method, path, body)
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if path != "/post":
+            return 404, {"error": "percorso non trovato"}
+        if method != "POST":
+            return 405, {"error": "metodo non consentito"}
+        try:
+            record = json.loads(body)
+        except (ValueError, UnicodeDecodeError):
+            self.stats["rejected"] += 1
+            return 400, {"error": "JSON non valido"}
+        errors = validate_ea(record)
+        if errors:
+            self.stats["rejected"] += 1
+            return 400, {"error": "record non valido", "details": errors}
+        try:
+            queued = await self.submit(record)
+        except Exception as e:
+            # Il gruppo del record non è stato scritto: il client può riprovare
+            self.stats["failed"] += 1
+            return 500, {"error": f"scrittura non riuscita: {e}"}
+        if not queued:
+            self.stats["overloaded"] += 1
+            return 503, {"error": "server sovraccarico, riprovare"}
+        self.stats["accepted"] += 1
+        return 200, {"status": "ok", "id": record["id"]}
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 408: "Request Timeout",
+                   413: "Payload Too Large", 431: "Request Header Fields Too Large", 500: "Internal Server Error",
+                   503: "Service Unavailable"}
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {reasons[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def start(self, host="127.0.0.1", port=5000):
+        self._writer_task = asyncio.create_task(self._writer())
+        return await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_SIZE)
+
+
+async def serve(host, port, path, fsync, read_timeout=READ_TIMEOUT, max_connections=MAX_CONNECTIONS):
+    store = EAStore(path, fsync=fsync)
+    server = await EAIngestServer(store, read_timeout=read_timeout, max_connections=max_connections).start(host, port)
+    print(f"Ricezione EA su http://{host}:{port}/post -> {path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server di ricezione dei record inviati dagli Expert Advisor")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--store", default="ea_records.jsonl", help="File append-only dei record")
+    parser.add_argument("--no-fsync", action="store_true", help="Non forzare la scrittura su disco ad ogni gruppo")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT, help="Secondi massimi per ricevere una richiesta")
+    parser.add_argument("--max-connections", type=int, default=MAX_CONNECTIONS, help="Connessioni aperte contemporaneamente")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.store, not args.no_fsync, args.read_timeout, args.max_connections))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,99 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import asyncio   # Per simulare molti terminali contemporaneamente
+import json      # Per i payload degli Expert Advisor
+import random    # Per i dati sintetici
+import time      # Per le misure
+
+# Nomi e creatori usati per generare EA sintetici (come Website/src/generateExperts.ts)
+EA_NAMES = ["Quantum Trader", "Neural Profit", "Scalper X", "Momentum Master",
+            "Market Sentinel", "Crypto Crusher", "AI Scalper"]
+CREATORS = ["John Doe", "Jane Smith", "Mario Rossi", "Anna Bianchi"]
+RISK_LEVELS = ["Basso", "Medio", "Alto"]
+
+
+def synthetic_payload(ea_id):
+    """
+    Record EA sintetico con la stessa struttura inviata da connexus.mq5
+    """
+    name = random.choice(EA_NAMES)
+    return {
+        "id": ea_id,
+        "name": name,
+        "creator": random.choice(CREATORS),
+        "description": "Expert Advisor sintetico per il benchmark di ricezione.",
+        "performance": {
+            "roi": round(random.uniform(5, 50), 2),
+            "risk_level": random.choice(RISK_LEVELS),
+            "win_rate": random.randint(50, 95)
+        },
+        "price": random.randint(49, 499),
+        "stars": random.randint(1, 5),
+        "reviews": random.randint(0, 500),
+        "image": f"{name}.webp",
+        "historical_data": f"{name}.json"
+    }
+
+
+def build_request(host, port, payload):
+    body = json.dumps(payload).encode("utf-8")
+    head = (f"POST /post HTTP/1.1\r\nHost: {host}:{port}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+async def terminal(host, port, requests, latencies, statuses, first_id):
+    """
+    Un terminale simulato: una connessione keep-alive che invia `requests` record in sequenza
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for i in range(requests):
+            request = build_request(host, port, synthetic_payload(first_id + i))
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run_benchmark(host, port, terminals, requests):
+    latencies = []
+    statuses = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        terminal(host, port, requests, latencies, statuses, t * requests) for t in range(terminals)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    return {
+        "requests": total,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(total / elapsed, 1) if elapsed else None,
+        "latency_ms_p50": round(latencies[total // 2] * 1000, 3) if total else None,
+        "latency_ms_p99": round(latencies[min(total - 1, int(total * 0.99))] * 1000, 3) if total else None,
+        "statuses": statuses
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generatore di carico per eaIngest.py con record EA sintetici")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--terminals", type=int, default=100, help="Connessioni simultanee (terminali MT5)")
+    parser.add_argument("--requests", type=int, default=100, help="Record inviati da ogni terminale")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_benchmark(args.host, args.port, args.terminals, args.requests))
+    print(json.dumps(result, indent=2))
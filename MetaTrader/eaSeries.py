@@ -0,0 +1,216 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import json      # Per metadati e file historical_data
+import os        # Per operazioni sul filesystem
+import numpy as np  # Per le colonne a larghezza fissa
+
+# Ogni livello aggregato raggruppa BUCKET_FACTOR elementi del livello precedente
+# (livello 1 = 16 punti grezzi, livello 2 = 256, livello 3 = 4096, ...)
+BUCKET_FACTOR = 16
+MAX_LEVELS = 8
+
+# Colonne su disco: dati grezzi e livelli aggregati (inizio bucket, minimo, massimo, ultimo valore)
+RAW_DTYPES = {"time": np.dtype("<i8"), "value": np.dtype("<f8")}
+LEVEL_DTYPES = {"time": np.dtype("<i8"), "min": np.dtype("<f8"), "max": np.dtype("<f8"), "last": np.dtype("<f8")}
+
+
+class EASeriesStore:
+    """
+    Archivio delle serie storiche (equity/trade) degli Expert Advisor.
+    Struttura su disco per ogni EA:
+    - time.bin / value.bin: punti grezzi a larghezza fissa (int64 / float64)
+    - level<k>_<colonna>.bin: bucket min/max pre-aggregati a risoluzione 16^k
+    - meta.json: numero di righe valide per ogni file
+    Le letture usano np.memmap, quindi una query tocca solo le pagine necessarie.
+    """
+
+    def __init__(self, root="ea_series"):
+        self.root = root
+
+    def _dir(self, name):
+        # Il nome dell'EA diventa una cartella: niente separatori di percorso
+        return os.path.join(self.root, name.replace("/", "_").replace("\\", "_"))
+
+    def _load_meta(self, name):
+        path = os.path.join(self._dir(name), "meta.json")
+        if not os.path.exists(path):
+            return {"rows": 0, "levels": []}
+        with open(path, "r") as file:
+            return json.load(file)
+
+    def _save_meta(self, name, meta):
+        path = os.path.join(self._dir(name), "meta.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, path)
+
+    def _read(self, name, column, dtype, rows):
+        path = os.path.join(self._dir(name), f"{column}.bin")
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+
+    def _write(self, name, column, dtype, keep, values):
+        """
+        Tiene le prime `keep` righe del file e accoda `values`
+        """
+        path = os.path.join(self._dir(name), f"{column}.bin")
+        with open(path, "ab") as file:
+            file.truncate(keep * dtype.itemsize)
+            file.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def names(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, entry, "meta.json")))
+
+    # ---------- Scrittura ----------
+
+    def append(self, name, times, values):
+        """
+        Accoda punti a una serie (tempi crescenti e successivi all'ultimo punto)
+        I livelli aggregati vengono ricalcolati solo a partire dall'ultimo bucket incompleto
+        """
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        if times.shape != values.shape:
+            raise ValueError("times e values devono avere la stessa lunghezza")
+        if times.size == 0:
+            return 0
+        if np.any(np.diff(times) < 0):
+            raise ValueError("i tempi devono essere in ordine crescente")
+
+        meta = self._load_meta(name)
+        old_rows = meta["rows"]
+        if old_rows and times[0] < self._read(name, "time", RAW_DTYPES["time"], old_rows)[-1]:
+            raise ValueError("i nuovi punti devono seguire l'ultimo punto salvato")
+
+        os.makedirs(self._dir(name), exist_ok=True)
+        self._write(name, "time", RAW_DTYPES["time"], old_rows, times)
+        self._write(name, "value", RAW_DTYPES["value"], old_rows, values)
+        rows = old_rows + times.size
+
+        # Per ogni livello si ricalcola solo dal primo bucket toccato dai nuovi punti:
+        # i bucket precedenti sono completi e restano invariati
+        levels = []
+        size = 1
+        for level in range(1, MAX_LEVELS + 1):
+            size *= BUCKET_FACTOR
+            count = -(-rows // size)
+            old_count = meta["levels"][level - 1] if level - 1 < len(meta["levels"]) else 0
+            first = min(old_rows // size, old_count)
+            start = first * BUCKET_FACTOR
+            if level == 1:
+                raw_value = self._read(name, "value", RAW_DTYPES["value"], rows)[start:]
+                source = {"time": self._read(name, "time", RAW_DTYPES["time"], rows)[start:],
+                          "min": raw_value, "max": raw_value, "last": raw_value}
+            else:
+                source = {column: self._read(name, f"level{level - 1}_{column}", dtype, levels[-1])[start:]
+                          for column, dtype in LEVEL_DTYPES.items()}
+            buckets = _aggregate(source)
+            for column, dtype in LEVEL_DTYPES.items():
+                self._write(name, f"level{level}_{column}", dtype, first, buckets[column])
+            levels.append(count)
+            if count <= 1:
+                break
+
+        # I metadati vengono aggiornati per ultimi
+        meta["rows"] = rows
+        meta["levels"] = levels
+        self._save_meta(name, meta)
+        return int(times.size)
+
+    def import_json(self, name, path):
+        """
+        Importa un file historical_data. Formati accettati:
+        - lista di valori (es. performance.data generato dal sito): tempo = indice del punto
+        - lista di coppie [tempo, valore] o di oggetti {"time": ..., "value": ...}
+        - oggetto con chiave "data" o "performance.data" contenente uno dei precedenti
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if isinstance(data, dict):
+            data = data.get("data") or data.get("performance", {}).get("data") or []
+        if data and isinstance(data[0], dict):
+            times = [point["time"] for point in data]
+            values = [point["value"] for point in data]
+        elif data and isinstance(data[0], (list, tuple)):
+            times = [point[0] for point in data]
+            values = [point[1] for point in data]
+        else:
+            offset = self._load_meta(name)["rows"]
+            times = np.arange(offset, offset + len(data))
+            values = data
+        return self.append(name, times, values)
+
+    # ---------- Lettura ----------
+
+    def query(self, name, start=None, end=None, max_points=1000):
+        """
+        Restituisce la serie tra start e end (inclusi) con al massimo ~max_points punti.
+        Se l'intervallo ha pochi punti restituisce i dati grezzi, altrimenti usa
+        il livello aggregato più fine che rispetta il limite (due punti, min e max, per bucket).
+        """
+        meta = self._load_meta(name)
+        rows = meta["rows"]
+        times = self._read(name, "time", RAW_DTYPES["time"], rows)
+        first = 0 if start is None else int(np.searchsorted(times, start, side="left"))
+        last = rows if end is None else int(np.searchsorted(times, end, side="right"))
+        count = max(0, last - first)
+
+        if count <= max_points:
+            values = self._read(name, "value", RAW_DTYPES["value"], rows)
+            return {"level": 0, "time": np.array(times[first:last]), "value": np.array(values[first:last])}
+
+        size = 1
+        for level, level_rows in enumerate(meta["levels"], start=1):
+            size *= BUCKET_FACTOR
+            if 2 * count / size <= max_points or level == len(meta["levels"]):
+                lo, hi = first // size, (last - 1) // size + 1
+                result = {"level": level}
+                for column, dtype in LEVEL_DTYPES.items():
+                    result[column] = np.array(self._read(name, f"level{level}_{column}", dtype, level_rows)[lo:hi])
+                return result
+        return {"level": 0, "time": np.empty(0, dtype=np.int64), "value": np.empty(0)}
+
+
+def _aggregate(source):
+    """
+    Raggruppa la sorgente in bucket di BUCKET_FACTOR elementi (l'ultimo può essere incompleto)
+    """
+    length = len(source["time"])
+    if length == 0:
+        return {column: np.empty(0, dtype=dtype) for column, dtype in LEVEL_DTYPES.items()}
+    starts = np.arange(0, length, BUCKET_FACTOR)
+    ends = np.minimum(starts + BUCKET_FACTOR, length) - 1
+    return {
+        "time": np.asarray(source["time"])[starts],
+        "min": np.minimum.reduceat(np.asarray(source["min"]), starts),
+        "max": np.maximum.reduceat(np.asarray(source["max"]), starts),
+        "last": np.asarray(source["last"])[ends]
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivio delle serie storiche degli Expert Advisor")
+    parser.add_argument("--store", default="ea_series", help="Cartella dell'archivio")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Importa un file historical_data JSON")
+    import_parser.add_argument("name", help="Nome dell'EA (es. \"Quantum Trader\")")
+    import_parser.add_argument("path", help="File JSON (es. \"Quantum Trader.json\")")
+    query_parser = commands.add_parser("query", help="Interroga una serie")
+    query_parser.add_argument("name")
+    query_parser.add_argument("--start", type=int)
+    query_parser.add_argument("--end", type=int)
+    query_parser.add_argument("--points", type=int, default=1000)
+    args = parser.parse_args()
+
+    store = EASeriesStore(args.store)
+    if args.command == "import":
+        print(f"{store.import_json(args.name, args.path)} punti importati per {args.name}")
+    else:
+        result = store.query(args.name, args.start, args.end, args.points)
+        print(json.dumps({column: np.asarray(values).tolist() if column != "level" else values
+                          for column, values in result.items()}))
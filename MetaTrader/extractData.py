@@ -1,4 +1,11 @@
+import argparse  # Per la riga di comando
+import json      # Per la tabella dei range
 import numpy as np
+import pandas as pd
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation, JsonLinesSink  # Metriche per fase
+
+# Percentili che separano le fasce basso/medio/alto
+PERCENTILES = (33, 66)
 
 def analyze_delta_tot():
     # I dati sono direttamente inseriti qui come stringa multi-riga
@@ -93,24 +100,14 @@ def analyze_delta_tot():
 2.712
     """
     
-    # Pulisci e dividi la stringa in righe
-    lines = delta_tot_str.strip().split('\n')
-    values = []
-    
-    # Elabora ogni riga cercando numeri
-    for line in lines:
-        try:
-            # Rimuove eventuali spazi extra e punti decimali, poi converte in intero
-            line_cleaned = line.strip().replace('.', '')
-            value = int(line_cleaned)
-            values.append(value)
-        except ValueError:
-            # Se non è un numero valido, ignora
-            continue
+    # Pulisce tutti i valori in un solo passaggio vettoriale:
+    # rimuove i punti (separatori delle migliaia) e scarta ciò che non è un numero
+    tokens = pd.Series(delta_tot_str.split()).str.replace('.', '', regex=False)
+    values = pd.to_numeric(tokens, errors='coerce').dropna().astype(np.int64).to_numpy()
     
     # Separa i valori positivi e negativi
-    positivi = [x for x in values if x > 0]
-    negativi = [x for x in values if x < 0]
+    positivi = values[values > 0]
+    negativi = values[values < 0]
     
     # Trova il massimo e il minimo
     max_value = max(values)
@@ -121,23 +118,15 @@ def analyze_delta_tot():
     print(f"Minimo valore trovato: {format_number(min_value)}")
     print("")
     
-    # Gestione valori positivi
-    if not positivi:
+    if positivi.size == 0:
         print("Attenzione: Non ci sono valori positivi nei dati.")
-        pos_low = 0
-        pos_med = 0
-    else:
-        pos_low = np.percentile(positivi, 33)
-        pos_med = np.percentile(positivi, 66)
-    
-    # Gestione valori negativi
-    if not negativi:
+    if negativi.size == 0:
         print("Attenzione: Non ci sono valori negativi nei dati.")
-        neg_high = 0
-        neg_med = 0
-    else:
-        neg_high = np.percentile(negativi, 33)
-        neg_med = np.percentile(negativi, 66)
+
+    # Stesse bande usate per la ricalibrazione di tutte le valute
+    bands = compute_bands(np.zeros(values.size, dtype=np.int64), values).iloc[0]
+    pos_low, pos_med = bands["pos_low"], bands["pos_med"]
+    neg_high, neg_med = bands["neg_high"], bands["neg_med"]
     
     # Formatta i numeri con punto decimale come nell'esempio
     pos_low_fmt = format_number(pos_low)
@@ -179,6 +168,113 @@ def format_number(num):
     formatted = f"{num:.3f}".rstrip('0').rstrip('.')
     return formatted
 
+def compute_bands(symbols, deltas):
+    """
+    Calcola le bande percentili di tutte le valute in un solo passaggio (groupby)
+    Output per valuta:
+    - pos_low / pos_med: 33° e 66° percentile dei delta positivi
+    - neg_high / neg_med: 33° e 66° percentile dei delta negativi
+    Le valute senza valori positivi (o negativi) ricevono 0, come in analyze_delta_tot
+    """
+    data = pd.DataFrame({"symbol": symbols, "delta": deltas})
+    quantiles = [p / 100 for p in PERCENTILES]
+    bands = pd.DataFrame(index=pd.Index(pd.unique(data["symbol"]), name="symbol"))
+
+    positive = data[data["delta"] > 0].groupby("symbol")["delta"].quantile(quantiles).unstack()
+    negative = data[data["delta"] < 0].groupby("symbol")["delta"].quantile(quantiles).unstack()
+    bands["pos_low"] = positive.get(quantiles[0])
+    bands["pos_med"] = positive.get(quantiles[1])
+    bands["neg_high"] = negative.get(quantiles[0])
+    bands["neg_med"] = negative.get(quantiles[1])
+    return bands.fillna(0.0)
+
+def compute_rolling_bands(dates, symbols, deltas, window):
+    """
+    Bande percentili su finestra mobile di `window` settimane, per ogni data e valuta
+    Utile per i backtest: ogni settimana usa solo i dati disponibili fino a quel momento
+    """
+    wide = pd.DataFrame({"date": dates, "symbol": symbols, "delta": deltas}).pivot_table(
+        index="date", columns="symbol", values="delta", aggfunc="first")
+    quantiles = [p / 100 for p in PERCENTILES]
+    positive = wide.where(wide > 0).rolling(window, min_periods=1)
+    negative = wide.where(wide < 0).rolling(window, min_periods=1)
+    bands = pd.DataFrame({
+        "pos_low": positive.quantile(quantiles[0]).stack(),
+        "pos_med": positive.quantile(quantiles[1]).stack(),
+        "neg_high": negative.quantile(quantiles[0]).stack(),
+        "neg_med": negative.quantile(quantiles[1]).stack(),
+    })
+    return bands.fillna(0.0)
+
+def bands_to_ranges(bands):
+    """
+    Converte le bande nel formato di CURRENCY_RANGES (getData.py)
+    """
+    ranges = {}
+    for symbol, row in bands.iterrows():
+        pos_low, pos_med = round(float(row["pos_low"]), 2), round(float(row["pos_med"]), 2)
+        neg_high, neg_med = round(float(row["neg_high"]), 2), round(float(row["neg_med"]), 2)
+        ranges[symbol] = {
+            "positive": {"low": [0, pos_low], "medium": [pos_low, pos_med], "high": pos_med},
+            "negative": {"low": [neg_med, -1], "medium": [neg_high, neg_med], "high": neg_high}
+        }
+    return ranges
+
+def load_history_deltas(history, mapping, start=None, end=None):
+    """
+    Estrae dall'archivio storico (cotHistory.py) date, simboli e delta semplici
+    (long_change - short_change) di tutte le valute in `mapping`
+    """
+    data = history.select(names=list(mapping), start=start, end=end, fields=["long_change", "short_change"])
+    symbols = pd.Series(data["name"]).map(mapping).to_numpy()
+    deltas = data["long_change"] - data["short_change"]
+    return data["date"], symbols, deltas
+
+def calibrate_ranges(history, mapping, start=None, end=None, window=None, instrument=None):
+    """
+    Ricalibra i range di tutte le valute dall'archivio storico
+    Con `window` usa solo le ultime N settimane di ogni valuta
+    instrument riceve gli span "load_history" e "bands"
+    """
+    instrument = instrument or NULL_INSTRUMENTATION
+    with instrument.span("load_history", first_date=start, last_date=end) as span:
+        dates, symbols, deltas = load_history_deltas(history, mapping, start, end)
+        span.set(rows=len(deltas))
+    with instrument.span("bands", window=window) as span:
+        if window:
+            bands = compute_rolling_bands(dates, symbols, deltas, window)
+            bands = bands.groupby(level="symbol").tail(1).droplevel("date")
+        else:
+            bands = compute_bands(symbols, deltas)
+        span.set(rows=len(bands))
+    return bands_to_ranges(bands.sort_index())
+
 if __name__ == "__main__":
-    # Esegui l'analisi direttamente con i dati inseriti nella funzione
-    analyze_delta_tot()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Calcolo dei range di classificazione del Delta TOT")
+    parser.add_argument("--history", help="Cartella dell'archivio storico COT (cotHistory.py)")
+    parser.add_argument("--output", default="currency_ranges.json", help="File dei range letto da getData.py")
+    parser.add_argument("--start", help="Data iniziale (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Data finale (YYYY-MM-DD)")
+    parser.add_argument("--window", type=int, help="Usa solo le ultime N settimane")
+    parser.add_argument("--rolling-output", help="CSV con le bande su finestra mobile per ogni settimana")
+    parser.add_argument("--metrics", help="File JSON lines con le metriche di ogni fase")
+    args = parser.parse_args()
+
+    if not args.history:
+        # Esegui l'analisi direttamente con i dati inseriti nella funzione
+        analyze_delta_tot()
+    else:
+        from cotHistory import CotHistory
+        from getData import currency_mapping
+
+        history = CotHistory(args.history)
+        instrument = Instrumentation([JsonLinesSink(args.metrics)] if args.metrics else [])
+        ranges = calibrate_ranges(history, currency_mapping, args.start, args.end, args.window, instrument)
+        with open(args.output, "w") as file:
+            json.dump(ranges, file, indent=2)
+        print(f"Range ricalibrati per {len(ranges)} valute salvati in {args.output}")
+
+        if args.rolling_output:
+            dates, symbols, deltas = load_history_deltas(history, currency_mapping, args.start, args.end)
+            compute_rolling_bands(dates, symbols, deltas, args.window or 52).to_csv(args.rolling_output)
+            print(f"Bande su finestra mobile salvate in {args.rolling_output}")
\ No newline at end of file
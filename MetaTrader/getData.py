@@ -1,9 +1,13 @@
 # Importazione librerie necessarie
-import requests  # Per le richieste HTTP
-import csv      # Per gestione file CSV
+import json     # Per i range ricalibrati
 import os       # Per operazioni sul filesystem
-import pandas as pd  # Per analisi dati
-import getpass  # Per ottenere username Windows
+import numpy as np  # Per la classificazione vettoriale
+import argparse  # Per la riga di comando
+import sys      # Per il codice di uscita
+from cotReport import REPORT_SCHEMAS, REPORT_TYPES, load_report  # Schemi e report COT
+from reportCache import DownloadError, ReportCache, fetch_report  # Download condizionale con cache
+from publisher import Publisher, common_files_folder, find_terminal_folders, render_csv, write_atomic  # Pubblicazione dei segnali
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation, JsonLinesSink, StdoutSink  # Metriche per fase
 
 # Valori nominali dei contratti in USD
 # Questi valori rappresentano il "peso" effettivo di ogni contratto future
@@ -50,38 +54,52 @@ MAJOR_PAIRS = [
     "EURUSD", "GBPUSD", "USDJPY", "USDCHF", "AUDUSD", "USDCAD", "NZDUSD"
 ]
 
+# Indice inverso simbolo -> nome completo CFTC
+symbol_to_name = {symbol: name for name, symbol in currency_mapping.items()}
+
+# Ordine convenzionale di quotazione: in ogni coppia la valuta che viene prima è la base
+# Le valute non elencate (es. MXN, BRL, ZAR) vengono quotate contro tutte queste
+CURRENCY_PRIORITY = ["EUR", "GBP", "AUD", "NZD", "USD", "CAD", "CHF", "JPY"]
+
+def quote_priority(symbol):
+    if symbol in CURRENCY_PRIORITY:
+        return (CURRENCY_PRIORITY.index(symbol), symbol)
+    return (len(CURRENCY_PRIORITY), symbol)
+
+def all_pairs(symbols=None):
+    """
+    Tutte le coppie (major e cross) tra le valute mappate, con la base secondo convenzione
+    """
+    ordered = sorted(symbols or symbol_to_name, key=quote_priority)
+    return [base + quote for i, base in enumerate(ordered) for quote in ordered[i + 1:]]
+
 # Configurazione per il download dei dati CFTC
-url = "https://www.cftc.gov/dea/newcot/deafut.txt"
-output_txt = "COT_Report.txt"
-output_csv = "COT_Report.csv"
+# Il report di default è il legacy futures-only (deafut.txt); vedi cotReport.REPORT_TYPES
+REPORT_TYPE = "legacy_futures"
+url = REPORT_TYPES[REPORT_TYPE][1]
+cache_dir = "cot_cache"
 
-def download_and_convert():
+def download_and_convert(cache=None, quiet=False, report_type=REPORT_TYPE, group=None, instrument=None):
     """
-    Scarica e converte i dati COT da TXT a CSV.
+    Scarica il report COT solo se è cambiato e lo converte in tabella colonnare.
     Efficiente perché:
-    1. Scarica solo una volta i dati
-    2. Elimina il file temporaneo dopo l'uso
-    3. Gestisce gli errori di download
-    """
-    print("Scaricando il file TXT...")
-    response = requests.get(url)
-    if response.status_code == 200:
-        with open(output_txt, "wb") as file:
-            file.write(response.content)
-        print(f"File TXT scaricato con successo: {output_txt}")
+    1. Richiesta condizionale (ETag/Last-Modified): se nulla è cambiato non si scarica nulla
+    2. Il parsing avviene in streaming mentre i dati arrivano
+    3. Il report parsato resta in cache, indicizzato per data del report
+    Il gruppo di trader (es. "lev_money" nel TFF) diventa long/short dello scoring
+    instrument riceve lo span "fetch"; senza, i messaggi vanno a video se quiet è False
+    Restituisce (report, changed); solleva DownloadError in caso di errore HTTP
+    """
+    schema, report_url = REPORT_TYPES[report_type]
+    group = group or REPORT_SCHEMAS[schema]["default_group"]
+    # Una cache per report e gruppo: le colonne salvate dipendono da entrambi
+    if report_type == REPORT_TYPE and group == REPORT_SCHEMAS[schema]["default_group"]:
+        cache = cache or ReportCache(cache_dir)
     else:
-        print(f"Errore nel download: {response.status_code}")
-        exit()
-
-    print("Convertendo il file TXT in CSV...")
-    with open(output_txt, "r") as txt_file, open(output_csv, "w", newline="") as csv_file:
-        reader = csv.reader(txt_file, delimiter=",")
-        writer = csv.writer(csv_file)
-        for row in reader:
-            writer.writerow(row)
-
-    os.remove(output_txt)
-    print("Pulizia completata.")
+        cache = cache or ReportCache(os.path.join(cache_dir, f"{report_type}_{group}"))
+    if instrument is None:
+        instrument = NULL_INSTRUMENTATION if quiet else Instrumentation([ConsoleRenderer()])
+    return fetch_report(report_url, cache, schema=schema, group=group, instrument=instrument)
 
 # Range storici per ogni valuta
 # Questi valori sono basati su anni di backtest e rappresentano 
@@ -121,14 +139,36 @@ CURRENCY_RANGES = {
     }
 }
 
-def classify_delta_tot(currency_symbol, delta_tot):
+# Range ricalibrati prodotti da extractData.py (opzionale)
+RANGES_FILE = "currency_ranges.json"
+
+def load_currency_ranges(path=RANGES_FILE):
     """
-    Classifica il delta usando i range storici.
+    Tabella dei range storici con le valute ricalibrate sostituite, se il file esiste
+    Il file ha la stessa struttura di CURRENCY_RANGES (liste al posto delle tuple)
+    Restituisce una nuova tabella: CURRENCY_RANGES non viene modificato
+    """
+    table = dict(CURRENCY_RANGES)
+    if not path or not os.path.exists(path):
+        return table
+    with open(path, "r") as file:
+        calibrated = json.load(file)
+    for symbol, ranges in calibrated.items():
+        table[symbol] = {
+            side: {level: tuple(value) if isinstance(value, list) else value
+                   for level, value in levels.items()}
+            for side, levels in ranges.items()
+        }
+    return table
+
+def classify_delta_tot(currency_symbol, delta_tot, ranges=None):
+    """
+    Classifica il delta usando i range storici (di default CURRENCY_RANGES).
     Vantaggi:
     1. Tiene conto della storia specifica di ogni valuta
     2. Range calibrati su dati reali
     """
-    ranges = CURRENCY_RANGES[currency_symbol]
+    ranges = (ranges or CURRENCY_RANGES)[currency_symbol]
     if delta_tot > 0:
         if delta_tot <= ranges["positive"]["low"][1]:
             return "🟡 BASSO POSITIVO"
@@ -165,15 +205,15 @@ CURRENCY_RANGES_PERCENT = {
             "negative": {"low": (-2, 0), "medium": (-5, -2), "high": -5}}
 }
 
-def classify_delta_tot_percent(currency_symbol, delta_percent):
+def classify_delta_tot_percent(currency_symbol, delta_percent, ranges_percent=None):
     """
-    Classifica il Delta TOT in termini percentuali
+    Classifica il Delta TOT in termini percentuali (di default CURRENCY_RANGES_PERCENT)
     Vantaggi:
     1. Valori normalizzati e confrontabili tra valute
     2. Scala intuitiva da -10 a +10
     3. Classificazione con emoji per facile lettura
     """
-    ranges = CURRENCY_RANGES_PERCENT[currency_symbol]
+    ranges = (ranges_percent or CURRENCY_RANGES_PERCENT)[currency_symbol]
     
     if delta_percent > 0:
         if delta_percent <= ranges["positive"]["low"][1]:
@@ -190,30 +230,21 @@ def classify_delta_tot_percent(currency_symbol, delta_percent):
         else:
             return "❌ ALTO NEGATIVO"
 
-def get_currency_data(currency_name):
+def get_currency_data(currency_name, report, ranges=None):
     """
     Recupera e analizza i dati COT per una singola valuta
+    ranges: tabella dei range storici (load_currency_ranges); di default CURRENCY_RANGES
     Process:
-    1. Lettura dati grezzi dal CSV
+    1. Lookup dei dati grezzi nel report già caricato (nessuna rilettura del file)
     2. Calcolo delta semplice e ponderato
     3. Normalizzazione e classificazione
     4. Combinazione classificazioni storica e moderna
     """
-    data = pd.read_csv(output_csv, header=None)
-    columns = {"name": 0, "long_positions": 8, "short_positions": 9, "long_change": 38, "short_change": 39}
-    currency_data = data[data[columns["name"]] == currency_name]
+    result = report.get(currency_name)
 
-    if currency_data.empty:
-        print(f"Valuta '{currency_name}' non trovata nel file.")
+    # Le valute mancanti finiscono nello span "score" (campo "missing")
+    if result is None:
         return None
-
-    result = {
-        "name": currency_name,
-        "long_positions": int(currency_data.iloc[0, columns["long_positions"]]),
-        "short_positions": int(currency_data.iloc[0, columns["short_positions"]]),
-        "long_change": int(currency_data.iloc[0, columns["long_change"]]),
-        "short_change": int(currency_data.iloc[0, columns["short_change"]])
-    }
     
     currency_symbol = currency_mapping.get(currency_name, "").split()[0]
     notional = CONTRACT_NOTIONAL[currency_symbol]
@@ -223,7 +254,7 @@ def get_currency_data(currency_name):
     simple_delta = result["long_change"] - result["short_change"]
     
     # Prendi la classificazione storica basata sul delta semplice
-    historical_classification = classify_delta_tot(currency_symbol, simple_delta)
+    historical_classification = classify_delta_tot(currency_symbol, simple_delta, ranges)
 
     # Calcola i valori ponderati
     weighted_long_change = result["long_change"] * notional
@@ -286,6 +317,84 @@ classification_scores = {
     "❌ ALTO NEGATIVO": -3     # Massima forza ribassista
 }
 
+# Etichette per punteggio (lookup inverso di classification_scores)
+SCORE_LABELS = {score: label for label, score in classification_scores.items()}
+
+def compile_ranges(ranges_table):
+    """
+    Converte una tabella di range (formato CURRENCY_RANGES) in una matrice di soglie
+    Colonne, nell'ordine dei confronti di classify_delta_tot:
+    0. inizio fascia media negativa   1. inizio fascia bassa negativa
+    2. fine fascia bassa positiva     3. fine fascia media positiva
+    Restituisce (simboli, soglie)
+    """
+    symbols = list(ranges_table)
+    thresholds = np.array([
+        [ranges_table[s]["negative"]["medium"][0], ranges_table[s]["negative"]["low"][0],
+         ranges_table[s]["positive"]["low"][1], ranges_table[s]["positive"]["medium"][1]]
+        for s in symbols
+    ], dtype=np.float64)
+    return symbols, thresholds
+
+def _symbol_rows(symbols, known_symbols):
+    """
+    Posizione di ogni simbolo in known_symbols, senza cicli Python per elemento
+    """
+    unique, inverse = np.unique(np.asarray(symbols, dtype=str), return_inverse=True)
+    positions = {s: i for i, s in enumerate(known_symbols)}
+    return np.array([positions[s] for s in unique], dtype=np.intp)[inverse.reshape(-1)]
+
+def classify_batch(deltas, symbols, compiled):
+    """
+    Versione vettoriale di classify_delta_tot / classify_delta_tot_percent
+    Input:
+    - deltas: array di delta (o di percentuali)
+    - symbols: array di simboli valuta della stessa lunghezza
+    - compiled: risultato di compile_ranges
+    Output:
+    - punteggi interi da -3 a +3 (etichette in SCORE_LABELS)
+    Stessi confronti delle funzioni scalari: positivo se delta > 0,
+    altrimenti negativo (anche lo zero, come nella versione originale)
+    """
+    known_symbols, thresholds = compiled
+    deltas = np.asarray(deltas, dtype=np.float64).reshape(-1)
+    limits = thresholds[_symbol_rows(symbols, known_symbols)]
+    positive = 1 + (deltas > limits[:, 2]) + (deltas > limits[:, 3])
+    negative = -3 + (deltas >= limits[:, 0]) + (deltas >= limits[:, 1])
+    return np.where(deltas > 0, positive, negative).astype(np.int8)
+
+def currency_delta_percent(simple_deltas, symbols):
+    """
+    Delta ponderato in percentuale (classificazione moderna) per array di delta semplici e simboli
+    """
+    notional_symbols = list(CONTRACT_NOTIONAL)
+    rows = _symbol_rows(symbols, notional_symbols)
+    notional = np.array([CONTRACT_NOTIONAL[s] for s in notional_symbols], dtype=np.float64)[rows]
+    max_delta = np.array([MAX_HISTORICAL_DELTAS[s] for s in notional_symbols], dtype=np.float64)[rows]
+    # Stessa catena di get_currency_data: delta_tot = raw/max*10, percentuale = delta_tot/10*100
+    return ((np.asarray(simple_deltas, dtype=np.float64) * notional / max_delta) * 10 / 10) * 100
+
+def classify_currencies_batch(simple_deltas, symbols, ranges=None, ranges_percent=None):
+    """
+    Classificazione completa di get_currency_data su array di settimane/valute
+    Process:
+    1. Classificazione storica sul delta semplice
+    2. Classificazione moderna sul delta ponderato in percentuale
+    3. Scelta della più conservativa (punteggio assoluto più basso)
+    Restituisce (storica, moderna, finale) come array di punteggi interi
+    """
+    simple_deltas = np.asarray(simple_deltas, dtype=np.float64).reshape(-1)
+    symbols = np.asarray(symbols, dtype=str).reshape(-1)
+    compiled = compile_ranges(ranges or CURRENCY_RANGES)
+    compiled_percent = compile_ranges(ranges_percent or CURRENCY_RANGES_PERCENT)
+
+    delta_percent = currency_delta_percent(simple_deltas, symbols)
+
+    historical = classify_batch(simple_deltas, symbols, compiled)
+    modern = classify_batch(delta_percent, symbols, compiled_percent)
+    final = np.where(np.abs(historical) <= np.abs(modern), historical, modern).astype(np.int8)
+    return historical, modern, final
+
 def interpret_pair_score(score):
     """
     Interpreta il punteggio combinato di una coppia valutaria
@@ -307,111 +416,92 @@ def interpret_pair_score(score):
     else:
         return "📉 MOLTO DEBOLE (SHORT)"
 
-def analyze_major_pairs(currencies_data):
+def pair_score_matrix(currencies_data):
+    """
+    Matrice N x N dei punteggi di coppia per tutte le valute con dati disponibili
+    Cella [i, j] = punteggio(valuta i) - punteggio(valuta j), cioè la coppia i/j
+    Le valute sono ordinate secondo la convenzione di quotazione (CURRENCY_PRIORITY)
+    Restituisce (simboli, matrice)
+    """
+    symbols = [
+        symbol for symbol in sorted(symbol_to_name, key=quote_priority)
+        if currencies_data.get(symbol_to_name[symbol])
+    ]
+    scores = np.array([
+        classification_scores.get(currencies_data[symbol_to_name[symbol]]['classification'], 0)
+        for symbol in symbols
+    ], dtype=np.int64)
+    return symbols, np.subtract.outer(scores, scores)
+
+def analyze_pairs(currencies_data, pairs=None):
     """
-    Analizza le coppie forex principali
+    Analizza tutte le coppie (major e cross) in un solo passaggio
     Process:
-    1. Estrae classificazioni per base e quote
-    2. Calcola il punteggio relativo
+    1. Matrice dei punteggi base - quote per tutte le valute
+    2. Selezione delle coppie richieste (di default tutte, con la base secondo convenzione)
     3. Determina la forza del segnale
-    4. Ordina per potenziale di trading
     """
+    symbols, matrix = pair_score_matrix(currencies_data)
+    positions = {symbol: i for i, symbol in enumerate(symbols)}
+
+    if pairs is None:
+        bases, quotes = np.triu_indices(len(symbols), k=1)
+        selected = list(zip(bases.tolist(), quotes.tolist()))
+    else:
+        selected = [
+            (positions[pair[:3]], positions[pair[3:]]) for pair in pairs
+            if pair[:3] in positions and pair[3:] in positions
+        ]
+
     analyzed_pairs = []
-    for pair in MAJOR_PAIRS:
-        if "JPY" in pair:
-            base, quote = ("USD", "JPY") if pair == "USDJPY" else (None, None)
-        else:
-            base = pair[:3]
-            quote = pair[3:]
-
-        base_full = next((k for k, v in currency_mapping.items() if v == base), None)
-        quote_full = next((k for k, v in currency_mapping.items() if v == quote), None)
-
-        if base_full and quote_full:
-            base_data = currencies_data.get(base_full)
-            quote_data = currencies_data.get(quote_full)
-
-            if base_data and quote_data:
-                base_score = classification_scores.get(base_data['classification'], 0)
-                quote_score = classification_scores.get(quote_data['classification'], 0)
-                pair_score = base_score - quote_score
-                pair_strength = interpret_pair_score(pair_score)
-
-                analyzed_pairs.append({
-                    'pair': pair,
-                    'base_currency': base,
-                    'quote_currency': quote,
-                    'base_classification': base_data['classification'],
-                    'quote_classification': quote_data['classification'],
-                    'score': pair_score,
-                    'strength': pair_strength
-                })
+    for base_index, quote_index in selected:
+        base, quote = symbols[base_index], symbols[quote_index]
+        pair_score = int(matrix[base_index, quote_index])
+        analyzed_pairs.append({
+            'pair': base + quote,
+            'base_currency': base,
+            'quote_currency': quote,
+            'base_classification': currencies_data[symbol_to_name[base]]['classification'],
+            'quote_classification': currencies_data[symbol_to_name[quote]]['classification'],
+            'score': pair_score,
+            'strength': interpret_pair_score(pair_score)
+        })
 
     return analyzed_pairs
 
+def analyze_major_pairs(currencies_data):
+    """
+    Analizza le sole coppie forex principali (MAJOR_PAIRS)
+    """
+    return analyze_pairs(currencies_data, MAJOR_PAIRS)
+
 # Lista valute
 currencies = list(currency_mapping.keys())
 
-# Esecuzione
-download_and_convert()
-
-# Recupera i dati
-currencies_data = {currency: get_currency_data(currency) for currency in currencies}
-
-# Stampa risultati individuali
-print("\nRisultati delle valute:")
-print("=" * 50)
-for currency in currencies:
-    data = currencies_data[currency]
-    if data:
-        segnale = valuta_segnale(data)
-        print(f"Nome: {data['name']}")
-        print(f"  - Posizioni long totali: {data['long_positions']}")
-        print(f"  - Posizioni short totali: {data['short_positions']}")
-        print(f"  - Cambio di posizioni long: {data['long_change']}")
-        print(f"  - Cambio di posizioni short: {data['short_change']}")
-        print(f"  - Delta TOT: {data['simple_delta']:+}")
-        print(f"  - Delta TOT ponderato: {data['raw_delta']:,.2f}")
-        print(f"  - Delta TOT normalizzato: {data['delta_tot']:.2f}")
-        print(f"  - Class. Storica: {data['historical_classification']}")
-        print(f"  - Class. Moderna: {data['modern_classification']} ({data['delta_percent']:.1f}%)")
-        print(f"  - Class. Finale: {data['classification']}")
-        print("-" * 50)
-
-# Analisi coppie
-trading_opportunities = sorted(analyze_major_pairs(currencies_data), key=lambda x: x['score'], reverse=True)
-
-print("\nAnalisi Major Pairs (ordinate per forza):")
-print("=" * 80)
-for analysis in trading_opportunities:
-    print(f"\nCoppia: {analysis['pair']}")
-    print(f"  {analysis['base_currency']} → {analysis['base_classification']}")
-    print(f"  {analysis['quote_currency']} → {analysis['quote_classification']}")
-    print(f"  Punteggio: {analysis['score']}")
-    print(f"  Valutazione: {analysis['strength']}")
-    print("-" * 80)
+# File dei segnali generato ad ogni esecuzione
+pair_signal_file_local = "pair_signals.csv"
 
 def trova_cartella_metatrader():
     """
-    Cerca la cartella di installazione di MetaTrader
-    Ricerca ricorsiva nella directory AppData
+    Cerca la cartella Files di un terminale MetaTrader installato
+    Ricerca limitata alle cartelle dei terminali in AppData, con risultato in cache
     Restituisce il percorso completo o None se non trovato
     """
-    utente = getpass.getuser()
-    base_path = f"C:/Users/{utente}/AppData/Roaming/MetaQuotes/Terminal/"
-    if not os.path.exists(base_path):
-        return None
+    folders = find_terminal_folders()
+    return folders[0] if folders else None
 
-    for root, dirs, files in os.walk(base_path):
-        for d in dirs:
-            if d == "Files":
-                full_path = os.path.join(root, d)
-                return full_path
-    return None
+# Copia dei segnali nella cartella comune di MetaTrader dell'utente corrente
+metatrader_path = os.path.join(common_files_folder(), pair_signal_file_local)
 
-# Generate and save signals
-pair_signal_file_local = "pair_signals.csv"
-metatrader_path = r"C:\Users\user\AppData\Roaming\MetaQuotes\Terminal\Common\Files\pair_signals.csv"
+def signal_from_score(score):
+    """
+    Direzione operativa di una coppia: BUY se il punteggio è positivo, SELL se negativo
+    """
+    if score > 0:
+        return "BUY"
+    elif score < 0:
+        return "SELL"
+    return "NEUTRAL"
 
 # Function to write the signals to a CSV file
 def write_signals_to_csv(filepath, signals):
@@ -421,28 +511,274 @@ def write_signals_to_csv(filepath, signals):
     - filepath: percorso del file di output
     - signals: lista di segnali con coppia, direzione e punteggio
     Output:
-    - File CSV con intestazioni e segnali formattati
-    """
-    with open(filepath, "w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(["Pair", "Signal", "Score"])
-        for pair in signals:
-            if pair["score"] > 0:
-                signal = "BUY"
-            elif pair["score"] < 0:
-                signal = "SELL"
+    - File CSV con intestazioni e segnali formattati, sostituito in modo atomico
+    """
+    write_atomic(filepath, render_csv(signals))
+
+def signal_targets(output=pair_signal_file_local, metatrader=metatrader_path, targets=(), all_terminals=False):
+    """
+    Elenco dei file su cui pubblicare i segnali (CSV, JSON o binario in base all'estensione)
+    all_terminals aggiunge la cartella Files di ogni terminale installato
+    """
+    paths = [output, metatrader, *targets]
+    if all_terminals:
+        paths += [os.path.join(folder, pair_signal_file_local) for folder in find_terminal_folders()]
+    # Nessun target duplicato, ordine preservato
+    return list(dict.fromkeys(path for path in paths if path))
+
+def score_report(report, instrument=None, ranges=None):
+    """
+    Calcola dati per valuta e coppie ordinate per forza a partire da un report già caricato
+    instrument riceve gli span "score" e "pair_analysis"; ranges come in get_currency_data
+    Restituisce (currencies_data, trading_opportunities)
+    """
+    instrument = instrument or NULL_INSTRUMENTATION
+    with instrument.span("score", markets=len(report)) as span:
+        currencies_data = {currency: get_currency_data(currency, report, ranges) for currency in currencies}
+        span.set(rows=sum(1 for data in currencies_data.values() if data),
+                 missing=[currency for currency, data in currencies_data.items() if data is None])
+    with instrument.span("pair_analysis") as span:
+        trading_opportunities = sorted(analyze_pairs(currencies_data), key=lambda x: x['score'], reverse=True)
+        span.set(rows=len(trading_opportunities))
+    return currencies_data, trading_opportunities
+
+def make_result(report, changed, currencies_data=None, trading_opportunities=None):
+    """
+    Risultato serializzabile (JSON) di un'analisi: dati per valuta e segnali per coppia
+    """
+    currencies_data = currencies_data or {}
+    return {
+        "report_date": report.report_date,
+        "changed": changed,
+        "currencies": {currency_mapping[name]: data for name, data in currencies_data.items() if data},
+        "pairs": [dict(pair, signal=signal_from_score(pair["score"])) for pair in trading_opportunities or []]
+    }
+
+def print_currency_results(currencies_data):
+    """
+    Stampa i risultati individuali di ogni valuta
+    """
+    print("\nRisultati delle valute:")
+    print("=" * 50)
+    for currency in currencies:
+        data = currencies_data[currency]
+        if data:
+            print(f"Nome: {data['name']}")
+            print(f"  - Posizioni long totali: {data['long_positions']}")
+            print(f"  - Posizioni short totali: {data['short_positions']}")
+            print(f"  - Cambio di posizioni long: {data['long_change']}")
+            print(f"  - Cambio di posizioni short: {data['short_change']}")
+            print(f"  - Delta TOT: {data['simple_delta']:+}")
+            print(f"  - Delta TOT ponderato: {data['raw_delta']:,.2f}")
+            print(f"  - Delta TOT normalizzato: {data['delta_tot']:.2f}")
+            print(f"  - Class. Storica: {data['historical_classification']}")
+            print(f"  - Class. Moderna: {data['modern_classification']} ({data['delta_percent']:.1f}%)")
+            print(f"  - Class. Finale: {data['classification']}")
+            print("-" * 50)
+
+def print_pair_results(trading_opportunities):
+    """
+    Stampa l'analisi delle coppie ordinate per forza
+    """
+    print("\nAnalisi coppie major e cross (ordinate per forza):")
+    print("=" * 80)
+    for analysis in trading_opportunities:
+        print(f"\nCoppia: {analysis['pair']}")
+        print(f"  {analysis['base_currency']} → {analysis['base_classification']}")
+        print(f"  {analysis['quote_currency']} → {analysis['quote_classification']}")
+        print(f"  Punteggio: {analysis['score']}")
+        print(f"  Valutazione: {analysis['strength']}")
+        print("-" * 80)
+
+class ConsoleRenderer:
+    """
+    Sink che traduce gli span della pipeline nei messaggi leggibili dello script
+    È opzionale: senza, l'esecuzione resta silenziosa ma le metriche restano disponibili
+    """
+
+    def emit(self, span):
+        if span["span"] == "portfolio" and span["status"] != "ok":
+            print(f"⚠️ Portafoglio non aggiornato: {span['error']}")
+        if span["status"] != "ok":
+            return
+        if span["span"] == "fetch":
+            if span["changed"]:
+                print(f"Nuovo report del {span['report_date']} caricato: {span['rows']} mercati")
             else:
-                signal = "NEUTRAL"
-            writer.writerow([pair["pair"], signal, pair["score"]])
-
-# Save in current directory
-write_signals_to_csv(pair_signal_file_local, trading_opportunities)
-print(f"\n✅ File '{pair_signal_file_local}' generato nella cartella corrente.")
-
-# Save in MetaTrader directory (Common)
-try:
-    write_signals_to_csv(metatrader_path, trading_opportunities)
-    print(f"✅ File salvato nella cartella comune di MetaTrader:\n{metatrader_path}")
-except Exception as e:
-    print(f"⚠️ Errore nel salvare il file in MetaTrader: {str(e)}")
-    print("Verifica che la cartella esista e che tu abbia i permessi di scrittura")
\ No newline at end of file
+                print(f"Report del {span['report_date']} invariato, uso la cache")
+        elif span["span"] == "score":
+            for name in span.get("missing", []):
+                print(f"Valuta '{name}' non trovata nel file.")
+        elif span["span"] == "publish":
+            for path, outcome in span["targets"].items():
+                if outcome == "scritto":
+                    print(f"\n✅ File '{path}' generato.")
+                elif outcome == "invariato":
+                    print(f"\n✅ File '{path}' già aggiornato.")
+                else:
+                    print(f"⚠️ Errore nel salvare il file '{path}': {outcome}")
+                    print("Verifica che la cartella esista e che tu abbia i permessi di scrittura")
+        elif span["span"] == "portfolio":
+            print(f"\n✅ Portafoglio ({span['weeks']} settimane di covarianza) scritto in: {', '.join(span['targets'])}")
+        elif span["span"] == "ledger":
+            if not span["recorded"]:
+                print(f"\nReport già presente nel registro '{span['path']}'")
+            elif span["flips"]:
+                print("\nSegnali cambiati rispetto al report precedente:")
+                for flip in span["flips"]:
+                    print(f"  {flip}")
+
+def run(source=None, output=pair_signal_file_local, metatrader=metatrader_path,
+        ranges_file=RANGES_FILE, cache=None, force=False, quiet=False,
+        report_type=REPORT_TYPE, group=None, targets=(), all_terminals=False, instrument=None,
+        ledger=None, portfolio=None):
+    """
+    Esegue l'intera pipeline: report -> classificazioni -> coppie -> segnali
+    Input:
+    - source: report locale (percorso TXT/CSV/.npz o file-like già aperto); se None scarica da CFTC con cache
+    - output / metatrader: file dei segnali (None per non scriverli)
+    - targets / all_terminals: altri file di destinazione e cartelle di tutti i terminali
+    - force: ricalcola anche se il report non è cambiato
+    - quiet: nessuna stampa (il report leggibile è un renderer opzionale)
+    - instrument: Instrumentation che riceve gli span fetch/parse, score, pair_analysis, publish
+    - report_type / group: report CFTC e gruppo di trader usati per lo scoring
+    - ledger: registro storico (signalLedger.py) in cui aggiungere il risultato
+    - portfolio: portfolio.Portfolio; il portafoglio viene scritto accanto ai file output/metatrader
+    Output:
+    - dizionario con data del report, stato, dati per valuta e coppie
+      (con ledger anche "changes": le coppie il cui segnale è cambiato;
+      con portfolio anche "portfolio": pesi per coppia ed esposizione per valuta,
+      oppure "portfolio_error" se il portafoglio non può essere calcolato)
+    Nessuna I/O avviene all'import del modulo: un servizio può importarlo una volta
+    e chiamare run() ad ogni nuovo report
+    """
+    instrument = instrument or NULL_INSTRUMENTATION
+    if not quiet:
+        instrument = Instrumentation(instrument.sinks + [ConsoleRenderer()])
+    ranges = load_currency_ranges(ranges_file)
+
+    if source is None:
+        report, changed = download_and_convert(cache, quiet, report_type, group, instrument)
+    else:
+        with instrument.span("parse", source=str(source)) as span:
+            report, changed = load_report(source, REPORT_TYPES[report_type][0], group), True
+            span.set(rows=len(report), report_date=report.report_date)
+            # La dimensione è nota solo per i file su disco, non per gli stream
+            if isinstance(source, (str, os.PathLike)):
+                span.set(bytes=os.path.getsize(source))
+
+    # Se il report non è cambiato i segnali già pubblicati sono ancora validi
+    if not changed and not force and output and os.path.exists(output):
+        if not quiet:
+            print(f"✅ Nessun nuovo report: '{output}' è già aggiornato.")
+        return make_result(report, changed)
+
+    currencies_data, trading_opportunities = score_report(report, instrument, ranges)
+    result = make_result(report, changed, currencies_data, trading_opportunities)
+
+    # Report leggibile, solo se richiesto
+    if not quiet:
+        print_currency_results(currencies_data)
+        print_pair_results(trading_opportunities)
+
+    # Segnali generati una volta e pubblicati in modo atomico su tutti i target
+    with instrument.span("publish") as span:
+        publisher = Publisher(signal_targets(output, metatrader, targets, all_terminals))
+        status = publisher.publish(result["pairs"], result["report_date"])
+        span.set(rows=len(result["pairs"]),
+                 targets={path: outcome if isinstance(outcome, str) else str(outcome) for path, outcome in status.items()},
+                 written=sum(1 for outcome in status.values() if outcome == "scritto"),
+                 unchanged=sum(1 for outcome in status.values() if outcome == "invariato"),
+                 errors=sum(1 for outcome in status.values() if isinstance(outcome, Exception)))
+
+    # Storico append-only e differenze rispetto al report precedente
+    if ledger:
+        # Import locali: chi usa solo lo scoring non carica sqlite3, pandas e gli archivi prezzi
+        from signalLedger import SignalLedger
+        with instrument.span("ledger", path=str(ledger)) as span:
+            with SignalLedger(ledger) as signal_ledger:
+                recorded = signal_ledger.record(result)
+                result["changes"] = signal_ledger.diff(result["report_date"])
+            span.set(recorded=recorded,
+                     flips=[f"{pair['pair']}: {pair['previous_signal'] or '-'} → {pair['signal']}" for pair in result["changes"]])
+
+    # Pesi dimensionati sul rischio, nella stessa cartella dei segnali.
+    # Un errore del portafoglio (storico prezzi insufficiente, covarianza singolare) resta nel suo span:
+    # segnali e registro sono già stati scritti
+    if portfolio is not None:
+        from portfolio import PORTFOLIO_FILE
+        try:
+            with instrument.span("portfolio") as span:
+                paths = [os.path.join(os.path.dirname(path), PORTFOLIO_FILE) for path in (output, metatrader) if path]
+                result["portfolio"] = portfolio.publish(result["pairs"], paths)
+                span.set(weeks=result["portfolio"]["weeks"], targets=paths)
+        except (ValueError, np.linalg.LinAlgError) as e:
+            result["portfolio_error"] = str(e)
+
+    return result
+
+def main(argv=None):
+    """
+    Punto di ingresso da riga di comando
+    """
+    parser = argparse.ArgumentParser(description="Analisi COT e generazione dei segnali sulle coppie forex")
+    parser.add_argument("--input", help="Report locale (TXT/CSV CFTC o cache .npz) invece del download")
+    parser.add_argument("--output", default=pair_signal_file_local, help="File CSV dei segnali")
+    parser.add_argument("--metatrader-path", default=metatrader_path, help="Copia dei segnali per MetaTrader")
+    parser.add_argument("--no-metatrader", action="store_true", help="Non scrivere la copia per MetaTrader")
+    parser.add_argument("--target", action="append", default=[], help="Altro file di destinazione (.csv, .json o .bin), ripetibile")
+    parser.add_argument("--all-terminals", action="store_true", help="Pubblica anche nella cartella Files di ogni terminale")
+    parser.add_argument("--ledger", help="Registro storico dei segnali (SQLite, vedi signalLedger.py)")
+    parser.add_argument("--portfolio", help="Stato della covarianza del portafoglio (portfolio.py); richiede --price-store")
+    parser.add_argument("--price-store", help="Archivio delle barre MT5 (priceStore.py) per il portafoglio")
+    parser.add_argument("--ranges", default=RANGES_FILE, help="Range ricalibrati (extractData.py)")
+    parser.add_argument("--report", default=REPORT_TYPE, choices=sorted(REPORT_TYPES), help="Report CFTC da analizzare")
+    parser.add_argument("--group", help="Gruppo di trader (es. noncomm, lev_money, asset_mgr, m_money)")
+    parser.add_argument("--force", action="store_true", help="Ricalcola anche se il report non è cambiato")
+    parser.add_argument("--quiet", action="store_true", help="Nessuna stampa")
+    parser.add_argument("--json", action="store_true", help="Stampa il risultato in JSON")
+    parser.add_argument("--metrics", help="File JSON lines con le metriche di ogni fase")
+    parser.add_argument("--trace", action="store_true", help="Stampa le metriche di ogni fase su stderr")
+    args = parser.parse_args(argv)
+    if args.portfolio and not args.price_store:
+        parser.error("--portfolio richiede --price-store")
+
+    instrument = Instrumentation()
+    if args.metrics:
+        instrument.add_sink(JsonLinesSink(args.metrics))
+    if args.trace:
+        instrument.add_sink(StdoutSink(sys.stderr))
+
+    try:
+        portfolio = None
+        if args.portfolio:
+            from portfolio import Portfolio
+            from priceStore import PriceStore
+            portfolio = Portfolio(args.portfolio, MAJOR_PAIRS)
+            portfolio.update_from_store(PriceStore(args.price_store))
+            portfolio.save()
+        result = run(
+            source=args.input,
+            output=args.output,
+            metatrader=None if args.no_metatrader else args.metatrader_path,
+            ranges_file=args.ranges,
+            force=args.force,
+            quiet=args.quiet or args.json,
+            report_type=args.report,
+            group=args.group,
+            targets=args.target,
+            all_terminals=args.all_terminals,
+            instrument=instrument,
+            ledger=args.ledger,
+            portfolio=portfolio
+        )
+    except (DownloadError, ValueError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
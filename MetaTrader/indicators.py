@@ -0,0 +1,204 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import bisect    # Per la lista ordinata del percentile
+import json      # Per lo stato persistente
+import os        # Per operazioni sul filesystem
+from collections import deque  # Per le finestre mobili
+from cotHistory import CotHistory
+from cotReport import load_report
+from getData import currency_mapping, download_and_convert
+
+# Finestra di default: 3 anni di report settimanali (come il COT Index classico)
+DEFAULT_WINDOW = 156
+# Settimane minime prima di restituire z-score e percentile
+MIN_PERIODS = 8
+STATE_FILE = "indicators_state.json"
+
+
+class RollingIndicators:
+    """
+    Indicatori di posizionamento di una valuta calcolati in modo incrementale.
+    - cot_index: posizione netta rispetto a minimo/massimo delle ultime N settimane (0-100),
+      con deque monotone per minimo e massimo
+    - zscore: delta semplice settimanale rispetto a media/deviazione della finestra,
+      con somme mobili (valori interi, quindi senza errori di arrotondamento accumulati)
+    - percentile: rango percentuale del delta nella finestra, con una lista ordinata
+    COT Index e z-score costano O(1) ammortizzato per aggiornamento; il percentile trova la
+    posizione in O(log N) ma inserimento e rimozione nella lista spostano fino a N elementi (O(N),
+    con N = finestra, es. 156: pochi byte copiati). Il costo non dipende dalla lunghezza dello storico.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.count = 0
+        self.last_date = None
+        self.last = None
+        self.max_net = deque()  # [settimana, netto] con netto decrescente
+        self.min_net = deque()  # [settimana, netto] con netto crescente
+        self.deltas = deque()
+        self.sorted_deltas = []
+        self.delta_sum = 0
+        self.delta_sum_sq = 0
+
+    def update(self, date, net, delta):
+        """
+        Aggiunge la settimana `date` e restituisce gli indicatori aggiornati.
+        Un report già visto (data non successiva all'ultima) non modifica lo stato.
+        """
+        if self.last_date is not None and date <= self.last_date:
+            return self.last
+        week = self.count
+        self.count += 1
+        self.last_date = date
+
+        # Massimo e minimo mobili della posizione netta
+        while self.max_net and self.max_net[-1][1] <= net:
+            self.max_net.pop()
+        self.max_net.append([week, net])
+        while self.min_net and self.min_net[-1][1] >= net:
+            self.min_net.pop()
+        self.min_net.append([week, net])
+        for extremes in (self.max_net, self.min_net):
+            if extremes[0][0] <= week - self.window:
+                extremes.popleft()
+
+        # Somme e lista ordinata dei delta nella finestra
+        self.deltas.append(delta)
+        self.delta_sum += delta
+        self.delta_sum_sq += delta * delta
+        bisect.insort(self.sorted_deltas, delta)
+        if len(self.deltas) > self.window:
+            old = self.deltas.popleft()
+            self.delta_sum -= old
+            self.delta_sum_sq -= old * old
+            del self.sorted_deltas[bisect.bisect_left(self.sorted_deltas, old)]
+
+        self.last = self._values(net, delta)
+        return self.last
+
+    def _values(self, net, delta):
+        high, low = self.max_net[0][1], self.min_net[0][1]
+        values = {
+            "net_position": net,
+            "simple_delta": delta,
+            "weeks": len(self.deltas),
+            "cot_index": round((net - low) / (high - low) * 100, 2) if high > low else None,
+            "zscore": None,
+            "percentile": None
+        }
+        n = len(self.deltas)
+        if n >= MIN_PERIODS:
+            mean = self.delta_sum / n
+            variance = self.delta_sum_sq / n - mean * mean
+            if variance > 0:
+                values["zscore"] = round((delta - mean) / variance ** 0.5, 3)
+            values["percentile"] = round(bisect.bisect_right(self.sorted_deltas, delta) / n * 100, 2)
+        return values
+
+    def to_dict(self):
+        return {
+            "window": self.window, "count": self.count, "last_date": self.last_date, "last": self.last,
+            "max_net": list(self.max_net), "min_net": list(self.min_net), "deltas": list(self.deltas),
+            "delta_sum": self.delta_sum, "delta_sum_sq": self.delta_sum_sq
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data["window"])
+        state.count = data["count"]
+        state.last_date = data["last_date"]
+        state.last = data["last"]
+        state.max_net = deque(data["max_net"])
+        state.min_net = deque(data["min_net"])
+        state.deltas = deque(data["deltas"])
+        state.sorted_deltas = sorted(state.deltas)
+        state.delta_sum = data["delta_sum"]
+        state.delta_sum_sq = data["delta_sum_sq"]
+        return state
+
+
+class IndicatorState:
+    """
+    Stato degli indicatori di tutte le valute, salvato in JSON tra un'esecuzione e l'altra.
+    Uno stato salvato con una finestra diversa da `window` solleva ValueError:
+    va ricostruito (load=False e seed_from_history) invece di mescolare due finestre.
+    """
+
+    def __init__(self, path=STATE_FILE, window=DEFAULT_WINDOW, load=True):
+        self.path = path
+        self.window = window
+        self.currencies = {}
+        if load and path and os.path.exists(path):
+            with open(path, "r") as file:
+                data = json.load(file)
+            windows = sorted({state["window"] for state in data["currencies"].values()})
+            if windows and windows != [window]:
+                raise ValueError(f"Lo stato in {path} usa una finestra di {', '.join(map(str, windows))} "
+                                 f"settimane invece di {window}")
+            self.currencies = {symbol: RollingIndicators.from_dict(state)
+                               for symbol, state in data["currencies"].items()}
+
+    def update(self, symbol, date, net, delta):
+        if symbol not in self.currencies:
+            self.currencies[symbol] = RollingIndicators(self.window)
+        return self.currencies[symbol].update(date, net, delta)
+
+    def update_report(self, report, mapping=None):
+        """
+        Aggiorna tutte le valute con un report settimanale
+        Restituisce simbolo -> indicatori
+        """
+        mapping = mapping or currency_mapping
+        result = {}
+        for name, symbol in mapping.items():
+            data = report.get(name)
+            if data:
+                result[symbol] = self.update(symbol, report.report_date,
+                                             data["long_positions"] - data["short_positions"],
+                                             data["long_change"] - data["short_change"])
+        return result
+
+    def seed_from_history(self, history, mapping=None, start=None, end=None):
+        """
+        Inizializza lo stato ripercorrendo l'archivio storico (cotHistory.CotHistory) in ordine di data
+        """
+        mapping = mapping or currency_mapping
+        for name, symbol in mapping.items():
+            series = history.series(name, start, end)
+            for date, long_p, short_p, long_c, short_c in zip(
+                    series["date"], series["long_positions"], series["short_positions"],
+                    series["long_change"], series["short_change"]):
+                self.update(symbol, str(date), int(long_p - short_p), int(long_c - short_c))
+
+    def save(self, path=None):
+        path = path or self.path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"currencies": {symbol: state.to_dict() for symbol, state in self.currencies.items()}}, file)
+        os.replace(tmp_path, path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Indicatori mobili di posizionamento COT (COT Index, z-score, percentile)")
+    parser.add_argument("reports", nargs="*", help="Report COT settimanali da aggiungere, in ordine di data")
+    parser.add_argument("--state", default=STATE_FILE, help="File JSON con lo stato degli indicatori")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Settimane della finestra mobile")
+    parser.add_argument("--history", help="Archivio storico (cotHistory.py) per inizializzare lo stato")
+    parser.add_argument("--fetch", action="store_true", help="Aggiunge l'ultimo report CFTC (download con cache)")
+    args = parser.parse_args()
+
+    try:
+        state = IndicatorState(args.state, args.window)
+    except ValueError as e:
+        if not args.history:
+            parser.error(f"{e}: usare --history per ricostruirlo con la nuova finestra")
+        # Finestra cambiata: lo stato viene ricostruito da zero dall'archivio storico
+        state = IndicatorState(args.state, args.window, load=False)
+    if args.history:
+        state.seed_from_history(CotHistory(args.history))
+    for path in args.reports:
+        state.update_report(load_report(path))
+    if args.fetch:
+        state.update_report(download_and_convert(quiet=True)[0])
+    state.save()
+    print(json.dumps({symbol: indicators.last for symbol, indicators in state.currencies.items()}, indent=2))
@@ -0,0 +1,119 @@
+# Importazione librerie necessarie
+import json  # Per il formato JSON lines
+import sys   # Per lo standard output
+import time  # Per le durate
+
+# Ogni fase della pipeline produce uno "span": un dizionario con
+# - span: nome della fase (fetch, parse, score, pair_analysis, publish, ...)
+# - start: istante di inizio (epoch, secondi)
+# - duration_ms: durata
+# - status: "ok" oppure "error" (con "error": messaggio)
+# - altri campi specifici della fase (rows, bytes, cache, ...)
+
+
+class MemorySink:
+    """
+    Conserva gli span in una lista (per test e per chi vuole elaborarli in processo)
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def emit(self, span):
+        self.spans.append(span)
+
+    def find(self, name):
+        return [span for span in self.spans if span["span"] == name]
+
+
+class JsonLinesSink:
+    """
+    Scrive uno span per riga in formato JSON (file aperto in append)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def emit(self, span):
+        self.file.write(json.dumps(span, ensure_ascii=False, default=str) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class StdoutSink:
+    """
+    Una riga compatta per span su stdout (o sul flusso indicato)
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+
+    def emit(self, span):
+        fields = " ".join(f"{key}={value}" for key, value in span.items()
+                          if key not in ("span", "start", "duration_ms"))
+        print(f"[{span['span']}] {span['duration_ms']:.2f} ms {fields}", file=self.stream or sys.stdout)
+
+
+class Span:
+    """
+    Fase in corso: i campi aggiunti con set() finiscono nello span emesso alla chiusura
+    """
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+
+class Instrumentation:
+    """
+    Punto unico di raccolta delle metriche della pipeline.
+    Senza sink registrati span() costa solo due letture dell'orologio:
+    le esecuzioni di produzione possono restare silenziose senza perdere le metriche
+    quando servono (basta aggiungere un sink).
+    """
+
+    def __init__(self, sinks=()):
+        self.sinks = list(sinks)
+
+    def add_sink(self, sink):
+        self.sinks.append(sink)
+        return sink
+
+    def span(self, name, **fields):
+        return _SpanContext(self, name, fields)
+
+    def emit(self, span):
+        for sink in self.sinks:
+            sink.emit(span)
+
+
+class _SpanContext:
+    def __init__(self, instrumentation, name, fields):
+        self.instrumentation = instrumentation
+        self.span = Span(name, fields)
+
+    def __enter__(self):
+        self.start = time.time()
+        self.counter = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = (time.perf_counter() - self.counter) * 1000
+        if self.instrumentation.sinks:
+            record = {"span": self.span.name, "start": self.start, "duration_ms": round(duration, 3),
+                      "status": "ok" if exc is None else "error"}
+            if exc is not None:
+                record["error"] = str(exc)
+            record.update(self.span.fields)
+            self.instrumentation.emit(record)
+        return False
+
+
+# Strumentazione senza sink: usata quando il chiamante non ne passa una
+NULL_INSTRUMENTATION = Instrumentation()
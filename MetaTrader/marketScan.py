@@ -0,0 +1,148 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import json      # Per il file di configurazione dei mercati
+import os        # Per il percorso della configurazione inclusa
+import numpy as np
+import pandas as pd
+from cotReport import load_report
+from getData import (CURRENCY_RANGES, RANGES_FILE, SCORE_LABELS, classify_batch, classify_currencies_batch,
+                     compile_ranges, currency_mapping, download_and_convert, load_currency_ranges)
+
+# Configurazione dei mercati inclusa nel repository: dimensione dei contratti e soglie per mercato
+MARKETS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "markets.json")
+# Chiave interna per i mercati senza soglie proprie
+DEFAULT_KEY = "*"
+
+
+def load_market_config(path=MARKETS_FILE):
+    """
+    Legge la configurazione dei mercati. Formato:
+    - defaults: contract_size, unit e share_ranges (soglie in % dell'open interest)
+    - markets: nome CFTC -> symbol, contract_size, unit e, opzionali,
+      ranges (soglie sul delta in contratti, formato CURRENCY_RANGES) o share_ranges
+    Le valute di getData.currency_mapping usano range e classificazione di getData, senza duplicarli qui
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def compile_market_config(config, currency_ranges=None):
+    """
+    Prepara le tabelle di soglie una sola volta per tutte le scansioni
+    currency_ranges: range delle valute (load_currency_ranges), di default CURRENCY_RANGES;
+    valgono per i mercati di currency_mapping senza "ranges" propri nella configurazione
+    Restituisce un dizionario con le valute, le soglie in contratti e in % dell'open interest
+    """
+    markets = config.get("markets", {})
+    defaults = config.get("defaults", {})
+    currency_ranges = currency_ranges or CURRENCY_RANGES
+    currencies = {name: symbol for name, symbol in currency_mapping.items()
+                  if symbol in currency_ranges and "ranges" not in markets.get(name, {})}
+    contract_ranges = {name: spec["ranges"] for name, spec in markets.items() if "ranges" in spec}
+    share_ranges = {name: spec["share_ranges"] for name, spec in markets.items()
+                    if "share_ranges" in spec and "ranges" not in spec}
+    share_ranges[DEFAULT_KEY] = defaults["share_ranges"]
+    return {
+        "markets": markets,
+        "defaults": defaults,
+        "currencies": currencies,
+        "currency_ranges": currency_ranges,
+        "contracts": compile_ranges(contract_ranges) if contract_ranges else ([], np.empty((0, 4))),
+        "share": compile_ranges(share_ranges)
+    }
+
+
+def scan_report(report, compiled):
+    """
+    Punteggio di posizionamento per ogni mercato del report, in un solo passaggio vettoriale.
+    Process:
+    1. Delta semplice (long_change - short_change) e quota dell'open interest per tutte le righe
+    2. Valute di getData: classificazione finale di classify_currencies_batch (la più conservativa tra
+       storica e percentuale), la stessa pubblicata in pair_signals.csv
+    3. Mercati con soglie in contratti: classificazione sul delta semplice
+    4. Tutti gli altri: classificazione sulla quota dell'open interest (soglie del mercato o di default)
+    Restituisce un DataFrame con una riga per mercato
+    """
+    names = np.asarray(report.names, dtype=str)
+    long_positions = report["long_positions"].astype(np.float64)
+    short_positions = report["short_positions"].astype(np.float64)
+    simple_delta = (report["long_change"] - report["short_change"]).astype(np.float64)
+    # Le cache .npz di getData non hanno l'open interest: si usano le posizioni del gruppo
+    if "open_interest" in report.columns:
+        open_interest = report["open_interest"].astype(np.float64)
+    else:
+        open_interest = long_positions + short_positions
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta_share = np.where(open_interest > 0, simple_delta / open_interest * 100, 0.0)
+        net_share = np.where(open_interest > 0, (long_positions - short_positions) / open_interest * 100, 0.0)
+
+    currencies = compiled["currencies"]
+    contract_names, _ = compiled["contracts"]
+    share_names, _ = compiled["share"]
+    by_currency = np.isin(names, list(currencies))
+    by_contracts = np.isin(names, contract_names) & ~by_currency
+    by_share = ~(by_currency | by_contracts)
+    share_keys = np.where(np.isin(names, share_names), names, DEFAULT_KEY)
+
+    score = np.empty(len(names), dtype=np.int8)
+    if by_currency.any():
+        symbols = [currencies[name] for name in names[by_currency]]
+        score[by_currency] = classify_currencies_batch(simple_delta[by_currency], symbols,
+                                                       compiled["currency_ranges"])[2]
+    if by_contracts.any():
+        score[by_contracts] = classify_batch(simple_delta[by_contracts], names[by_contracts], compiled["contracts"])
+    score[by_share] = classify_batch(delta_share[by_share], share_keys[by_share], compiled["share"])
+
+    markets = compiled["markets"]
+    defaults = compiled["defaults"]
+    contract_size = np.array([markets.get(name, defaults).get("contract_size", defaults["contract_size"])
+                              for name in report.names], dtype=np.float64)
+    return pd.DataFrame({
+        "market": report.names,
+        "symbol": [markets.get(name, {}).get("symbol", "") for name in report.names],
+        "open_interest": open_interest.astype(np.int64),
+        "net_position": (long_positions - short_positions).astype(np.int64),
+        "net_share": np.round(net_share, 2),
+        "simple_delta": simple_delta.astype(np.int64),
+        "delta_share": np.round(delta_share, 2),
+        "notional_delta": simple_delta * contract_size,
+        "basis": np.select([by_currency, by_contracts], ["valuta (storica + %)", "contratti"], "open interest"),
+        "score": score,
+        "classification": [SCORE_LABELS[s] for s in score.tolist()]
+    })
+
+
+def rank_extremes(scan, top=20):
+    """
+    Mercati più estremi: punteggio assoluto più alto, poi variazione più ampia in % dell'open interest
+    Restituisce (rialzisti, ribassisti), ciascuno con al massimo `top` righe
+    """
+    order = scan.assign(strength=scan["delta_share"].abs())
+    bullish = order[order["score"] > 0].sort_values(["score", "strength"], ascending=False)
+    bearish = order[order["score"] < 0].sort_values(["score", "strength"], ascending=[True, False])
+    return bullish.drop(columns="strength").head(top), bearish.drop(columns="strength").head(top)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scansione del posizionamento su tutti i mercati del report COT")
+    parser.add_argument("--input", help="Report locale (TXT/CSV CFTC) invece del download")
+    parser.add_argument("--config", default=MARKETS_FILE, help="Configurazione dei mercati")
+    parser.add_argument("--ranges", default=RANGES_FILE, help="Range ricalibrati delle valute (extractData.py)")
+    parser.add_argument("--top", type=int, default=20, help="Mercati mostrati per lato")
+    parser.add_argument("--output", help="CSV con la scansione completa ordinata")
+    args = parser.parse_args()
+
+    if args.input:
+        report = load_report(args.input, fields=("open_interest",))
+    else:
+        report = download_and_convert(quiet=True)[0]
+    scan = scan_report(report, compile_market_config(load_market_config(args.config), load_currency_ranges(args.ranges)))
+    bullish, bearish = rank_extremes(scan, args.top)
+    columns = ["market", "symbol", "net_share", "simple_delta", "delta_share", "classification"]
+    print(f"Report del {report.report_date}: {len(scan)} mercati\n")
+    print("📈 Posizionamento in aumento più estremo:")
+    print(bullish[columns].to_string(index=False))
+    print("\n📉 Posizionamento in calo più estremo:")
+    print(bearish[columns].to_string(index=False))
+    if args.output:
+        pd.concat(rank_extremes(scan, len(scan))).to_csv(args.output, index=False)
@@ -0,0 +1,282 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import csv       # Per il file del portafoglio
+import io        # Per il CSV in memoria
+import json      # Per lo stato persistente
+import os        # Per operazioni sul filesystem
+from collections import deque  # Per la finestra mobile dei rendimenti
+import numpy as np
+import pandas as pd
+from priceStore import ANCHORS, PriceStore
+from publisher import write_atomic
+
+# Finestra della covarianza: un anno di rendimenti settimanali
+DEFAULT_WINDOW = 52
+# Settimane minime prima di dimensionare le posizioni
+MIN_WEEKS = 20
+# Volatilità annua obiettivo del portafoglio
+TARGET_VOLATILITY = 0.10
+# Peso della diagonale nella covarianza stimata (stabilizza l'inversione con poche settimane)
+SHRINKAGE = 0.3
+STATE_FILE = "portfolio_state.json"
+PORTFOLIO_FILE = "pair_portfolio.csv"
+
+
+class RollingCovariance:
+    """
+    Covarianza dei rendimenti settimanali delle coppie sulle ultime N settimane.
+    Somme e somme dei prodotti incrociati vengono aggiornate ad ogni settimana
+    (aggiunta della nuova, rimozione di quella uscita dalla finestra): O(k²) per aggiornamento,
+    indipendentemente dalla lunghezza dello storico.
+    Le settimane con un prezzo mancante non entrano nella finestra.
+    L'ultima settimana ricevuta resta aperta (può essere ancora in corso, vedi PriceStore.weekly_closes):
+    ogni aggiornamento con la stessa data ne sostituisce la chiusura, e il suo rendimento
+    entra nella finestra solo quando arriva la settimana successiva.
+    """
+
+    def __init__(self, symbols, window=DEFAULT_WINDOW):
+        self.symbols = list(symbols)
+        self.window = window
+        self.last_date = None
+        self.last_closes = None
+        self.open_date = None
+        self.open_closes = None
+        self.returns = deque()
+        self.sum = np.zeros(len(self.symbols))
+        self.sum_products = np.zeros((len(self.symbols), len(self.symbols)))
+
+    def update(self, date, closes):
+        """
+        Aggiunge la chiusura settimanale di tutte le coppie (stesso ordine di symbols)
+        La settimana aperta viene aggiornata, le date precedenti ignorate.
+        Restituisce True se la data è nuova
+        """
+        date = str(date)
+        closes = np.asarray(closes, dtype=np.float64)
+        if self.open_date is not None and date <= self.open_date:
+            if date == self.open_date:
+                self.open_closes = closes
+            return False
+        if self.open_date is not None:
+            # Arriva una settimana nuova: quella aperta è completa
+            if self.last_closes is not None:
+                returns = self.open_closes / self.last_closes - 1
+                if np.all(np.isfinite(returns)):
+                    self._push(returns)
+            self.last_date = self.open_date
+            self.last_closes = self.open_closes
+        self.open_date = date
+        self.open_closes = closes
+        return True
+
+    def _push(self, returns):
+        self.returns.append(returns)
+        self.sum += returns
+        self.sum_products += np.outer(returns, returns)
+        if len(self.returns) > self.window:
+            old = self.returns.popleft()
+            self.sum -= old
+            self.sum_products -= np.outer(old, old)
+
+    @property
+    def count(self):
+        return len(self.returns)
+
+    def covariance(self):
+        n = self.count
+        if n < 2:
+            return np.full((len(self.symbols), len(self.symbols)), np.nan)
+        return (self.sum_products - np.outer(self.sum, self.sum) / n) / (n - 1)
+
+    def to_dict(self):
+        return {
+            "symbols": self.symbols,
+            "window": self.window,
+            "last_date": self.last_date,
+            "last_closes": None if self.last_closes is None else self.last_closes.tolist(),
+            "open_date": self.open_date,
+            "open_closes": None if self.open_closes is None else self.open_closes.tolist(),
+            "returns": [returns.tolist() for returns in self.returns]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        rolling = cls(data["symbols"], data["window"])
+        for returns in data["returns"]:
+            rolling._push(np.asarray(returns, dtype=np.float64))
+        rolling.last_date = data["last_date"]
+        if data["last_closes"] is not None:
+            rolling.last_closes = np.asarray(data["last_closes"], dtype=np.float64)
+        rolling.open_date = data.get("open_date")
+        if data.get("open_closes") is not None:
+            rolling.open_closes = np.asarray(data["open_closes"], dtype=np.float64)
+        return rolling
+
+
+def exposure_matrix(pairs, currencies=None):
+    """
+    Matrice coppie x valute: +1 sulla valuta base, -1 sulla quote
+    """
+    currencies = currencies or sorted({pair[:3] for pair in pairs} | {pair[3:] for pair in pairs})
+    index = {currency: i for i, currency in enumerate(currencies)}
+    matrix = np.zeros((len(pairs), len(currencies)))
+    rows = np.arange(len(pairs))
+    matrix[rows, [index[pair[:3]] for pair in pairs]] = 1
+    matrix[rows, [index[pair[3:]] for pair in pairs]] = -1
+    return currencies, matrix
+
+
+def size_positions(scores, covariance, target_volatility=TARGET_VOLATILITY, shrinkage=SHRINKAGE):
+    """
+    Pesi delle coppie che tengono conto delle correlazioni.
+    Process:
+    1. Covarianza stabilizzata: (1 - shrinkage) * Σ + shrinkage * diag(Σ)
+    2. Pesi proporzionali a Σ⁻¹ · punteggi: coppie che ripetono la stessa scommessa
+       (es. SELL AUDUSD e SELL NZDUSD) si dividono il rischio invece di sommarlo.
+       Con Σ singolare (es. una coppia senza variazioni nella finestra) si usa la soluzione
+       ai minimi quadrati di norma minima: la coppia ferma riceve peso nullo
+    3. I pesi di segno opposto al segnale vengono azzerati (il portafoglio non contraddice i segnali)
+    4. Scala finale per ottenere la volatilità annua obiettivo
+    Restituisce (pesi, volatilità annua stimata)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    shrunk = (1 - shrinkage) * covariance + shrinkage * np.diag(np.diag(covariance))
+    weights = np.linalg.lstsq(shrunk, scores, rcond=None)[0]
+    weights[np.sign(weights) != np.sign(scores)] = 0.0
+    volatility = np.sqrt(weights @ covariance @ weights * 52)
+    if volatility == 0:
+        return np.zeros_like(scores), 0.0
+    return weights * target_volatility / volatility, target_volatility
+
+
+class Portfolio:
+    """
+    Stadio di portafoglio dopo i segnali: esposizione netta per valuta e pesi dimensionati sul rischio.
+    Lo stato (finestra dei rendimenti) è salvato in JSON e aggiornato solo con le settimane nuove;
+    le coppie sono quelle dello stato salvato oppure, al primo avvio, `pairs`.
+    """
+
+    def __init__(self, path=STATE_FILE, pairs=None, window=DEFAULT_WINDOW, target_volatility=TARGET_VOLATILITY):
+        self.path = path
+        self.target_volatility = target_volatility
+        if path and os.path.exists(path):
+            with open(path, "r") as file:
+                self.covariance = RollingCovariance.from_dict(json.load(file))
+        elif pairs:
+            self.covariance = RollingCovariance(pairs, window)
+        else:
+            raise ValueError(f"Nessuno stato in '{path}': indicare le coppie del portafoglio")
+
+    @property
+    def pairs(self):
+        return self.covariance.symbols
+
+    def update_prices(self, dates, closes):
+        """
+        Aggiorna la covarianza con le chiusure settimanali (date x coppie) dalla settimana aperta in poi
+        Restituisce il numero di settimane nuove
+        """
+        return sum(self.covariance.update(date, row) for date, row in zip(dates, closes))
+
+    def update_from_store(self, store, anchor="friday"):
+        dates, closes = store.weekly_closes(self.pairs, anchor)
+        return self.update_prices(dates, closes)
+
+    def size(self, signals):
+        """
+        Dimensiona i segnali di getData (lista di dizionari con pair e score)
+        Le coppie senza storico prezzi (es. i cross) non entrano nel portafoglio.
+        Restituisce un dizionario con pesi per coppia ed esposizione netta per valuta
+        """
+        if self.covariance.count < MIN_WEEKS:
+            raise ValueError(f"Storico prezzi insufficiente per il portafoglio: "
+                             f"{self.covariance.count} settimane su {MIN_WEEKS}")
+        scores_by_pair = {signal["pair"]: signal["score"] for signal in signals}
+        scores = np.array([scores_by_pair.get(pair, 0) for pair in self.pairs], dtype=np.float64)
+        weights, volatility = size_positions(scores, self.covariance.covariance(), self.target_volatility)
+        currencies, matrix = exposure_matrix(self.pairs)
+        return {
+            "as_of": self.covariance.last_date,
+            "weeks": self.covariance.count,
+            "volatility": volatility,
+            "pairs": [{"pair": pair, "score": int(score), "weight": round(float(weight), 4)}
+                      for pair, score, weight in zip(self.pairs, scores, weights)],
+            "currencies": [{"currency": currency, "score": int(score), "weight": round(float(weight), 4)}
+                           for currency, score, weight in zip(currencies, scores @ matrix, weights @ matrix)]
+        }
+
+    def publish(self, signals, paths):
+        """
+        Dimensiona i segnali e scrive il CSV del portafoglio (in modo atomico) su ogni percorso
+        """
+        sized = self.size(signals)
+        content = render_portfolio_csv(sized)
+        for path in paths:
+            write_atomic(path, content)
+        return sized
+
+    def save(self, path=None):
+        path = path or self.path
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(self.covariance.to_dict(), file)
+        os.replace(tmp_path, path)
+
+
+def render_portfolio_csv(portfolio):
+    """
+    Portafoglio in CSV: prima le coppie (Pair), poi l'esposizione netta per valuta (Currency)
+    """
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    writer.writerow(["Symbol", "Kind", "Score", "Weight"])
+    for pair in portfolio["pairs"]:
+        writer.writerow([pair["pair"], "Pair", pair["score"], pair["weight"]])
+    for currency in portfolio["currencies"]:
+        writer.writerow([currency["currency"], "Currency", currency["score"], currency["weight"]])
+    return buffer.getvalue().encode("utf-8")
+
+
+def _read_signals(path):
+    signals = pd.read_csv(path)
+    return [{"pair": pair, "score": int(score)} for pair, score in zip(signals["Pair"], signals["Score"])]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Portafoglio dei segnali COT con pesi dimensionati sul rischio")
+    parser.add_argument("--signals", default="pair_signals.csv", help="CSV dei segnali (getData.py)")
+    parser.add_argument("--state", default=STATE_FILE, help="Stato della covarianza mobile")
+    prices_source = parser.add_mutually_exclusive_group()
+    prices_source.add_argument("--prices", help="CSV prezzi settimanali: date + una colonna per coppia")
+    prices_source.add_argument("--price-store", help="Archivio delle barre MT5 (priceStore.py)")
+    parser.add_argument("--anchor", choices=sorted(ANCHORS), default="friday",
+                        help="Chiusura settimanale usata con --price-store")
+    parser.add_argument("--pairs", nargs="*", help="Coppie del portafoglio al primo avvio "
+                        "(default: quelle del CSV dei segnali presenti nello storico prezzi)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Settimane della covarianza")
+    parser.add_argument("--target-volatility", type=float, default=TARGET_VOLATILITY, help="Volatilità annua obiettivo")
+    parser.add_argument("--output", default=PORTFOLIO_FILE, help="CSV del portafoglio")
+    args = parser.parse_args()
+
+    signals = _read_signals(args.signals)
+    store = PriceStore(args.price_store) if args.price_store else None
+    prices = pd.read_csv(args.prices, parse_dates=["date"]).sort_values("date") if args.prices else None
+    pairs = args.pairs
+    if not pairs:
+        available = store.symbols() if store else list(prices.columns) if prices is not None else []
+        pairs = [signal["pair"] for signal in signals if signal["pair"] in available]
+
+    portfolio = Portfolio(args.state, pairs, args.window, args.target_volatility)
+    if store:
+        added = portfolio.update_from_store(store, args.anchor)
+    elif prices is not None:
+        added = portfolio.update_prices(prices["date"].dt.strftime("%Y-%m-%d"),
+                                        prices[portfolio.pairs].to_numpy(dtype=np.float64))
+    else:
+        added = 0
+    portfolio.save()
+    print(f"Covarianza: {added} settimane aggiunte, {portfolio.covariance.count} nella finestra")
+
+    sized = portfolio.publish(signals, [args.output])
+    print(pd.DataFrame(sized["pairs"]).to_string(index=False))
+    print(pd.DataFrame(sized["currencies"]).to_string(index=False))
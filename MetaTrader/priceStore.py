@@ -0,0 +1,247 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import json      # Per i metadati
+import os        # Per operazioni sul filesystem
+import numpy as np
+import pandas as pd
+
+# Colonne su disco per ogni simbolo: tempo in secondi (ora del server MT5) e barre OHLC + volume
+COLUMN_DTYPES = {
+    "time": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<i8")
+}
+
+# Righe lette per blocco durante l'importazione: la memoria resta limitata
+# anche con anni di barre M1
+CHUNK_ROWS = 200000
+
+# Ancoraggi settimanali rispetto alla data "as of" del report COT (martedì), in secondi:
+# - tuesday: chiusura del martedì (fine giornata)
+# - friday: pubblicazione CFTC, venerdì 15:30 New York = 22:30 ora del server
+#   (i server MT5 usano in genere UTC+2/+3 seguendo l'ora legale USA, quindi lo scarto resta fisso)
+ANCHORS = {
+    "tuesday": 24 * 3600,
+    "friday": 3 * 24 * 3600 + 22 * 3600 + 30 * 60
+}
+
+# Un martedì qualsiasi, per allineare la griglia settimanale
+TUESDAY = np.datetime64("1970-01-06", "s")
+WEEK = 7 * 24 * 3600
+
+
+class PriceStore:
+    """
+    Archivio colonnare delle barre esportate da MetaTrader 5.
+    Struttura su disco per ogni simbolo:
+    - <colonna>.bin: valori a larghezza fissa (time, open, high, low, close, volume)
+    - meta.json: numero di righe e ultimo tempo salvato
+    - weekly_<ancoraggio>.npz: barre settimanali già calcolate (cache)
+    Le letture usano np.memmap: una ricerca per data tocca solo le pagine necessarie.
+    """
+
+    def __init__(self, root="price_store"):
+        self.root = root
+
+    def _dir(self, symbol):
+        return os.path.join(self.root, symbol.upper())
+
+    def _load_meta(self, symbol):
+        path = os.path.join(self._dir(symbol), "meta.json")
+        if not os.path.exists(path):
+            return {"rows": 0, "last_time": None}
+        with open(path, "r") as file:
+            return json.load(file)
+
+    def _save_meta(self, symbol, meta):
+        path = os.path.join(self._dir(symbol), "meta.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(tmp_path, path)
+
+    def symbols(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, entry, "meta.json")))
+
+    def column(self, symbol, field):
+        rows = self._load_meta(symbol)["rows"]
+        if rows == 0:
+            return np.empty(0, dtype=COLUMN_DTYPES[field])
+        return np.memmap(os.path.join(self._dir(symbol), f"{field}.bin"),
+                         dtype=COLUMN_DTYPES[field], mode="r", shape=(rows,))
+
+    # ---------- Importazione ----------
+
+    def import_mt5(self, path, symbol=None, chunk_rows=CHUNK_ROWS):
+        """
+        Importa un export CSV di MetaTrader 5 (separato da tab, intestazioni <DATE>, <TIME>, ...).
+        Formati accettati:
+        - barre: <DATE> [<TIME>] <OPEN> <HIGH> <LOW> <CLOSE> <TICKVOL> ...
+        - tick: <DATE> <TIME> <BID> <ASK> ... (ogni tick diventa una barra con prezzo BID)
+        Il simbolo, se non indicato, è la parte del nome file prima di "_" (es. EURUSD_M1_2015.csv).
+        Lettura a blocchi di `chunk_rows` righe; le barre già presenti prima dell'importazione vengono
+        saltate, mentre tutte le righe del file vengono aggiunte (anche tick con lo stesso secondo).
+        Restituisce il numero di barre aggiunte.
+        """
+        symbol = (symbol or os.path.basename(path).split("_")[0].split(".")[0]).upper()
+        os.makedirs(self._dir(symbol), exist_ok=True)
+        meta = self._load_meta(symbol)
+        # Righe oltre quelle registrate (import interrotto) vengono sovrascritte
+        for field, dtype in COLUMN_DTYPES.items():
+            with open(os.path.join(self._dir(symbol), f"{field}.bin"), "ab") as file:
+                file.truncate(meta["rows"] * dtype.itemsize)
+
+        added = 0
+        # Limite fissato prima del ciclo: i tick hanno tempi troncati al secondo, quindi confrontare ogni
+        # blocco con l'ultima riga del blocco precedente scarterebbe i tick dello stesso secondo
+        stored_until = meta["last_time"]
+        for chunk in pd.read_csv(path, sep="\t", chunksize=chunk_rows, dtype={"<DATE>": str, "<TIME>": str}):
+            bars = _parse_mt5(chunk)
+            if stored_until is not None:
+                bars = {field: values[bars["time"] > stored_until] for field, values in bars.items()}
+            if len(bars["time"]) == 0:
+                continue
+            if np.any(np.diff(bars["time"]) < 0):
+                order = np.argsort(bars["time"], kind="stable")
+                bars = {field: values[order] for field, values in bars.items()}
+            for field, dtype in COLUMN_DTYPES.items():
+                with open(os.path.join(self._dir(symbol), f"{field}.bin"), "ab") as file:
+                    file.write(np.ascontiguousarray(bars[field], dtype=dtype).tobytes())
+            meta["rows"] += len(bars["time"])
+            meta["last_time"] = int(bars["time"][-1])
+            added += len(bars["time"])
+            # Metadati aggiornati dopo ogni blocco: un'interruzione perde al massimo un blocco
+            self._save_meta(symbol, meta)
+        return added
+
+    # ---------- Lettura ----------
+
+    def bars(self, symbol, start=None, end=None):
+        """
+        Barre tra start e end (datetime64 o stringhe ISO, ora del server), lette via memmap
+        """
+        times = self.column(symbol, "time")
+        first = 0 if start is None else int(np.searchsorted(times, _seconds(start), side="left"))
+        last = len(times) if end is None else int(np.searchsorted(times, _seconds(end), side="right"))
+        return {field: np.array(self.column(symbol, field)[first:last]) for field in COLUMN_DTYPES}
+
+    def weekly(self, symbol, anchor="friday"):
+        """
+        Barre settimanali allineate al calendario COT.
+        Ogni settimana termina all'ancoraggio (vedi ANCHORS) della data "as of" del report:
+        la riga con data D (martedì) contiene le barre da ancoraggio(D - 7) ad ancoraggio(D).
+        Il risultato è salvato in cache e ricalcolato solo se l'archivio è cambiato.
+        """
+        meta = self._load_meta(symbol)
+        cache_path = os.path.join(self._dir(symbol), f"weekly_{anchor}.npz")
+        if os.path.exists(cache_path):
+            with np.load(cache_path, allow_pickle=False) as cached:
+                if int(cached["rows"]) == meta["rows"]:
+                    return {field: cached[field] for field in cached.files if field != "rows"}
+
+        times = self.column(symbol, "time")
+        if len(times) == 0:
+            raise ValueError(f"Nessuna barra per {symbol}")
+        # Indice della settimana COT di ogni barra: le barre aperte prima dell'ancoraggio
+        # appartengono alla settimana che termina lì
+        offset = TUESDAY.astype(np.int64) + ANCHORS[anchor]
+        week = (np.asarray(times) - offset) // WEEK + 1
+        starts = np.flatnonzero(np.r_[True, week[1:] != week[:-1]])
+        ends = np.r_[starts[1:], len(times)] - 1
+        result = {
+            "date": (TUESDAY + (week[starts] * WEEK).astype("timedelta64[s]")).astype("datetime64[D]"),
+            "open": np.asarray(self.column(symbol, "open"))[starts],
+            "high": np.maximum.reduceat(np.asarray(self.column(symbol, "high")), starts),
+            "low": np.minimum.reduceat(np.asarray(self.column(symbol, "low")), starts),
+            "close": np.asarray(self.column(symbol, "close"))[ends],
+            "volume": np.add.reduceat(np.asarray(self.column(symbol, "volume")), starts)
+        }
+
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(file, rows=meta["rows"], **result)
+        os.replace(tmp_path, cache_path)
+        return result
+
+    def weekly_closes(self, symbols, anchor="friday"):
+        """
+        Chiusure settimanali di più simboli su date comuni (NaN dove manca un simbolo)
+        Le date sono quelle dell'ancoraggio (martedì o venerdì), pronte per backtest.forward_returns
+        """
+        missing = [s for s in symbols if s.upper() not in self.symbols()]
+        if missing:
+            raise ValueError(f"Coppie assenti nell'archivio prezzi: {', '.join(missing)}")
+        weekly = {symbol: self.weekly(symbol, anchor) for symbol in symbols}
+        report_dates = np.unique(np.concatenate([data["date"] for data in weekly.values()]))
+        closes = np.full((len(report_dates), len(symbols)), np.nan)
+        for column, symbol in enumerate(symbols):
+            rows = np.searchsorted(report_dates, weekly[symbol]["date"])
+            closes[rows, column] = weekly[symbol]["close"]
+        anchor_dates = report_dates + np.timedelta64(ANCHORS[anchor] // (24 * 3600), "D")
+        return anchor_dates, closes
+
+
+def _seconds(value):
+    return np.datetime64(value, "s").astype(np.int64)
+
+
+def _to_datetime(stamp):
+    # MT5 usa "2024.01.02 13:45", con secondi (e millisecondi nei tick) a seconda dell'export
+    for fmt in ("%Y.%m.%d %H:%M", "%Y.%m.%d %H:%M:%S", "%Y.%m.%d"):
+        try:
+            return pd.to_datetime(stamp, format=fmt)
+        except ValueError:
+            continue
+    return pd.to_datetime(stamp, format="mixed")
+
+
+def _parse_mt5(chunk):
+    """
+    Converte un blocco dell'export MT5 (stringhe) in colonne tipizzate
+    """
+    columns = {name.strip("<>").upper(): values for name, values in chunk.items()}
+    stamp = columns["DATE"] + " " + columns["TIME"] if "TIME" in columns else columns["DATE"]
+    times = _to_datetime(stamp).to_numpy(dtype="datetime64[s]").astype(np.int64)
+    if "OPEN" in columns:
+        bars = {field: columns[field.upper()].astype(np.float64).to_numpy() for field in ("open", "high", "low", "close")}
+        volume = columns.get("TICKVOL", columns.get("VOL"))
+    else:
+        # Export dei tick: i tick senza BID (solo ASK o LAST) riprendono l'ultimo BID
+        price = columns["BID"].astype(np.float64).ffill().to_numpy()
+        bars = {field: price for field in ("open", "high", "low", "close")}
+        volume = None
+    bars["time"] = times
+    bars["volume"] = volume.astype(np.int64).to_numpy() if volume is not None else np.ones(len(times), dtype=np.int64)
+    valid = ~np.isnan(bars["close"])
+    return {field: values[valid] for field, values in bars.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archivio delle barre MetaTrader 5 allineate al calendario COT")
+    parser.add_argument("--store", default="price_store", help="Cartella dell'archivio")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="Importa export CSV di MT5")
+    import_parser.add_argument("files", nargs="+", help="File CSV (es. EURUSD_M1_201501020000_202506101200.csv)")
+    import_parser.add_argument("--symbol", help="Simbolo, se non ricavabile dal nome file")
+    weekly_parser = commands.add_parser("weekly", help="Barre settimanali di un simbolo")
+    weekly_parser.add_argument("symbol")
+    weekly_parser.add_argument("--anchor", choices=sorted(ANCHORS), default="friday")
+    weekly_parser.add_argument("--output", help="CSV di destinazione")
+    args = parser.parse_args()
+
+    store = PriceStore(args.store)
+    if args.command == "import":
+        for path in args.files:
+            print(f"{path}: {store.import_mt5(path, args.symbol)} barre aggiunte")
+    else:
+        weekly = pd.DataFrame(store.weekly(args.symbol, args.anchor))
+        if args.output:
+            weekly.to_csv(args.output, index=False)
+        else:
+            print(weekly.to_string(index=False))
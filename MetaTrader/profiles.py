@@ -0,0 +1,228 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import json      # Per il file dei profili
+from functools import lru_cache  # Per la cache dei classificatori compilati
+import numpy as np
+import pandas as pd
+from cotReport import load_report
+from getData import (CURRENCY_RANGES, CURRENCY_RANGES_PERCENT, all_pairs, compile_ranges, currency_delta_percent,
+                     currency_mapping, download_and_convert, interpret_pair_score, load_currency_ranges, signal_from_score)
+
+# Profili di soglie per utente (nome -> impostazioni). Tutte le chiavi sono opzionali:
+# - scale: moltiplica tutte le soglie di default (< 1 più sensibile, > 1 più prudente)
+# - ranges / ranges_percent: soglie per valuta, formato CURRENCY_RANGES; basta indicare le valute,
+#   i lati ("positive"/"negative") e i livelli ("low"/"medium"/"high") da cambiare
+# - pair_cutoffs: punteggio assoluto minimo per "moderato", "forte" e "molto forte"
+#   (come interpret_pair_score: [1, 3, 5], tre valori crescenti); sotto il primo la coppia è NEUTRAL
+PROFILES_FILE = "profiles.json"
+PAIR_CUTOFFS = (1, 3, 5)
+# Livelli di ogni lato in una tabella di range (formato CURRENCY_RANGES)
+RANGE_LEVELS = {"positive": ("low", "medium", "high"), "negative": ("low", "medium", "high")}
+# Classificatori compilati tenuti in memoria
+PROFILE_CACHE_SIZE = 4096
+
+# Etichette di interpret_pair_score per livello (0 = neutro, ±1 moderato, ±2 forte, ±3 molto forte)
+PAIR_LEVEL_LABELS = {level: interpret_pair_score(np.sign(level) * PAIR_CUTOFFS[abs(level) - 1] if level else 0)
+                     for level in range(-3, 4)}
+
+
+def load_profiles(path=PROFILES_FILE):
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _valid_level(level, value):
+    # "low" e "medium" sono intervalli [inizio, fine], "high" è la sola soglia
+    if level == "high":
+        return _is_number(value)
+    return isinstance(value, (list, tuple)) and len(value) == 2 and all(map(_is_number, value))
+
+
+def _resolve_ranges(base, overrides, scale):
+    # Soglie di default scalate, poi sostituite livello per livello dal profilo
+    table = {symbol: {side: {level: tuple(np.multiply(value, scale).tolist()) if isinstance(value, (list, tuple))
+                             else value * scale
+                             for level, value in levels.items()}
+                      for side, levels in sides.items()}
+             for symbol, sides in base.items()}
+    for symbol, sides in (overrides or {}).items():
+        if not isinstance(sides, dict):
+            raise ValueError(f"soglie di {symbol} non valide: atteso un oggetto con 'positive'/'negative'")
+        for side, levels in sides.items():
+            if side not in RANGE_LEVELS or not isinstance(levels, dict):
+                raise ValueError(f"lato '{side}' di {symbol} non valido (ammessi: positive, negative)")
+            unknown = set(levels) - set(RANGE_LEVELS[side])
+            if unknown:
+                raise ValueError(f"livelli sconosciuti per {symbol}.{side}: {', '.join(sorted(unknown))}")
+            for level, value in levels.items():
+                if not _valid_level(level, value):
+                    raise ValueError(f"valore di {symbol}.{side}.{level} non valido: {value!r}")
+            table.setdefault(symbol, {}).setdefault(side, {}).update(levels)
+    for symbol, sides in table.items():
+        missing = [f"{side}.{level}" for side, levels in RANGE_LEVELS.items()
+                   for level in levels if level not in sides.get(side, {})]
+        if missing:
+            raise ValueError(f"soglie di {symbol} incomplete, mancano: {', '.join(missing)}")
+    return table
+
+
+def _check_thresholds(symbols, thresholds, table_name):
+    # Le quattro soglie di compile_ranges devono essere crescenti, altrimenti le fasce si sovrappongono
+    for symbol, row in zip(symbols, thresholds):
+        if not np.all(np.diff(row) > 0):
+            raise ValueError(f"soglie {table_name} di {symbol} non crescenti: {row.tolist()}")
+
+
+def _check_cutoffs(cutoffs):
+    if cutoffs.shape != (len(PAIR_CUTOFFS),) or cutoffs[0] <= 0 or not np.all(np.diff(cutoffs) > 0):
+        raise ValueError(f"pair_cutoffs deve contenere {len(PAIR_CUTOFFS)} valori positivi crescenti, "
+                         f"non {cutoffs.tolist()}")
+
+
+@lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def _compile_cached(profile_key, base_key):
+    profile = json.loads(profile_key)
+    base_ranges, base_percent = json.loads(base_key)
+    scale = profile.get("scale", 1.0)
+    if not _is_number(scale) or scale <= 0:
+        raise ValueError(f"scale deve essere un numero positivo, non {scale!r}")
+    symbols, thresholds = compile_ranges(_resolve_ranges(base_ranges, profile.get("ranges"), scale))
+    percent_symbols, percent_thresholds = compile_ranges(_resolve_ranges(base_percent, profile.get("ranges_percent"), scale))
+    _check_thresholds(symbols, thresholds, "storiche")
+    _check_thresholds(percent_symbols, percent_thresholds, "percentuali")
+    missing = [symbol for symbol in symbols if symbol not in percent_symbols]
+    if missing:
+        raise ValueError(f"soglie percentuali mancanti per: {', '.join(missing)}")
+    # Stesso ordine di valute per le due tabelle
+    percent_thresholds = percent_thresholds[[percent_symbols.index(symbol) for symbol in symbols]]
+    try:
+        cutoffs = np.array(profile.get("pair_cutoffs", PAIR_CUTOFFS), dtype=np.float64)
+    except (TypeError, ValueError):
+        raise ValueError(f"pair_cutoffs non numerici: {profile['pair_cutoffs']!r}") from None
+    _check_cutoffs(cutoffs)
+    for array in (thresholds, percent_thresholds, cutoffs):
+        array.flags.writeable = False
+    return symbols, thresholds, percent_thresholds, cutoffs
+
+
+def _base_key(ranges=None):
+    # Le soglie di partenza (es. ricalibrate con load_currency_ranges) fanno parte della chiave
+    return json.dumps([ranges or CURRENCY_RANGES, CURRENCY_RANGES_PERCENT], sort_keys=True)
+
+
+def compile_profile(profile, base_key=None):
+    """
+    Compila un profilo in matrici di soglie (una riga per valuta, colonne come compile_ranges)
+    e nei cut-off delle coppie. Il risultato resta in una cache LRU: profili uguali,
+    anche di utenti diversi, vengono compilati una sola volta.
+    Solleva ValueError se soglie, scale o pair_cutoffs non sono validi.
+    Restituisce (simboli, soglie storiche, soglie percentuali, cut-off coppie)
+    """
+    return _compile_cached(json.dumps(profile, sort_keys=True), base_key or _base_key())
+
+
+def _classify(deltas, thresholds):
+    # classify_batch con una dimensione in più: profili x valute
+    positive = 1 + (deltas > thresholds[..., 2]) + (deltas > thresholds[..., 3])
+    negative = -3 + (deltas >= thresholds[..., 0]) + (deltas >= thresholds[..., 1])
+    return np.where(deltas > 0, positive, negative).astype(np.int8)
+
+
+def score_profiles(report, profiles, mapping=None, pairs=None, ranges=None):
+    """
+    Punteggi di un report per molti profili in un solo passaggio.
+    Process:
+    1. Delta semplice e percentuale delle valute calcolati una volta sola dal report
+    2. Soglie di ogni profilo dalla cache (compilate solo alla prima richiesta) impilate in
+       matrici profili x valute x 4
+    3. Classificazione storica, moderna e finale (la più conservativa) per tutti i profili insieme
+    4. Punteggi delle coppie (base - quote) e livello secondo i cut-off di ogni profilo
+    profiles: nome -> impostazioni (vedi PROFILES_FILE)
+    ranges: range storici di partenza (load_currency_ranges); di default CURRENCY_RANGES
+    Restituisce un dizionario con nomi, valute, coppie e matrici profili x valute / profili x coppie
+    """
+    mapping = mapping or currency_mapping
+    names = list(profiles)
+    base_key = _base_key(ranges)
+    compiled = []
+    for name in names:
+        try:
+            compiled.append(compile_profile(profiles[name], base_key))
+        except ValueError as e:
+            raise ValueError(f"Profilo '{name}' non valido: {e}") from e
+    # Valute comuni a tutti i profili (un profilo può aggiungerne di proprie), nell'ordine del primo
+    symbols = [symbol for symbol in (compiled[0][0] if compiled else list(CURRENCY_RANGES))
+               if all(symbol in profile[0] for profile in compiled)]
+
+    available = {mapping[name]: report.get(name) for name in mapping}
+    available = {symbol: data for symbol, data in available.items() if data}
+    symbols = [symbol for symbol in symbols if symbol in available]
+    pairs = [pair for pair in (pairs or all_pairs(symbols)) if pair[:3] in symbols and pair[3:] in symbols]
+    simple_deltas = np.array([available[s]["long_change"] - available[s]["short_change"] for s in symbols],
+                             dtype=np.float64)
+    delta_percent = currency_delta_percent(simple_deltas, symbols)
+
+    if not names:
+        return {"profiles": [], "currencies": symbols, "pairs": pairs,
+                "currency_scores": np.empty((0, len(symbols)), dtype=np.int8),
+                "pair_scores": np.empty((0, len(pairs)), dtype=np.int8),
+                "levels": np.empty((0, len(pairs)), dtype=np.int8)}
+
+    # Righe delle valute del report nella tabella compilata di ogni profilo
+    rows = [[profile[0].index(symbol) for symbol in symbols] for profile in compiled]
+    thresholds = np.stack([profile[1][row] for profile, row in zip(compiled, rows)])
+    percent_thresholds = np.stack([profile[2][row] for profile, row in zip(compiled, rows)])
+    cutoffs = np.stack([profile[3] for profile in compiled])
+
+    historical = _classify(simple_deltas, thresholds)
+    modern = _classify(delta_percent, percent_thresholds)
+    final = np.where(np.abs(historical) <= np.abs(modern), historical, modern).astype(np.int8)
+
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+    base = np.array([index[pair[:3]] for pair in pairs], dtype=np.intp)
+    quote = np.array([index[pair[3:]] for pair in pairs], dtype=np.intp)
+    pair_scores = final[:, base] - final[:, quote]
+    magnitude = (np.abs(pair_scores)[:, :, None] >= cutoffs[:, None, :]).sum(axis=2)
+    levels = (np.sign(pair_scores) * magnitude).astype(np.int8)
+    return {"profiles": names, "currencies": symbols, "pairs": pairs,
+            "currency_scores": final, "pair_scores": pair_scores, "levels": levels}
+
+
+def profile_signals(scored, name):
+    """
+    Segnali di un profilo nel formato di getData (pair, score, signal, strength), ordinati per punteggio
+    """
+    row = scored["profiles"].index(name)
+    signals = [{"pair": pair, "score": int(score), "signal": signal_from_score(level),
+                "strength": PAIR_LEVEL_LABELS[int(level)]}
+               for pair, score, level in zip(scored["pairs"], scored["pair_scores"][row], scored["levels"][row])]
+    return sorted(signals, key=lambda x: x["score"], reverse=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Punteggi del report per tutti i profili di soglie degli utenti")
+    parser.add_argument("--input", help="Report locale (TXT/CSV CFTC o cache .npz) invece del download")
+    parser.add_argument("--profiles", default=PROFILES_FILE, help="JSON nome profilo -> impostazioni")
+    parser.add_argument("--profile", help="Mostra i segnali di un solo profilo")
+    parser.add_argument("--output", help="CSV con profilo, coppia, punteggio e segnale")
+    args = parser.parse_args()
+
+    report = load_report(args.input) if args.input else download_and_convert(quiet=True)[0]
+    scored = score_profiles(report, load_profiles(args.profiles), ranges=load_currency_ranges())
+    print(f"Report del {report.report_date}: {len(scored['profiles'])} profili, {len(scored['pairs'])} coppie")
+
+    if args.profile:
+        for signal in profile_signals(scored, args.profile):
+            print(f"{signal['pair']}: {signal['signal']} ({signal['score']:+}) {signal['strength']}")
+    if args.output:
+        count, width = scored["pair_scores"].shape
+        pd.DataFrame({
+            "profile": np.repeat(scored["profiles"], width),
+            "pair": np.tile(scored["pairs"], count),
+            "score": scored["pair_scores"].ravel(),
+            "signal": pd.Categorical.from_codes(np.sign(scored["levels"].ravel()) + 1, ["SELL", "NEUTRAL", "BUY"])
+        }).to_csv(args.output, index=False)
@@ -0,0 +1,197 @@
+# Importazione librerie necessarie
+import csv       # Per il formato CSV letto dall'EA
+import io        # Per generare il contenuto in memoria
+import json      # Per il formato JSON
+import os        # Per operazioni sul filesystem
+import struct    # Per il formato binario
+import time      # Per i nuovi tentativi di sostituzione
+
+# Formato binario (little-endian, leggibile da MQL5 con FileReadInteger/FileReadString):
+# intestazione: magic "COTS", versione, numero di record, data del report come AAAAMMGG
+# record: coppia (8 byte ASCII, riempiti con zeri), segnale (-1/0/+1), 3 byte di padding, punteggio int32
+BINARY_MAGIC = b"COTS"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sHHi")
+BINARY_RECORD = struct.Struct("<8sb3xi")
+SIGNAL_CODES = {"BUY": 1, "NEUTRAL": 0, "SELL": -1}
+
+# Estensione del file -> formato
+FORMATS_BY_EXTENSION = {".csv": "csv", ".json": "json", ".bin": "bin"}
+
+# Se l'EA tiene il file aperto la sostituzione può fallire per un istante (Windows)
+REPLACE_RETRIES = 5
+REPLACE_DELAY = 0.05
+# Tentativi di creare un file temporaneo con nome univoco
+TEMP_ATTEMPTS = 100
+
+
+def _signal(pair):
+    # Le coppie di make_result() hanno già il segnale; altrimenti si ricava dal punteggio
+    if "signal" in pair:
+        return pair["signal"]
+    return "BUY" if pair["score"] > 0 else "SELL" if pair["score"] < 0 else "NEUTRAL"
+
+
+def render_csv(signals, report_date=None):
+    buffer = io.StringIO(newline="")
+    writer = csv.writer(buffer)
+    writer.writerow(["Pair", "Signal", "Score"])
+    for pair in signals:
+        writer.writerow([pair["pair"], _signal(pair), pair["score"]])
+    return buffer.getvalue().encode("utf-8")
+
+
+def render_json(signals, report_date=None):
+    data = {
+        "report_date": report_date,
+        "pairs": [{"pair": pair["pair"], "signal": _signal(pair), "score": pair["score"]} for pair in signals]
+    }
+    return json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def render_bin(signals, report_date=None):
+    date = int(report_date.replace("-", "")) if report_date else 0
+    parts = [BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(signals), date)]
+    for pair in signals:
+        parts.append(BINARY_RECORD.pack(pair["pair"].encode("ascii"), SIGNAL_CODES[_signal(pair)], int(pair["score"])))
+    return b"".join(parts)
+
+
+RENDERERS = {"csv": render_csv, "json": render_json, "bin": render_bin}
+
+
+def target_format(path):
+    """
+    Formato di un target ricavato dall'estensione (CSV se sconosciuta)
+    """
+    return FORMATS_BY_EXTENSION.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+def _create_temp(path):
+    """
+    Crea in modo esclusivo un file temporaneo accanto a `path`.
+    Come mkstemp, ma con modo 0o666: il sistema applica la umask corrente e il target
+    riceve gli stessi permessi di un normale open(), senza toccare la umask del processo
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    prefix = os.path.join(os.path.dirname(path) or ".", f".{os.path.basename(path)}.")
+    for _ in range(TEMP_ATTEMPTS):
+        tmp_path = f"{prefix}{os.urandom(4).hex()}.tmp"
+        try:
+            return os.open(tmp_path, flags, 0o666), tmp_path
+        except FileExistsError:
+            continue
+    raise FileExistsError(f"Nessun nome temporaneo libero per {path}")
+
+
+def write_atomic(path, content):
+    """
+    Scrive `content` su un file temporaneo nella stessa cartella e lo sostituisce al target:
+    chi legge vede sempre il file vecchio o quello nuovo, mai uno scritto a metà.
+    Il temporaneo ha un nome univoco (più scrittori non si sovrascrivono a vicenda)
+    e viene rimosso se qualcosa va storto, anche a metà scrittura
+    """
+    fd, tmp_path = _create_temp(path)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(tmp_path, path)
+                return
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(REPLACE_DELAY)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _unchanged(path, content):
+    # Confronto economico: dimensione prima, contenuto solo se coincide
+    try:
+        if os.path.getsize(path) != len(content):
+            return False
+        with open(path, "rb") as file:
+            return file.read() == content
+    except OSError:
+        return False
+
+
+class Publisher:
+    """
+    Pubblica i segnali su più target (file locale, cartelle dei terminali MetaTrader, ...).
+    Process:
+    1. Ogni formato richiesto viene generato una sola volta
+    2. I target con lo stesso contenuto già su disco vengono saltati
+    3. Gli altri vengono sostituiti in modo atomico (file temporaneo + rename)
+    Un errore su un target non blocca gli altri.
+    """
+
+    def __init__(self, targets=()):
+        self.targets = [path for path in targets if path]
+
+    def publish(self, signals, report_date=None):
+        """
+        Restituisce target -> "scritto", "invariato" oppure l'eccezione sollevata
+        """
+        rendered = {}
+        status = {}
+        for path in self.targets:
+            fmt = target_format(path)
+            if fmt not in rendered:
+                rendered[fmt] = RENDERERS[fmt](signals, report_date)
+            content = rendered[fmt]
+            if _unchanged(path, content):
+                status[path] = "invariato"
+                continue
+            try:
+                write_atomic(path, content)
+                status[path] = "scritto"
+            except OSError as e:
+                status[path] = e
+        return status
+
+
+# ---------- Cartelle dei terminali MetaTrader ----------
+
+def metaquotes_root():
+    """
+    Cartella MetaQuotes/Terminal dell'utente corrente (senza accedere al disco)
+    """
+    appdata = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Roaming")
+    return os.path.join(appdata, "MetaQuotes", "Terminal")
+
+
+def common_files_folder(root=None):
+    """
+    Cartella Common\\Files condivisa da tutti i terminali (quella letta dall'EA con FILE_COMMON)
+    """
+    return os.path.join(root or metaquotes_root(), "Common", "Files")
+
+
+_terminal_folders = {}
+
+def find_terminal_folders(root=None, refresh=False):
+    """
+    Cartelle Files dei terminali installati (<id>\\MQL5\\Files o <id>\\MQL4\\Files).
+    Ricerca limitata a un livello sotto MetaQuotes/Terminal, con risultato in cache
+    per le chiamate successive (refresh=True la ripete).
+    """
+    root = root or metaquotes_root()
+    if refresh or root not in _terminal_folders:
+        folders = []
+        if os.path.isdir(root):
+            for entry in sorted(os.listdir(root)):
+                for mql in ("MQL5", "MQL4"):
+                    files = os.path.join(root, entry, mql, "Files")
+                    if os.path.isdir(files):
+                        folders.append(files)
+        _terminal_folders[root] = folders
+    return list(_terminal_folders[root])
@@ -0,0 +1,113 @@
+# Importazione librerie necessarie
+import json  # Per i metadati della cache
+import os    # Per operazioni sul filesystem
+from cotReport import CHUNK_SIZE, CotReport, parse_report
+from instrumentation import NULL_INSTRUMENTATION
+
+
+class DownloadError(Exception):
+    """Errore HTTP durante il download del report COT"""
+
+
+class ReportCache:
+    """
+    Cache locale dell'ultimo report COT scaricato.
+    Contiene:
+    - report.npz: colonne già parsate del report
+    - meta.json: URL, ETag, Last-Modified e data del report
+    """
+
+    def __init__(self, cache_dir="cot_cache"):
+        self.cache_dir = cache_dir
+        self.report_path = os.path.join(cache_dir, "report.npz")
+        self.meta_path = os.path.join(cache_dir, "meta.json")
+
+    def load_meta(self):
+        if not os.path.exists(self.meta_path) or not os.path.exists(self.report_path):
+            return {}
+        with open(self.meta_path, "r") as file:
+            return json.load(file)
+
+    def load_report(self):
+        return CotReport.load(self.report_path)
+
+    def conditional_headers(self, url):
+        """
+        Header per una richiesta condizionale, solo se la cache si riferisce allo stesso URL
+        """
+        meta = self.load_meta()
+        if meta.get("url") != url:
+            return {}
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, report, etag=None, last_modified=None):
+        """
+        Salva report e metadati; i metadati vengono scritti per ultimi
+        così una cache interrotta a metà non risulta mai valida
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        report.save(self.report_path)
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "report_date": report.report_date
+        }
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(meta, file, indent=2)
+        os.replace(tmp_path, self.meta_path)
+
+
+def fetch_report(url, cache, session=None, timeout=60, schema="legacy", group=None, instrument=None):
+    """
+    Scarica il report solo se è cambiato rispetto alla cache.
+    Process:
+    1. Richiesta condizionale con ETag/Last-Modified salvati
+    2. 304 Not Modified -> report ricaricato dalla cache, nessun parsing del testo
+    3. 200 -> parsing in streaming e confronto della data del report
+    schema/group: schema del report e gruppo di trader da estrarre (vedi cotReport.report_columns)
+    instrument: riceve lo span "fetch" (byte scaricati, cache hit/miss, righe, durata)
+    Restituisce (report, changed): changed è False se la data del report non è cambiata
+    """
+    if session is None:
+        # Import ritardato: requests serve solo quando si scarica davvero
+        import requests
+        session = requests
+    instrument = instrument or NULL_INSTRUMENTATION
+    with instrument.span("fetch", url=url) as span:
+        previous = cache.load_meta()
+        response = session.get(url, headers=cache.conditional_headers(url), stream=True, timeout=timeout)
+        span.set(http_status=response.status_code)
+        try:
+            if response.status_code == 304:
+                report = cache.load_report()
+                span.set(cache="hit", bytes=0, rows=len(report), report_date=report.report_date, changed=False)
+                return report, False
+            if response.status_code != 200:
+                raise DownloadError(f"Errore nel download: {response.status_code}")
+            received = [0]
+            report = parse_report(_count_bytes(response.iter_content(chunk_size=CHUNK_SIZE), received), schema, group)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+        finally:
+            response.close()
+
+        # Anche senza supporto alle richieste condizionali la data del report basta
+        # a capire se i dati sono nuovi
+        changed = previous.get("url") != url or previous.get("report_date") != report.report_date
+        cache.store(url, report, etag, last_modified)
+        span.set(cache="miss", bytes=received[0], rows=len(report), report_date=report.report_date, changed=changed)
+        return report, changed
+
+
+def _count_bytes(chunks, received):
+    # Conta i byte scaricati mentre il parser consuma i blocchi
+    for chunk in chunks:
+        received[0] += len(chunk)
+        yield chunk
@@ -0,0 +1,213 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import json      # Per l'output delle interrogazioni
+import sqlite3   # Per il registro indicizzato
+import time      # Per l'istante di registrazione
+
+# Registro storico dei segnali: una voce per data del report, mai modificata.
+# Tabelle (chiave primaria = indice B-tree, quindi inserimenti e letture restano O(log n)):
+# - reports: data del report e istante di registrazione
+# - currencies: delta e classificazioni per valuta e data
+# - pairs: punteggio e segnale per coppia e data, con il segnale della settimana precedente
+#   (calcolato all'inserimento, così le inversioni si leggono da un indice senza join)
+LEDGER_FILE = "signal_ledger.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_date TEXT PRIMARY KEY,
+    recorded_at REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS currencies (
+    currency TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    long_positions INTEGER,
+    short_positions INTEGER,
+    long_change INTEGER,
+    short_change INTEGER,
+    simple_delta INTEGER,
+    raw_delta REAL,
+    delta_tot REAL,
+    delta_percent REAL,
+    historical_classification TEXT,
+    modern_classification TEXT,
+    classification TEXT,
+    PRIMARY KEY (currency, report_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS currencies_by_date ON currencies (report_date);
+
+CREATE TABLE IF NOT EXISTS pairs (
+    pair TEXT NOT NULL,
+    report_date TEXT NOT NULL,
+    base_currency TEXT,
+    quote_currency TEXT,
+    score INTEGER,
+    signal TEXT,
+    strength TEXT,
+    previous_signal TEXT,
+    PRIMARY KEY (pair, report_date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS pairs_by_date ON pairs (report_date);
+CREATE INDEX IF NOT EXISTS pairs_by_flip ON pairs (previous_signal, signal, report_date);
+"""
+
+CURRENCY_FIELDS = ["long_positions", "short_positions", "long_change", "short_change", "simple_delta",
+                   "raw_delta", "delta_tot", "delta_percent",
+                   "historical_classification", "modern_classification", "classification"]
+PAIR_FIELDS = ["base_currency", "quote_currency", "score", "signal", "strength"]
+
+
+class SignalLedger:
+    """
+    Registro append-only dei risultati di getData.run (o SignalService).
+    Ogni data del report viene registrata una sola volta: rieseguire lo script
+    sullo stesso report non duplica nulla, e le date precedenti all'ultima sono rifiutate.
+    """
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- Scrittura ----------
+
+    def record(self, result, recorded_at=None):
+        """
+        Registra un risultato (getData.make_result) con valute e coppie.
+        Restituisce True se la data è nuova, False se era già registrata.
+        """
+        report_date = result["report_date"]
+        if not report_date:
+            raise ValueError("Risultato senza data del report")
+        latest = self.latest_date()
+        if latest is not None and report_date <= latest:
+            if self._has_report(report_date):
+                return False
+            raise ValueError(f"Registro append-only: {report_date} precede l'ultimo report ({latest})")
+
+        with self.connection:
+            self.connection.execute("INSERT INTO reports VALUES (?, ?)",
+                                    (report_date, time.time() if recorded_at is None else recorded_at))
+            self.connection.executemany(
+                f"INSERT INTO currencies VALUES (?, ?{', ?' * len(CURRENCY_FIELDS)})",
+                [(currency, report_date, *(data.get(field) for field in CURRENCY_FIELDS))
+                 for currency, data in result["currencies"].items()])
+            self.connection.executemany(
+                f"INSERT INTO pairs VALUES (?, ?{', ?' * len(PAIR_FIELDS)}, ?)",
+                [(pair["pair"], report_date, *(pair.get(field) for field in PAIR_FIELDS),
+                  self._previous_signal(pair["pair"], report_date))
+                 for pair in result["pairs"]])
+        return True
+
+    def _has_report(self, report_date):
+        return self.connection.execute("SELECT 1 FROM reports WHERE report_date = ?", (report_date,)).fetchone() is not None
+
+    def _previous_signal(self, pair, report_date):
+        # Ultimo segnale della coppia prima di questa data (anche se mancava nel report precedente)
+        row = self.connection.execute(
+            "SELECT signal FROM pairs WHERE pair = ? AND report_date < ? ORDER BY report_date DESC LIMIT 1",
+            (pair, report_date)).fetchone()
+        return row["signal"] if row else None
+
+    # ---------- Interrogazioni ----------
+
+    def latest_date(self):
+        row = self.connection.execute("SELECT report_date FROM reports ORDER BY report_date DESC LIMIT 1").fetchone()
+        return row["report_date"] if row else None
+
+    def dates(self):
+        return [row["report_date"] for row in self.connection.execute("SELECT report_date FROM reports ORDER BY report_date")]
+
+    def _since_weeks(self, weeks):
+        # Data del report più vecchio tra gli ultimi `weeks`
+        row = self.connection.execute("SELECT report_date FROM reports ORDER BY report_date DESC LIMIT 1 OFFSET ?",
+                                      (weeks - 1,)).fetchone()
+        return row["report_date"] if row else None
+
+    def pair_history(self, pair, start=None, end=None):
+        """
+        Storico di una coppia (es. "USDJPY"), dalla data più vecchia
+        """
+        return self._history("pairs", "pair", pair.upper(), start, end)
+
+    def currency_history(self, currency, start=None, end=None):
+        """
+        Storico di una valuta (simbolo, es. "JPY"), dalla data più vecchia
+        """
+        return self._history("currencies", "currency", currency.upper(), start, end)
+
+    def _history(self, table, key, value, start, end):
+        rows = self.connection.execute(
+            f"SELECT * FROM {table} WHERE {key} = ? AND report_date >= ? AND report_date <= ? ORDER BY report_date",
+            (value, start or "", end or "9999"))
+        return [dict(row) for row in rows]
+
+    def flips(self, from_signal=None, to_signal=None, weeks=None):
+        """
+        Coppie il cui segnale è cambiato, eventualmente solo da `from_signal` a `to_signal`
+        e solo negli ultimi `weeks` report. Ordinate per data e coppia.
+        """
+        clauses, params = ["previous_signal != signal"], []
+        if from_signal:
+            clauses.append("previous_signal = ?")
+            params.append(from_signal)
+        if to_signal:
+            clauses.append("signal = ?")
+            params.append(to_signal)
+        if weeks:
+            clauses.append("report_date >= ?")
+            params.append(self._since_weeks(weeks) or "")
+        rows = self.connection.execute(
+            f"SELECT * FROM pairs WHERE {' AND '.join(clauses)} ORDER BY report_date, pair", params)
+        return [dict(row) for row in rows]
+
+    def diff(self, report_date=None):
+        """
+        Coppie il cui segnale è diverso dal report precedente (comprese le coppie nuove)
+        report_date: di default l'ultimo registrato
+        """
+        report_date = report_date or self.latest_date()
+        rows = self.connection.execute(
+            "SELECT * FROM pairs WHERE report_date = ? AND previous_signal IS NOT signal ORDER BY score DESC, pair",
+            (report_date,))
+        return [dict(row) for row in rows]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Interrogazioni sul registro storico dei segnali")
+    parser.add_argument("--ledger", default=LEDGER_FILE, help="File del registro (SQLite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    history_parser = commands.add_parser("history", help="Storico di una coppia (es. USDJPY) o di una valuta (es. JPY)")
+    history_parser.add_argument("symbol")
+    history_parser.add_argument("--start")
+    history_parser.add_argument("--end")
+    flips_parser = commands.add_parser("flips", help="Inversioni di segnale")
+    flips_parser.add_argument("--from", dest="from_signal", choices=["BUY", "SELL", "NEUTRAL"])
+    flips_parser.add_argument("--to", dest="to_signal", choices=["BUY", "SELL", "NEUTRAL"])
+    flips_parser.add_argument("--weeks", type=int, help="Solo gli ultimi N report")
+    diff_parser = commands.add_parser("diff", help="Coppie con segnale cambiato rispetto al report precedente")
+    diff_parser.add_argument("--date", help="Data del report (default: l'ultimo)")
+    args = parser.parse_args()
+
+    with SignalLedger(args.ledger) as ledger:
+        if args.command == "history":
+            symbol = args.symbol.upper()
+            if len(symbol) == 3:
+                rows = ledger.currency_history(symbol, args.start, args.end)
+            else:
+                rows = ledger.pair_history(symbol, args.start, args.end)
+        elif args.command == "flips":
+            rows = ledger.flips(args.from_signal, args.to_signal, args.weeks)
+        else:
+            rows = ledger.diff(args.date)
+    print(json.dumps(rows, ensure_ascii=False, indent=2))
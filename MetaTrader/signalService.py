@@ -0,0 +1,249 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import datetime  # Per il calendario di pubblicazione CFTC
+import json      # Per le risposte HTTP
+import threading # Per il server HTTP in background
+import time      # Per orologio e attese
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from cotReport import load_report
+from instrumentation import NULL_INSTRUMENTATION, Instrumentation, JsonLinesSink
+from publisher import Publisher
+from signalLedger import SignalLedger
+import getData
+
+# La CFTC pubblica il report il venerdì alle 15:30 ora di New York,
+# con i dati "as of" del martedì precedente
+RELEASE_WEEKDAY = 4  # venerdì
+RELEASE_TIME = datetime.time(15, 30)
+AS_OF_LAG = datetime.timedelta(days=3)
+
+# Attese tra un tentativo e l'altro quando il nuovo report non è ancora disponibile;
+# esaurita la sequenza si continua con l'ultima finché il report non arriva
+RETRY_DELAYS = (60, 120, 300, 600, 1800, 3600)
+
+try:
+    from zoneinfo import ZoneInfo
+    RELEASE_TZ = ZoneInfo("America/New_York")
+except Exception:
+    # Senza database dei fusi orari (es. Windows senza tzdata) si usa l'ora standard
+    RELEASE_TZ = datetime.timezone(datetime.timedelta(hours=-5))
+
+
+def next_release(now):
+    """
+    Prossima pubblicazione CFTC (timestamp UTC) successiva all'istante `now`
+    """
+    local = datetime.datetime.fromtimestamp(now, RELEASE_TZ)
+    days_ahead = (RELEASE_WEEKDAY - local.weekday()) % 7
+    release = datetime.datetime.combine(local.date() + datetime.timedelta(days=days_ahead), RELEASE_TIME, RELEASE_TZ)
+    if release.timestamp() <= now:
+        release = datetime.datetime.combine(release.date() + datetime.timedelta(days=7), RELEASE_TIME, RELEASE_TZ)
+    return release.timestamp()
+
+
+def expected_report_date(now):
+    """
+    Data "as of" dell'ultimo report che dovrebbe essere già pubblicato all'istante `now`
+    """
+    last_release = datetime.datetime.fromtimestamp(next_release(now), RELEASE_TZ) - datetime.timedelta(days=7)
+    return (last_release.date() - AS_OF_LAG).isoformat()
+
+
+class SignalService:
+    """
+    Servizio che tiene in memoria l'ultimo report e i segnali calcolati.
+    Process:
+    1. Aggiornamento all'avvio e poi ad ogni pubblicazione del venerdì
+    2. Nuovi tentativi con attese crescenti (poi fisse all'ultima) finché il report atteso non è disponibile
+    3. Risposte HTTP già serializzate: una richiesta costa solo la scrittura dei byte
+    4. pair_signals.csv (e gli altri target) continuano ad essere pubblicati per l'EA
+    Orologio e attesa sono iniettabili per i test (clock, sleep).
+    I range storici (ranges_file, vedi getData.load_currency_ranges) vengono letti una volta all'avvio.
+    """
+
+    def __init__(self, fetch=None, output=getData.pair_signal_file_local, metatrader=getData.metatrader_path,
+                 clock=time.time, sleep=time.sleep, retry_delays=RETRY_DELAYS, targets=(), instrument=None,
+                 ledger=None, ranges_file=getData.RANGES_FILE):
+        self.instrument = instrument or NULL_INSTRUMENTATION
+        self.fetch = fetch or (lambda: getData.download_and_convert(quiet=True, instrument=self.instrument))
+        self.output = output
+        self.metatrader = metatrader
+        self.publisher = Publisher(getData.signal_targets(output, metatrader, targets))
+        self.ledger = SignalLedger(ledger) if ledger else None
+        self.clock = clock
+        self.sleep = sleep
+        self.retry_delays = retry_delays
+        self.ranges = getData.load_currency_ranges(ranges_file)
+
+        self.result = None
+        self.last_refresh = None
+        self.last_error = None
+        self.attempt = 0
+        self.next_refresh = clock()
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._publish_status()
+
+    # ---------- Aggiornamento ----------
+
+    def refresh(self):
+        """
+        Scarica (se cambiato) e ricalcola i segnali; restituisce True se il report è nuovo
+        """
+        report, changed = self.fetch()
+        if changed or self.result is None:
+            currencies_data, trading_opportunities = getData.score_report(report, self.instrument, self.ranges)
+            result = getData.make_result(report, changed, currencies_data, trading_opportunities)
+            self._write_signals(result)
+            self._record(result)
+            self._publish(result)
+        self.last_refresh = self.clock()
+        return changed
+
+    def _write_signals(self, result):
+        # Pubblicazione atomica; i target con contenuto invariato non vengono riscritti
+        with self.instrument.span("publish") as span:
+            status = self.publisher.publish(result["pairs"], result["report_date"])
+            span.set(rows=len(result["pairs"]),
+                     targets={path: outcome if isinstance(outcome, str) else str(outcome) for path, outcome in status.items()})
+        for path, outcome in status.items():
+            if isinstance(outcome, Exception):
+                self.last_error = f"Errore nel salvare {path}: {outcome}"
+
+    def _record(self, result):
+        # Storico append-only: le coppie cambiate finiscono in result["changes"] (endpoint /changes)
+        if self.ledger is None:
+            return
+        with self.instrument.span("ledger", path=self.ledger.path) as span:
+            try:
+                recorded = self.ledger.record(result)
+            except ValueError as e:
+                self.last_error = str(e)
+                recorded = False
+            result["changes"] = self.ledger.diff(result["report_date"])
+            span.set(recorded=recorded, changes=len(result["changes"]))
+
+    def _publish(self, result):
+        payloads = {
+            "/signals": _encode({"report_date": result["report_date"], "pairs": result["pairs"]}),
+            "/currencies": _encode({"report_date": result["report_date"], "currencies": result["currencies"]}),
+            "/changes": _encode({"report_date": result["report_date"], "changes": result.get("changes", [])}),
+            "/": _encode(result)
+        }
+        with self._lock:
+            self.result = result
+            self._payloads.update(payloads)
+
+    def _publish_status(self):
+        status = {
+            "report_date": self.result["report_date"] if self.result else None,
+            "last_refresh": self.last_refresh,
+            "next_refresh": self.next_refresh,
+            "attempt": self.attempt,
+            "last_error": self.last_error
+        }
+        with self._lock:
+            self._payloads["/health"] = _encode(status)
+
+    def tick(self):
+        """
+        Esegue l'aggiornamento se è il momento e pianifica il successivo.
+        Restituisce l'istante del prossimo aggiornamento.
+        """
+        now = self.clock()
+        if now < self.next_refresh:
+            return self.next_refresh
+
+        self.last_error = None
+        try:
+            self.refresh()
+            up_to_date = self.result["report_date"] is not None and \
+                self.result["report_date"] >= expected_report_date(now)
+        except Exception as e:
+            self.last_error = str(e)
+            up_to_date = False
+
+        if up_to_date:
+            # Report della settimana acquisito: si aspetta il prossimo venerdì
+            self.attempt = 0
+            self.next_refresh = next_release(now)
+        else:
+            # Report in ritardo: si riprova senza limite di tentativi, con l'ultima attesa come tetto
+            self.next_refresh = now + self.retry_delays[min(self.attempt, len(self.retry_delays) - 1)]
+            self.attempt += 1
+        self._publish_status()
+        return self.next_refresh
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            next_refresh = self.tick()
+            self.sleep(max(0.0, min(next_refresh - self.clock(), 60.0)))
+
+    def stop(self):
+        self._stop.set()
+
+    # ---------- HTTP ----------
+
+    def payload(self, path):
+        with self._lock:
+            return self._payloads.get(path)
+
+    def make_server(self, host="127.0.0.1", port=8765):
+        """
+        Server HTTP/JSON locale per dashboard e altri consumatori
+        Endpoint: /signals, /currencies, /changes, /health e / (risultato completo)
+        """
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = service.payload(self.path.split("?", 1)[0].rstrip("/") or "/")
+                if body is None:
+                    # 503 finché il primo report non è stato calcolato
+                    self.send_response(503 if service.result is None else 404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Access-Control-Allow-Origin", "*")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return ThreadingHTTPServer((host, port), Handler)
+
+
+def _encode(data):
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servizio dei segnali COT con aggiornamento programmato")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--input", help="Report locale da servire invece del download CFTC")
+    parser.add_argument("--output", default=getData.pair_signal_file_local, help="File CSV dei segnali per l'EA")
+    parser.add_argument("--no-metatrader", action="store_true", help="Non scrivere la copia per MetaTrader")
+    parser.add_argument("--target", action="append", default=[], help="Altro file di destinazione (.csv, .json o .bin), ripetibile")
+    parser.add_argument("--metrics", help="File JSON lines con le metriche di ogni aggiornamento")
+    parser.add_argument("--ledger", help="Registro storico dei segnali (SQLite, vedi signalLedger.py)")
+    parser.add_argument("--ranges", default=getData.RANGES_FILE, help="Range ricalibrati (extractData.py)")
+    args = parser.parse_args()
+
+    fetch = (lambda: (load_report(args.input), False)) if args.input else None
+    service = SignalService(fetch, output=args.output, metatrader=None if args.no_metatrader else getData.metatrader_path,
+                            targets=args.target, ledger=args.ledger, ranges_file=args.ranges,
+                            instrument=Instrumentation([JsonLinesSink(args.metrics)] if args.metrics else []))
+    server = service.make_server(args.host, args.port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Servizio segnali su http://{args.host}:{args.port}/signals")
+    try:
+        service.run_forever()
+    except KeyboardInterrupt:
+        service.stop()
+        server.shutdown()
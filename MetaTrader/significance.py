@@ -0,0 +1,182 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import os        # Per il numero di processi
+from concurrent.futures import ProcessPoolExecutor  # Per distribuire i ricampionamenti
+import numpy as np
+import pandas as pd
+from backtest import forward_returns, load_currency_deltas, load_prices, pair_scores, score_weeks
+from cotHistory import CotHistory
+from getData import MAJOR_PAIRS, all_pairs, interpret_pair_score
+from priceStore import ANCHORS, PriceStore
+
+# Fasce di punteggio della coppia, come interpret_pair_score: limite inferiore di ogni fascia
+BUCKET_FLOORS = np.array([-np.inf, -4, -2, 0, 1, 3, 5])
+BUCKET_LABELS = [interpret_pair_score(score) for score in (-5, -4, -2, 0, 1, 3, 5)]
+# Direzione del segnale di ogni fascia: SELL, NEUTRAL o BUY
+BUCKET_DIRECTIONS = np.array([-1, -1, -1, 0, 1, 1, 1])
+# Unità "tutte le coppie insieme"
+POOLED = "TUTTE"
+
+# Ricampionamenti per task e valori per blocco: limitano la memoria delle matrici di indici
+TASK_RESAMPLES = 2000
+BLOCK_VALUES = 2_000_000
+
+
+def score_buckets(scores):
+    """
+    Indice della fascia (0 = più ribassista) per ogni punteggio; -1 dove il punteggio manca
+    """
+    buckets = np.searchsorted(BUCKET_FLOORS, np.nan_to_num(scores, nan=0.0), side="right") - 1
+    return np.where(np.isnan(scores), -1, buckets)
+
+
+def _blocks(resamples, width):
+    # Righe per blocco in modo che resamples x width resti sotto BLOCK_VALUES
+    rows = max(1, BLOCK_VALUES // max(width, 1))
+    for start in range(0, resamples, rows):
+        yield min(rows, resamples - start)
+
+
+def resample_unit(returns, buckets, resamples, rng):
+    """
+    Ricampionamenti di una coppia (o di tutte insieme) in forma vettoriale.
+    Process:
+    1. Bootstrap: matrice di indici casuali (ricampionamenti x settimane) per ogni fascia,
+       media per riga = media ricampionata del rendimento della fascia
+    2. Permutazione: i rendimenti vengono rimescolati rispetto alle fasce (una riga per permutazione);
+       le medie per fascia si ottengono con un solo prodotto matrice per la matrice indicatrice delle fasce
+    3. Conta le permutazioni con scarto dalla media generale almeno pari a quello osservato
+    Restituisce (medie bootstrap fasce x resamples, superamenti per fascia)
+    """
+    count = len(BUCKET_FLOORS)
+    indicator = (buckets[:, None] == np.arange(count)).astype(np.float64)
+    sizes = indicator.sum(axis=0)
+    overall = returns.mean() if len(returns) else np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        observed = np.abs(returns @ indicator / sizes - overall)
+
+    boot = np.full((count, resamples), np.nan)
+    for bucket in np.flatnonzero(sizes):
+        values = returns[buckets == bucket]
+        done = 0
+        for rows in _blocks(resamples, len(values)):
+            index = rng.integers(0, len(values), size=(rows, len(values)))
+            boot[bucket, done:done + rows] = values[index].mean(axis=1)
+            done += rows
+
+    exceed = np.zeros(count, dtype=np.int64)
+    if len(returns):
+        for rows in _blocks(resamples, len(returns)):
+            shuffled = rng.permuted(np.broadcast_to(returns, (rows, len(returns))), axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                deviation = np.abs(shuffled @ indicator / sizes - overall)
+            # Piccola tolleranza: la permutazione identica deve contare come superamento
+            exceed += (deviation >= observed - 1e-12).sum(axis=0)
+    return boot, exceed
+
+
+# Dati condivisi dai processi: inviati una sola volta per processo
+_study_data = {}
+
+def _init_study(data):
+    _study_data.update(data)
+
+def _unit_data(unit):
+    returns, buckets = _study_data["returns"], _study_data["buckets"]
+    if unit == POOLED:
+        values, labels = returns.ravel(), buckets.ravel()
+    else:
+        values, labels = returns[:, unit], buckets[:, unit]
+    valid = ~np.isnan(values) & (labels >= 0)
+    return values[valid], labels[valid]
+
+def _run_study_task(task):
+    unit, resamples, seed = task
+    values, labels = _unit_data(unit)
+    return resample_unit(values, labels, resamples, np.random.default_rng(seed))
+
+
+def significance_study(scores, returns, pairs, resamples=10000, seed=0, confidence=0.95, workers=None):
+    """
+    Bootstrap e test di permutazione dei rendimenti forward condizionati alla fascia di punteggio,
+    per ogni coppia e per tutte le coppie insieme.
+    I ricampionamenti sono divisi in task da TASK_RESAMPLES eseguiti su un pool di processi;
+    ogni task ha il proprio seme (SeedSequence.spawn), quindi il risultato non dipende dal numero di processi.
+    Restituisce un DataFrame: pair, bucket, label, weeks, mean_return, ci_low, ci_high, hit_rate, p_value
+    """
+    buckets = score_buckets(scores)
+    units = list(range(len(pairs))) + [POOLED]
+    tasks = [(unit, min(TASK_RESAMPLES, resamples - start))
+             for unit in units for start in range(0, resamples, TASK_RESAMPLES)]
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+    tasks = [(unit, size, child) for (unit, size), child in zip(tasks, seeds)]
+
+    data = {"returns": returns, "buckets": buckets}
+    _init_study(data)
+    if workers == 1:
+        outputs = [_run_study_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_study,
+                                 initargs=(data,)) as executor:
+            outputs = list(executor.map(_run_study_task, tasks))
+
+    alpha = (1 - confidence) / 2
+    rows = []
+    for unit in units:
+        parts = [output for (task_unit, _, _), output in zip(tasks, outputs) if task_unit == unit]
+        boot = np.concatenate([part[0] for part in parts], axis=1)
+        exceed = sum(part[1] for part in parts)
+        values, labels = _unit_data(unit)
+        for bucket, label in enumerate(BUCKET_LABELS):
+            selected = values[labels == bucket]
+            if len(selected) == 0:
+                continue
+            # Rendimento nella direzione del segnale (BUY sopra zero, SELL sotto)
+            direction = BUCKET_DIRECTIONS[bucket]
+            rows.append({
+                "pair": POOLED if unit == POOLED else pairs[unit],
+                "bucket": bucket,
+                "label": label,
+                "weeks": len(selected),
+                "mean_return": selected.mean(),
+                "ci_low": np.quantile(boot[bucket], alpha),
+                "ci_high": np.quantile(boot[bucket], 1 - alpha),
+                "hit_rate": np.mean(direction * selected > 0) if direction else np.nan,
+                "p_value": (exceed[bucket] + 1) / (resamples + 1)
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Significatività statistica dei punteggi delle coppie (bootstrap e permutazioni)")
+    parser.add_argument("--history", default="cot_history", help="Cartella dell'archivio storico COT")
+    prices_source = parser.add_mutually_exclusive_group(required=True)
+    prices_source.add_argument("--prices", help="CSV prezzi: date + una colonna per coppia")
+    prices_source.add_argument("--price-store", help="Archivio delle barre MT5 (priceStore.py)")
+    parser.add_argument("--anchor", choices=sorted(ANCHORS), default="friday",
+                        help="Chiusura settimanale usata con --price-store")
+    parser.add_argument("--start", help="Data iniziale (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Data finale (YYYY-MM-DD)")
+    parser.add_argument("--all-pairs", action="store_true", help="Tutte le coppie major e cross, non solo MAJOR_PAIRS")
+    parser.add_argument("--resamples", type=int, default=10000, help="Ricampionamenti bootstrap e permutazioni")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Livello degli intervalli di confidenza")
+    parser.add_argument("--seed", type=int, default=0, help="Seme (risultati riproducibili)")
+    parser.add_argument("--workers", type=int, help="Processi")
+    parser.add_argument("--output", help="CSV dei risultati")
+    args = parser.parse_args()
+
+    dates, symbols, deltas = load_currency_deltas(CotHistory(args.history), start=args.start, end=args.end)
+    pairs = all_pairs(symbols) if args.all_pairs else MAJOR_PAIRS
+    if args.price_store:
+        price_dates, prices = PriceStore(args.price_store).weekly_closes(pairs, args.anchor)
+    else:
+        price_dates, prices = load_prices(args.prices, pairs)
+
+    scores = pair_scores(score_weeks(deltas, symbols), symbols, pairs)
+    returns = forward_returns(dates, price_dates, prices)
+    results = significance_study(scores, returns, pairs, args.resamples, args.seed, args.confidence, args.workers)
+
+    columns = ["pair", "label", "weeks", "mean_return", "ci_low", "ci_high", "hit_rate", "p_value"]
+    print(results[columns].to_string(index=False))
+    if args.output:
+        results.to_csv(args.output, index=False)
@@ -0,0 +1,231 @@
+# Importazione librerie necessarie
+import argparse  # Per la riga di comando
+import os        # Per il numero di processi
+from concurrent.futures import ProcessPoolExecutor  # Per valutare le strategie in parallelo
+from multiprocessing import shared_memory  # Per condividere la tabella senza copiarla
+import numpy as np
+import pandas as pd
+from cotHistory import CotHistory
+from cotReport import load_report
+from getData import all_pairs, classify_currencies_batch, currency_mapping
+
+# Campi numerici della tabella condivisa
+TABLE_FIELDS = ["long_positions", "short_positions", "long_change", "short_change", "week"]
+
+# Registro delle strategie: nome -> funzione vettoriale (ReportTable -> punteggi per riga)
+STRATEGIES = {}
+
+
+def strategy(name):
+    """
+    Decoratore per registrare una strategia di scoring.
+    La funzione riceve una ReportTable e restituisce un punteggio per ogni riga
+    (positivo = rialzista per la valuta). Le strategie definite fuori da questo
+    modulo vanno registrate in un modulo importabile anche dai processi del pool.
+    """
+    def register(function):
+        STRATEGIES[name] = function
+        return function
+    return register
+
+
+class ReportTable:
+    """
+    Tabella colonnare condivisa tra le strategie: una riga per (settimana, valuta)
+    I dati numerici stanno in un'unica matrice campi x righe
+    """
+
+    def __init__(self, data, symbols, dates):
+        self.data = data
+        self.symbols = np.asarray(symbols)
+        self.dates = np.asarray(dates, dtype="datetime64[D]")
+
+    def __getitem__(self, field):
+        return self.data[TABLE_FIELDS.index(field)]
+
+    def __len__(self):
+        return self.data.shape[1]
+
+    @property
+    def simple_delta(self):
+        return self["long_change"] - self["short_change"]
+
+    def per_week(self, values):
+        """
+        Media e deviazione standard di `values` per settimana, riportate su ogni riga
+        """
+        week = self["week"].astype(np.intp)
+        count = np.bincount(week)
+        mean = np.bincount(week, values) / np.maximum(count, 1)
+        variance = np.bincount(week, values * values) / np.maximum(count, 1) - mean * mean
+        return mean[week], np.sqrt(np.maximum(variance, 0))[week]
+
+
+def _build_table(symbols, dates, columns):
+    """
+    Impacchetta le colonne in un'unica matrice; "week" numera le date distinte in ordine
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    week = np.unique(dates, return_inverse=True)[1] if len(dates) else np.empty(0)
+    data = np.empty((len(TABLE_FIELDS), len(dates)), dtype=np.float64)
+    for i, field in enumerate(TABLE_FIELDS[:-1]):
+        data[i] = columns[field]
+    data[-1] = week
+    return ReportTable(data, symbols, dates)
+
+
+def table_from_reports(reports, mapping=None):
+    """
+    Costruisce la tabella dalle valute mappate di uno o più report settimanali
+    """
+    mapping = mapping or currency_mapping
+    rows = []
+    for report in reports:
+        for name, symbol in mapping.items():
+            data = report.get(name)
+            if data:
+                rows.append((symbol, report.report_date, data))
+    columns = {field: [data[field] for _, _, data in rows] for field in TABLE_FIELDS[:-1]}
+    return _build_table([row[0] for row in rows], [row[1] for row in rows], columns)
+
+
+def table_from_history(history, mapping=None, start=None, end=None):
+    """
+    Costruisce la tabella dall'archivio storico (cotHistory.CotHistory) in un solo passaggio
+    """
+    mapping = mapping or currency_mapping
+    data = history.select(list(mapping), start, end, TABLE_FIELDS[:-1])
+    order = np.lexsort((data["market"], data["date"]))
+    # Come nel report, per nomi duplicati nella stessa settimana vale la prima riga
+    keys = np.stack([data["date"][order].astype(np.int64), data["market"][order].astype(np.int64)])
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = np.any(keys[:, 1:] != keys[:, :-1], axis=0)
+    order = order[first]
+    symbols = [mapping[name] for name in data["name"][order]]
+    return _build_table(symbols, data["date"][order], {field: data[field][order] for field in TABLE_FIELDS[:-1]})
+
+
+# ---------- Strategie incluse ----------
+
+@strategy("conservative")
+def conservative(table):
+    """Regola attuale di getData: la più conservativa tra storica e moderna"""
+    return classify_currencies_batch(table.simple_delta, table.symbols)[2].astype(np.float64)
+
+@strategy("historical")
+def historical(table):
+    """Solo la classificazione sul delta semplice (range storici)"""
+    return classify_currencies_batch(table.simple_delta, table.symbols)[0].astype(np.float64)
+
+@strategy("notional_weighted")
+def notional_weighted(table):
+    """Solo la classificazione sul delta ponderato per il valore nominale"""
+    return classify_currencies_batch(table.simple_delta, table.symbols)[1].astype(np.float64)
+
+@strategy("net_position")
+def net_position(table):
+    """Livello della posizione netta invece delle variazioni: (long - short) / (long + short), scala -3..+3"""
+    total = table["long_positions"] + table["short_positions"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        net = np.where(total > 0, (table["long_positions"] - table["short_positions"]) / total, 0.0)
+    return net * 3
+
+@strategy("delta_share")
+def delta_share(table):
+    """Delta semplice in percentuale delle posizioni totali, 2 punti percentuali per livello, scala -3..+3"""
+    total = table["long_positions"] + table["short_positions"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        share = np.where(total > 0, table.simple_delta / total * 100, 0.0)
+    return np.clip(share / 2, -3, 3)
+
+@strategy("zscore")
+def zscore(table):
+    """Z-score del delta_share tra le valute della stessa settimana, limitato a -3..+3"""
+    values = delta_share(table)
+    mean, std = table.per_week(values)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(std > 0, (values - mean) / std, 0.0)
+    return np.clip(z, -3, 3)
+
+
+# ---------- Esecuzione in parallelo ----------
+
+# Tabella condivisa vista dai processi del pool (creata una volta per processo)
+_worker = {}
+
+def _attach(name, shape, symbols, dates):
+    block = shared_memory.SharedMemory(name=name)
+    _worker["block"] = block
+    _worker["table"] = ReportTable(np.ndarray(shape, dtype=np.float64, buffer=block.buf), symbols, dates)
+
+def _run_strategy(name):
+    return name, np.asarray(STRATEGIES[name](_worker["table"]), dtype=np.float64)
+
+
+def evaluate_strategies(table, names=None, workers=None):
+    """
+    Valuta le strategie richieste (di default tutte) su un pool di processi.
+    Process:
+    1. La tabella viene copiata una sola volta in memoria condivisa
+    2. Ogni processo vi si collega all'avvio: i task passano solo il nome della strategia
+    3. I punteggi vengono raccolti in un'unica tabella di confronto
+    Restituisce un DataFrame con date, valuta e una colonna per strategia
+    """
+    names = list(names or STRATEGIES)
+    block = shared_memory.SharedMemory(create=True, size=max(table.data.nbytes, 1))
+    try:
+        shared = np.ndarray(table.data.shape, dtype=np.float64, buffer=block.buf)
+        shared[:] = table.data
+        initargs = (block.name, table.data.shape, table.symbols, table.dates)
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_attach, initargs=initargs) as executor:
+            results = dict(executor.map(_run_strategy, names))
+        del shared
+    finally:
+        block.close()
+        block.unlink()
+
+    comparison = pd.DataFrame({"date": table.dates, "symbol": table.symbols})
+    for name in names:
+        comparison[name] = results[name]
+    return comparison
+
+
+def compare_pairs(comparison, pairs=None):
+    """
+    Punteggio di ogni coppia (base - quote) per ogni strategia e settimana
+    """
+    strategies = [c for c in comparison.columns if c not in ("date", "symbol")]
+    pairs = pairs or all_pairs(comparison["symbol"].unique())
+    rows = []
+    for date, week in comparison.groupby("date"):
+        scores = week.set_index("symbol")[strategies]
+        for pair in pairs:
+            base, quote = pair[:3], pair[3:]
+            if base in scores.index and quote in scores.index:
+                rows.append({"date": date, "pair": pair, **(scores.loc[base] - scores.loc[quote]).to_dict()})
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confronto parallelo di strategie di scoring COT")
+    parser.add_argument("reports", nargs="*", help="Report COT (TXT/CSV/.npz), uno per settimana")
+    parser.add_argument("--history", help="Archivio storico (cotHistory.py) al posto dei report")
+    parser.add_argument("--start", help="Data iniziale (YYYY-MM-DD) per --history")
+    parser.add_argument("--end", help="Data finale (YYYY-MM-DD) per --history")
+    parser.add_argument("--strategies", nargs="*", help="Strategie da valutare (default: tutte)")
+    parser.add_argument("--workers", type=int, help="Numero di processi")
+    parser.add_argument("--pairs", action="store_true", help="Mostra il confronto per coppia")
+    parser.add_argument("--output", help="CSV della tabella di confronto")
+    args = parser.parse_args()
+
+    if args.history:
+        table = table_from_history(CotHistory(args.history), start=args.start, end=args.end)
+    else:
+        table = table_from_reports([load_report(path) for path in args.reports])
+    comparison = evaluate_strategies(table, args.strategies, args.workers)
+    if args.pairs:
+        comparison = compare_pairs(comparison)
+    print(comparison.to_string(index=False))
+    if args.output:
+        comparison.to_csv(args.output, index=False)
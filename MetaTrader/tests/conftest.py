@@ -0,0 +1,18 @@
+# Configurazione comune dei test: gli script di MetaTrader/ si importano per nome
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+# Report CFTC reale (legacy futures) incluso nel repository
+REPORT_PATH = os.path.join(SCRIPTS_DIR, "COT_Report.csv")
+
+
+@pytest.fixture(scope="session")
+def report_bytes():
+    with open(REPORT_PATH, "rb") as file:
+        return file.read()
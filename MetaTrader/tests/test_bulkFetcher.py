@@ -0,0 +1,141 @@
+import os
+import threading
+import zipfile
+
+import pytest
+
+from archiveStandIn import make_server
+from bulkFetcher import BulkFetcher, file_sha256
+from cotHistory import CotHistory
+
+YEARS = (2021, 2022, 2023)
+
+
+@pytest.fixture
+def archives(tmp_path, report_bytes):
+    """Un archivio annuale per anno, con le date del report spostate in quell'anno"""
+    folder = tmp_path / "mirror"
+    folder.mkdir()
+    text = report_bytes.decode("utf-8", errors="replace")
+    for year in YEARS:
+        with zipfile.ZipFile(folder / f"deacot{year}.zip", "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("annual.txt", text.replace("2025", str(year)))
+    return folder
+
+
+@pytest.fixture
+def serve(archives):
+    servers = []
+
+    def start(**faults):
+        server = make_server(str(archives), port=0, **faults)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _fetcher(tmp_path, **options):
+    return BulkFetcher(str(tmp_path / "downloads"), workers=3, retries=3, backoff=0, sleep=lambda seconds: None, **options)
+
+
+def _urls(base):
+    return [f"{base}/deacot{year}.zip" for year in YEARS]
+
+
+def _assert_identical(results, archives):
+    for url, result in results.items():
+        assert "error" not in result, result
+        name = url.rsplit("/", 1)[-1]
+        assert file_sha256(result["path"]) == file_sha256(archives / name)
+
+
+def test_retries_transient_503(tmp_path, serve, archives):
+    server, base = serve(fail_first=2)
+    results = _fetcher(tmp_path).fetch_all(_urls(base))
+
+    _assert_identical(results, archives)
+    assert all(result["status"] == "downloaded" for result in results.values())
+    assert all(count == 3 for count in server.request_counts.values())
+
+
+def test_resumes_truncated_download_with_range(tmp_path, serve, archives):
+    server, base = serve(truncate_first=1)
+    results = _fetcher(tmp_path).fetch_all(_urls(base))
+
+    _assert_identical(results, archives)
+    for year in YEARS:
+        name = f"deacot{year}.zip"
+        ranges = [header for logged, header in server.request_log if logged == name]
+        # Prima richiesta completa, poi ripresa da metà file (206)
+        assert ranges[0] is None
+        assert ranges[1] == f"bytes={os.path.getsize(archives / name) // 2}-"
+    assert not list((tmp_path / "downloads").glob("*.part"))
+
+
+@pytest.mark.parametrize("manifest", [True, False], ids=["sha256", "zip-crc"])
+def test_corrupt_download_fails_checksum_and_is_retried(tmp_path, serve, archives, manifest):
+    server, base = serve(corrupt_first=1)
+    checksums = {f"deacot{year}.zip": file_sha256(archives / f"deacot{year}.zip") for year in YEARS} if manifest else None
+    results = _fetcher(tmp_path, checksums=checksums).fetch_all(_urls(base))
+
+    _assert_identical(results, archives)
+    assert all(count == 2 for count in server.request_counts.values())
+
+
+def test_missing_archive_is_reported_without_retries(tmp_path, serve):
+    server, base = serve()
+    url = f"{base}/deacot1999.zip"
+    results = _fetcher(tmp_path).fetch_all([url] + _urls(base))
+
+    assert "404" in results[url]["error"]
+    assert all("error" not in results[other] for other in _urls(base))
+    assert not os.path.exists(tmp_path / "downloads" / "deacot1999.zip")
+
+
+def test_ingests_archives_into_history(tmp_path, serve, report_bytes):
+    _, base = serve(fail_first=1, truncate_first=1)
+    history = CotHistory(str(tmp_path / "store"))
+    results = _fetcher(tmp_path).fetch_all(_urls(base), history)
+
+    rows = {result["rows"] for result in results.values()}
+    assert len(rows) == 1 and rows.pop() > 0
+    assert history.years() == [str(year) for year in YEARS]
+    assert [str(date)[:4] for date in history.dates()] == [str(year) for year in YEARS]
+
+
+def test_completed_archives_are_not_downloaded_again(tmp_path, serve):
+    server, base = serve()
+    fetcher = _fetcher(tmp_path)
+    fetcher.fetch_all(_urls(base))
+    results = fetcher.fetch_all(_urls(base))
+
+    assert all(result["status"] == "cached" for result in results.values())
+    assert all(count == 1 for count in server.request_counts.values())
+
+
+class FragileHistory(CotHistory):
+    """CotHistory che non riesce a leggere il contenuto dell'archivio 2022"""
+
+    def ingest(self, source, schema="legacy", group=None):
+        if "2022" in os.path.basename(source):
+            raise KeyError("colonna mancante")
+        return super().ingest(source, schema, group)
+
+
+def test_ingest_errors_are_recorded_per_archive(tmp_path, serve):
+    _, base = serve()
+    history = FragileHistory(str(tmp_path / "store"))
+    reported = []
+    results = _fetcher(tmp_path).fetch_all(_urls(base), history, on_result=lambda url, result: reported.append(url))
+
+    broken = f"{base}/deacot2022.zip"
+    assert "importazione non riuscita: KeyError" in results[broken]["error"]
+    assert results[broken]["status"] == "downloaded" and os.path.exists(results[broken]["path"])
+    assert all("error" not in results[url] and results[url]["rows"] > 0 for url in _urls(base) if url != broken)
+    assert sorted(reported) == sorted(_urls(base))
+    assert history.years() == ["2021", "2023"]
@@ -0,0 +1,99 @@
+import io
+import zipfile
+
+import numpy as np
+import pytest
+
+from conftest import REPORT_PATH
+from cotHistory import COLUMN_DTYPES, CotHistory
+from cotReport import load_report
+
+WHEAT = "WHEAT-SRW - CHICAGO BOARD OF TRADE"
+FIELDS = [field for field in COLUMN_DTYPES if field not in ("date", "market")]
+
+
+def _week(report_bytes, date):
+    # Stesso report con un'altra data "as of" (e posizioni diverse, per distinguere le settimane)
+    old = b",250610,2025-06-10,"
+    new = f",{date[2:4]}{date[5:7]}{date[8:]},{date},".encode()
+    return report_bytes.replace(old, new).replace(b",  441963,  108768,", b",  441963,  100000,")
+
+
+def _assert_same_report(rebuilt, expected):
+    assert rebuilt.names == expected.names
+    np.testing.assert_array_equal(rebuilt.dates, expected.dates)
+    for field in FIELDS:
+        np.testing.assert_array_equal(rebuilt.columns[field], expected.columns[field], err_msg=field)
+
+
+def test_round_trip_rebuilds_the_bundled_report(tmp_path):
+    history = CotHistory(str(tmp_path))
+    expected = load_report(REPORT_PATH)
+    assert history.ingest(REPORT_PATH) == len(expected.names) == 324
+
+    _assert_same_report(history.report("2025-06-10"), expected)
+    # Riaperto dal disco: stessi mercati e stesse colonne
+    _assert_same_report(CotHistory(str(tmp_path)).report("2025-06-10"), expected)
+    assert len(history.report("2025-06-03").names) == 0
+
+
+def test_reingesting_the_same_date_adds_nothing(tmp_path, report_bytes):
+    history = CotHistory(str(tmp_path))
+    history.ingest(REPORT_PATH)
+    assert history.ingest(REPORT_PATH) == 0
+    assert history.ingest(io.BytesIO(report_bytes)) == 0
+    assert CotHistory(str(tmp_path)).ingest(REPORT_PATH) == 0
+
+    assert history.years() == ["2025"]
+    assert history._load_meta("2025") == {"rows": 324, "dates": ["2025-06-10"]}
+    assert len(history.markets) == 324
+
+
+@pytest.mark.parametrize("source", ["zip", "path", "bytes", "text"])
+def test_ingest_accepts_zip_paths_and_file_likes(tmp_path, report_bytes, source):
+    weeks = [_week(report_bytes, "2024-06-11"), report_bytes]
+    history = CotHistory(str(tmp_path / "history"))
+    if source == "zip":
+        archive = tmp_path / "annual.zip"
+        with zipfile.ZipFile(archive, "w") as file:
+            for number, week in enumerate(weeks):
+                file.writestr(f"week{number}.txt", week)
+        added = history.ingest(str(archive))
+    else:
+        added = 0
+        for number, week in enumerate(weeks):
+            if source == "path":
+                path = tmp_path / f"week{number}.txt"
+                path.write_bytes(week)
+                added += history.ingest(str(path))
+            elif source == "bytes":
+                added += history.ingest(io.BytesIO(week))
+            else:
+                added += history.ingest(io.StringIO(week.decode("utf-8")))
+
+    assert added == 648
+    assert history.years() == ["2024", "2025"]
+    assert history.dates().astype(str).tolist() == ["2024-06-11", "2025-06-10"]
+    _assert_same_report(history.report("2025-06-10"), load_report(REPORT_PATH))
+
+
+def test_select_and_series_read_only_the_requested_rows(tmp_path, report_bytes):
+    history = CotHistory(str(tmp_path))
+    history.ingest(io.BytesIO(report_bytes))
+    history.ingest(io.BytesIO(_week(report_bytes, "2024-06-11")))
+    history.ingest(io.BytesIO(_week(report_bytes, "2024-06-18")))
+
+    series = history.series(WHEAT, fields=["long_positions", "short_change"])
+    assert series["date"].astype(str).tolist() == ["2024-06-11", "2024-06-18", "2025-06-10"]
+    assert series["long_positions"].tolist() == [100000, 100000, 108768]
+    assert series["short_change"].tolist() == [-6704] * 3
+    assert set(series["name"]) == {WHEAT}
+    assert set(series) == {"date", "market", "name", "long_positions", "short_change"}
+
+    selected = history.select([WHEAT, "MERCATO INESISTENTE"], start="2024-06-12", end="2025-12-31")
+    assert selected["date"].astype(str).tolist() == ["2024-06-18", "2025-06-10"]
+    assert set(selected) == set(COLUMN_DTYPES) | {"name"}
+
+    week = history.select(start="2024-06-18", end="2024-06-18")
+    assert len(week["date"]) == 324 and set(week["date"].astype(str)) == {"2024-06-18"}
+    assert len(history.select(start="2026-01-01")["date"]) == 0
@@ -0,0 +1,176 @@
+import csv
+import io
+import os
+
+import numpy as np
+import pytest
+
+from conftest import REPORT_PATH
+from cotReport import REPORT_SCHEMAS, CotReport, parse_report
+
+# Intestazione come negli archivi annuali CFTC (la colonna della data non è una data)
+HEADER = b'"Market and Exchange Names","As of Date in Form YYMMDD","As of Date in Form YYYY-MM-DD",' \
+         b'"CFTC Contract Market Code","CFTC Market Code in Initials","CFTC Region Code","CFTC Commodity Code",' \
+         + b",".join(b'"Column %d"' % column for column in range(7, 60)) + b"\n"
+
+# Piccoli estratti con l'intestazione degli archivi annuali CFTC, uno per schema
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Colonna CFTC attesa per ogni campo: scritta a mano, così un indice sbagliato in REPORT_SCHEMAS non passa
+SCHEMA_HEADERS = {
+    "disaggregated": {
+        "open_interest": "Open_Interest_All",
+        "prod_merc_long": "Prod_Merc_Positions_Long_All", "prod_merc_short": "Prod_Merc_Positions_Short_All",
+        "swap_long": "Swap_Positions_Long_All", "swap_short": "Swap__Positions_Short_All",
+        "swap_spread": "Swap__Positions_Spread_All",
+        "m_money_long": "M_Money_Positions_Long_All", "m_money_short": "M_Money_Positions_Short_All",
+        "m_money_spread": "M_Money_Positions_Spread_All",
+        "other_rept_long": "Other_Rept_Positions_Long_All", "other_rept_short": "Other_Rept_Positions_Short_All",
+        "other_rept_spread": "Other_Rept_Positions_Spread_All",
+        "nonrept_long": "NonRept_Positions_Long_All", "nonrept_short": "NonRept_Positions_Short_All",
+        "open_interest_change": "Change_in_Open_Interest_All",
+        "prod_merc_long_change": "Change_in_Prod_Merc_Long_All", "prod_merc_short_change": "Change_in_Prod_Merc_Short_All",
+        "swap_long_change": "Change_in_Swap_Long_All", "swap_short_change": "Change_in_Swap_Short_All",
+        "swap_spread_change": "Change_in_Swap_Spread_All",
+        "m_money_long_change": "Change_in_M_Money_Long_All", "m_money_short_change": "Change_in_M_Money_Short_All",
+        "m_money_spread_change": "Change_in_M_Money_Spread_All",
+        "other_rept_long_change": "Change_in_Other_Rept_Long_All",
+        "other_rept_short_change": "Change_in_Other_Rept_Short_All",
+        "other_rept_spread_change": "Change_in_Other_Rept_Spread_All",
+        "nonrept_long_change": "Change_in_NonRept_Long_All", "nonrept_short_change": "Change_in_NonRept_Short_All"
+    },
+    "tff": {
+        "open_interest": "Open_Interest_All",
+        "dealer_long": "Dealer_Positions_Long_All", "dealer_short": "Dealer_Positions_Short_All",
+        "dealer_spread": "Dealer_Positions_Spread_All",
+        "asset_mgr_long": "Asset_Mgr_Positions_Long_All", "asset_mgr_short": "Asset_Mgr_Positions_Short_All",
+        "asset_mgr_spread": "Asset_Mgr_Positions_Spread_All",
+        "lev_money_long": "Lev_Money_Positions_Long_All", "lev_money_short": "Lev_Money_Positions_Short_All",
+        "lev_money_spread": "Lev_Money_Positions_Spread_All",
+        "other_rept_long": "Other_Rept_Positions_Long_All", "other_rept_short": "Other_Rept_Positions_Short_All",
+        "other_rept_spread": "Other_Rept_Positions_Spread_All",
+        "nonrept_long": "NonRept_Positions_Long_All", "nonrept_short": "NonRept_Positions_Short_All",
+        "open_interest_change": "Change_in_Open_Interest_All",
+        "dealer_long_change": "Change_in_Dealer_Long_All", "dealer_short_change": "Change_in_Dealer_Short_All",
+        "dealer_spread_change": "Change_in_Dealer_Spread_All",
+        "asset_mgr_long_change": "Change_in_Asset_Mgr_Long_All", "asset_mgr_short_change": "Change_in_Asset_Mgr_Short_All",
+        "asset_mgr_spread_change": "Change_in_Asset_Mgr_Spread_All",
+        "lev_money_long_change": "Change_in_Lev_Money_Long_All", "lev_money_short_change": "Change_in_Lev_Money_Short_All",
+        "lev_money_spread_change": "Change_in_Lev_Money_Spread_All",
+        "other_rept_long_change": "Change_in_Other_Rept_Long_All",
+        "other_rept_short_change": "Change_in_Other_Rept_Short_All",
+        "other_rept_spread_change": "Change_in_Other_Rept_Spread_All",
+        "nonrept_long_change": "Change_in_NonRept_Long_All", "nonrept_short_change": "Change_in_NonRept_Short_All"
+    }
+}
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return parse_report(REPORT_PATH)
+
+
+@pytest.fixture(scope="module")
+def accented_bytes(report_bytes):
+    # Nomi con caratteri UTF-8 di 2 e 3 byte, così chunk_size=7 spezza anche le sequenze multibyte
+    return report_bytes.replace(b"WHEAT-SRW", "BLÉ-SRW €".encode("utf-8"))
+
+
+def assert_same_report(report, expected):
+    assert report.names == expected.names
+    assert report.report_date == expected.report_date
+    assert (report.dates == expected.dates).all()
+    assert report.columns.keys() == expected.columns.keys()
+    for field, column in expected.columns.items():
+        assert report[field].dtype == np.int64
+        assert (report[field] == column).all()
+
+
+def test_parses_the_bundled_report(reference):
+    assert len(reference) == 324
+    assert reference.report_date == "2025-06-10"
+    market = reference.get("WHEAT-SRW - CHICAGO BOARD OF TRADE")
+    assert (market["long_positions"], market["short_positions"]) == (108768, 202631)
+    assert (market["long_change"], market["short_change"]) == (-3493, -6704)
+    assert reference.get("MISSING MARKET") is None
+
+
+@pytest.mark.parametrize("source", [
+    lambda data: io.BytesIO(data),
+    lambda data: io.StringIO(data.decode("utf-8")),
+    lambda data: [data[start:start + 1000] for start in range(0, len(data), 1000)],
+], ids=["bytes", "text", "chunks"])
+def test_file_like_sources_match_the_path(source, report_bytes, reference):
+    assert_same_report(parse_report(source(report_bytes)), reference)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 4096])
+@pytest.mark.parametrize("binary", [True, False], ids=["bytes", "text"])
+def test_chunk_boundaries_split_lines_and_utf8_sequences(accented_bytes, chunk_size, binary):
+    expected = parse_report(io.BytesIO(accented_bytes))
+    source = io.BytesIO(accented_bytes) if binary else io.StringIO(accented_bytes.decode("utf-8"))
+    report = parse_report(source, chunk_size=chunk_size)
+
+    assert_same_report(report, expected)
+    assert report.names[0] == "BLÉ-SRW € - CHICAGO BOARD OF TRADE"
+
+
+def test_header_and_blank_rows_are_skipped(report_bytes, reference):
+    lines = report_bytes.split(b"\n")
+    data = HEADER + b"\n\n" + b"\r\n".join(lines[:100]) + b"\r\n\r\n" + HEADER + b"\n".join(lines[100:]) + b"\n\n"
+    assert_same_report(parse_report(io.BytesIO(data), chunk_size=7), reference)
+
+
+def test_last_line_without_newline(report_bytes, reference):
+    assert_same_report(parse_report(io.BytesIO(report_bytes.rstrip(b"\n")), chunk_size=7), reference)
+
+
+def test_extra_fields_and_group(report_bytes):
+    report = parse_report(io.BytesIO(report_bytes), group="comm", fields=["open_interest"])
+    market = report.get("WHEAT-SRW - CHICAGO BOARD OF TRADE")
+    assert (market["long_positions"], market["short_positions"], market["open_interest"]) == (168704, 75131, 441963)
+    with pytest.raises(ValueError):
+        parse_report(io.BytesIO(report_bytes), group="m_money")
+
+
+def test_save_load_round_trip(tmp_path, reference):
+    path = str(tmp_path / "report.npz")
+    reference.save(path)
+
+    assert_same_report(CotReport.load(path), reference)
+    assert not (tmp_path / "report.npz.tmp").exists()
+
+
+def test_empty_source():
+    report = parse_report(io.BytesIO(b""))
+    assert len(report) == 0 and report.report_date is None
+
+
+def _fixture_rows(schema):
+    with open(os.path.join(FIXTURES_DIR, f"cot_{schema}.csv"), newline="") as file:
+        header, *rows = list(csv.reader(file))
+    return [dict(zip(header, row)) for row in rows]
+
+
+@pytest.mark.parametrize("schema", sorted(SCHEMA_HEADERS))
+def test_schema_columns_match_the_cftc_headers(schema):
+    assert set(REPORT_SCHEMAS[schema]["fields"]) == set(SCHEMA_HEADERS[schema])
+    rows = _fixture_rows(schema)
+    report = parse_report(os.path.join(FIXTURES_DIR, f"cot_{schema}.csv"), schema, fields="all")
+
+    # L'intestazione viene saltata, le righe restano nell'ordine del file
+    assert report.names == [row["Market_and_Exchange_Names"] for row in rows]
+    assert report.dates.astype(str).tolist() == [row["Report_Date_as_YYYY-MM-DD"] for row in rows]
+    for field, header in SCHEMA_HEADERS[schema].items():
+        assert report[field].tolist() == [int(row[header]) for row in rows], field
+
+
+@pytest.mark.parametrize("schema", sorted(SCHEMA_HEADERS))
+def test_every_group_reads_its_own_long_and_short(schema):
+    rows = _fixture_rows(schema)
+    headers = SCHEMA_HEADERS[schema]
+    for group in REPORT_SCHEMAS[schema]["groups"]:
+        report = parse_report(os.path.join(FIXTURES_DIR, f"cot_{schema}.csv"), schema, group)
+        for field, suffix in (("long_positions", "long"), ("short_positions", "short"),
+                              ("long_change", "long_change"), ("short_change", "short_change")):
+            assert report[field].tolist() == [int(row[headers[f"{group}_{suffix}"]]) for row in rows], (group, field)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+
+from eaIngest import EAIngestServer, EAStore
+from eaIngestBench import build_request, synthetic_payload
+
+
+def _run(scenario, tmp_path, **options):
+    async def main():
+        store = EAStore(str(tmp_path / "ea_records.jsonl"), fsync=False)
+        ingest = EAIngestServer(store, **options)
+        server = await ingest.start("127.0.0.1", 0)
+        try:
+            return await scenario(ingest, server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+            store.close()
+    return asyncio.run(asyncio.wait_for(main(), 10))
+
+
+async def _response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+    return int(head.split(b" ")[1]), json.loads(await reader.readexactly(length))
+
+
+def test_accepts_keep_alive_posts(tmp_path):
+    async def scenario(ingest, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        statuses = []
+        for ea_id in range(3):
+            writer.write(build_request("127.0.0.1", port, synthetic_payload(ea_id)))
+            statuses.append((await _response(reader))[0])
+        writer.close()
+        return statuses
+
+    assert _run(scenario, tmp_path) == [200, 200, 200]
+    assert len((tmp_path / "ea_records.jsonl").read_bytes().splitlines()) == 3
+
+
+def test_idle_connection_is_closed_after_the_read_timeout(tmp_path):
+    async def scenario(ingest, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /post HTTP/1.1\r\n")  # header mai completati
+        closed = await reader.read()
+        writer.close()
+        return closed, ingest
+
+    closed, ingest = _run(scenario, tmp_path, read_timeout=0.1)
+    assert closed == b""
+    assert ingest.stats["timeouts"] == 1 and ingest.connections == 0
+
+
+def test_slow_body_gets_408(tmp_path):
+    async def scenario(ingest, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(build_request("127.0.0.1", port, synthetic_payload(1))[:-10])
+        status = (await _response(reader))[0]
+        writer.close()
+        return status
+
+    assert _run(scenario, tmp_path, read_timeout=0.1) == 408
+
+
+def test_connections_over_the_cap_are_refused(tmp_path):
+    async def scenario(ingest, port):
+        held = [await asyncio.open_connection("127.0.0.1", port) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        refused = await _response(reader)
+        writer.close()
+        # Le connessioni già aperte continuano a funzionare
+        held_reader, held_writer = held[0]
+        held_writer.write(build_request("127.0.0.1", port, synthetic_payload(2)))
+        accepted = await _response(held_reader)
+        for _, other in held:
+            other.close()
+        return refused, accepted, ingest
+
+    refused, accepted, ingest = _run(scenario, tmp_path, max_connections=2)
+    assert refused[0] == 503 and accepted[0] == 200
+    assert ingest.stats["refused"] == 1
+
+
+class FlakyStore:
+    """Store che fallisce i primi gruppi con errori diversi da OSError"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.lines = []
+
+    def append_batch(self, lines):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.lines.extend(lines)
+
+
+def test_store_errors_fail_the_batch_and_keep_the_writer_running():
+    store = FlakyStore([ValueError("I/O operation on closed file"), TypeError("bad batch")])
+
+    async def main():
+        ingest = EAIngestServer(store, batch_delay=0)
+        server = await ingest.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        responses = []
+        for ea_id in range(3):
+            writer.write(build_request("127.0.0.1", port, synthetic_payload(ea_id)))
+            responses.append(await _response(reader))
+        writer.close()
+        alive = not ingest._writer_task.done()
+        server.close()
+        await server.wait_closed()
+        return responses, ingest, alive
+
+    responses, ingest, alive = asyncio.run(asyncio.wait_for(main(), 10))
+    assert [status for status, _ in responses] == [500, 500, 200]
+    assert "closed file" in responses[0][1]["error"]
+    assert ingest.stats["failed"] == 2 and ingest.stats["accepted"] == 1
+    assert len(store.lines) == 1 and alive
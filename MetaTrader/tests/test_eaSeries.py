@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pytest
+
+from eaSeries import BUCKET_FACTOR, EASeriesStore, LEVEL_DTYPES
+
+
+def _series(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.arange(rows, dtype=np.int64) * 60, np.cumsum(rng.normal(0, 1, rows))
+
+
+def _level(store, name, level, rows):
+    return {column: np.array(store._read(name, f"level{level}_{column}", dtype, rows))
+            for column, dtype in LEVEL_DTYPES.items()}
+
+
+def _expected(times, values, size):
+    # Ricalcolo completo sui punti grezzi: bucket consecutivi di `size` punti
+    starts = np.arange(0, len(times), size)
+    return {"time": times[starts],
+            "min": np.array([values[i:i + size].min() for i in starts]),
+            "max": np.array([values[i:i + size].max() for i in starts]),
+            "last": np.array([values[min(i + size, len(values)) - 1] for i in starts])}
+
+
+@pytest.mark.parametrize("batches", [
+    [5000],
+    [1, 15, 16, 17, 240, 1, 4710],
+    [255, 1, 256, 3000, 1488],
+    [4096, 904],
+])
+def test_levels_match_a_full_recompute_after_each_batch(tmp_path, batches):
+    store = EASeriesStore(str(tmp_path))
+    times, values = _series(sum(batches))
+    end = 0
+    for batch in batches:
+        assert store.append("Quantum Trader", times[end:end + batch], values[end:end + batch]) == batch
+        end += batch
+
+        meta = store._load_meta("Quantum Trader")
+        assert meta["rows"] == end
+        for level, count in enumerate(meta["levels"], start=1):
+            expected = _expected(times[:end], values[:end], BUCKET_FACTOR ** level)
+            assert count == len(expected["time"])
+            stored = _level(store, "Quantum Trader", level, count)
+            for column in LEVEL_DTYPES:
+                np.testing.assert_array_equal(stored[column], expected[column], err_msg=f"livello {level} {column}")
+        # L'ultimo livello riassume tutta la serie in un solo bucket
+        assert meta["levels"][-1] == 1
+
+
+def test_query_picks_the_finest_level_within_max_points(tmp_path):
+    store = EASeriesStore(str(tmp_path))
+    times, values = _series(5000)
+    store.append("ea", times, values)
+
+    raw = store.query("ea", max_points=5000)
+    assert raw["level"] == 0
+    np.testing.assert_array_equal(raw["value"], values)
+
+    # 5000 punti: livello 1 -> 2 * 5000 / 16 = 625 punti, livello 2 -> 2 * 5000 / 256 ≈ 39
+    assert store.query("ea", max_points=1000)["level"] == 1
+    assert store.query("ea", max_points=100)["level"] == 2
+    assert store.query("ea", max_points=1)["level"] == len(store._load_meta("ea")["levels"])
+
+    # Intervallo parziale (3000 punti, 375 al livello 1): solo i bucket che lo coprono
+    start, end = times[1000], times[3999]
+    result = store.query("ea", start=start, end=end, max_points=300)
+    assert result["level"] == 2
+    expected = _expected(times, values, 256)
+    np.testing.assert_array_equal(result["time"], expected["time"][1000 // 256:3999 // 256 + 1])
+    np.testing.assert_array_equal(result["max"], expected["max"][1000 // 256:3999 // 256 + 1])
+    assert store.query("ea", start=start, end=times[1099], max_points=500)["level"] == 0
+
+
+def test_append_rejects_out_of_order_points(tmp_path):
+    store = EASeriesStore(str(tmp_path))
+    store.append("ea", [10, 20], [1.0, 2.0])
+    with pytest.raises(ValueError):
+        store.append("ea", [15], [1.5])
+    with pytest.raises(ValueError):
+        store.append("ea", [30, 25], [1.0, 2.0])
+    assert store._load_meta("ea")["rows"] == 2
+
+
+def test_import_json_continues_the_point_index(tmp_path):
+    store = EASeriesStore(str(tmp_path / "store"))
+    path = tmp_path / "Quantum Trader.json"
+    path.write_text(json.dumps({"performance": {"data": [1.0, 2.0, 3.0]}}))
+    assert store.import_json("Quantum Trader", str(path)) == 3
+    assert store.import_json("Quantum Trader", str(path)) == 3
+
+    result = store.query("Quantum Trader")
+    assert result["time"].tolist() == list(range(6))
+    assert store.names() == ["Quantum Trader"]
@@ -0,0 +1,62 @@
+import io
+
+import numpy as np
+import pytest
+
+from conftest import REPORT_PATH
+from getData import (CURRENCY_RANGES, CURRENCY_RANGES_PERCENT, SCORE_LABELS, classify_batch, classify_delta_tot,
+                     classify_delta_tot_percent, compile_ranges, run)
+from instrumentation import Instrumentation, MemorySink
+
+
+@pytest.mark.parametrize("source", [
+    lambda data: REPORT_PATH,
+    lambda data: io.BytesIO(data),
+    lambda data: io.StringIO(data.decode("utf-8")),
+], ids=["path", "bytes", "text"])
+def test_run_accepts_paths_and_file_likes(tmp_path, report_bytes, source):
+    sink = MemorySink()
+    output = tmp_path / "pair_signals.csv"
+    result = run(source(report_bytes), output=str(output), metatrader=None, ranges_file=None, quiet=True,
+                 instrument=Instrumentation([sink]))
+
+    assert result["report_date"] == "2025-06-10"
+    assert len(result["pairs"]) == 28
+    assert output.read_text().startswith("Pair,Signal,Score")
+    [parse] = sink.find("parse")
+    assert parse["status"] == "ok"
+    assert parse["rows"] == 324
+    assert ("bytes" in parse) == isinstance(source(b""), str)
+
+
+# Ogni soglia di ogni valuta, esattamente e appena sopra/sotto, più lo zero (conta come negativo)
+def _boundaries(table):
+    _, thresholds = compile_ranges(table)
+    cases = []
+    for symbol, row in zip(table, thresholds):
+        for value in list(row) + [0.0]:
+            for delta in (np.nextafter(value, -np.inf), value, np.nextafter(value, np.inf),
+                          value - 1e-6, value + 1e-6, value - 0.5, value + 0.5):
+                cases.append((symbol, float(delta)))
+    return cases
+
+
+@pytest.mark.parametrize("symbol, delta", _boundaries(CURRENCY_RANGES))
+def test_classify_batch_matches_classify_delta_tot(symbol, delta):
+    score = classify_batch([delta], [symbol], compile_ranges(CURRENCY_RANGES))[0]
+    assert SCORE_LABELS[int(score)] == classify_delta_tot(symbol, delta)
+
+
+@pytest.mark.parametrize("symbol, delta", _boundaries(CURRENCY_RANGES_PERCENT))
+def test_classify_batch_matches_classify_delta_tot_percent(symbol, delta):
+    score = classify_batch([delta], [symbol], compile_ranges(CURRENCY_RANGES_PERCENT))[0]
+    assert SCORE_LABELS[int(score)] == classify_delta_tot_percent(symbol, delta)
+
+
+def test_classify_batch_vectorised_over_all_boundaries():
+    cases = _boundaries(CURRENCY_RANGES)
+    symbols, deltas = zip(*cases)
+    scores = classify_batch(np.array(deltas), np.array(symbols), compile_ranges(CURRENCY_RANGES))
+
+    assert [SCORE_LABELS[int(score)] for score in scores] == \
+        [classify_delta_tot(symbol, delta) for symbol, delta in cases]
@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+import pytest
+
+from indicators import MIN_PERIODS, IndicatorState, RollingIndicators
+
+
+def _brute_force(nets, deltas, window):
+    nets, deltas = nets[-window:], np.array(deltas[-window:])
+    high, low = max(nets), min(nets)
+    values = {"cot_index": round((nets[-1] - low) / (high - low) * 100, 2) if high > low else None,
+              "zscore": None, "percentile": None}
+    if len(deltas) >= MIN_PERIODS:
+        if deltas.std() > 0:
+            values["zscore"] = round((deltas[-1] - deltas.mean()) / deltas.std(), 3)
+        values["percentile"] = round((deltas <= deltas[-1]).sum() / len(deltas) * 100, 2)
+    return values
+
+
+def test_incremental_values_match_the_window_recomputed():
+    rng = random.Random(7)
+    window = 20
+    indicators = RollingIndicators(window)
+    nets, deltas = [], []
+    for week in range(80):
+        nets.append(rng.randint(-50000, 50000))
+        deltas.append(rng.randint(-5000, 5000))
+        values = indicators.update(f"2020-{week:04d}", nets[-1], deltas[-1])
+        expected = _brute_force(nets, deltas, window)
+        assert {key: values[key] for key in expected} == pytest.approx(expected)
+        if week == 40:
+            # Lo stato salvato riprende esattamente da dove era rimasto
+            indicators = RollingIndicators.from_dict(indicators.to_dict())
+
+
+def test_saved_state_with_another_window_is_rejected(tmp_path):
+    path = str(tmp_path / "indicators_state.json")
+    state = IndicatorState(path, window=52)
+    state.update("EUR", "2025-06-10", 1000, 10)
+    state.save()
+
+    assert IndicatorState(path, window=52).currencies["EUR"].window == 52
+    with pytest.raises(ValueError, match="52 settimane invece di 156"):
+        IndicatorState(path, window=156)
+    assert IndicatorState(path, window=156, load=False).currencies == {}
@@ -0,0 +1,34 @@
+import os
+
+from conftest import REPORT_PATH
+from cotReport import load_report
+from getData import CURRENCY_RANGES, currency_mapping, get_currency_data
+from marketScan import MARKETS_FILE, compile_market_config, load_market_config, scan_report
+
+
+def test_bundled_config_is_found_from_any_directory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert os.path.isabs(MARKETS_FILE)
+    assert "markets" in load_market_config()
+
+
+def test_currency_markets_match_the_published_classification():
+    report = load_report(REPORT_PATH, fields=("open_interest",))
+    scan = scan_report(report, compile_market_config(load_market_config())).set_index("market")
+
+    for name in currency_mapping:
+        row = scan.loc[name]
+        expected = get_currency_data(name, report)
+        assert row["basis"] == "valuta (storica + %)"
+        assert row["classification"] == expected["classification"]
+
+
+def test_recalibrated_currency_ranges_replace_the_defaults():
+    ranges = dict(CURRENCY_RANGES)
+    ranges["EUR"] = {"positive": {"low": (0, 1), "medium": (1, 2), "high": 2},
+                     "negative": {"low": (-1, -1), "medium": (-2, -1), "high": -2}}
+    report = load_report(REPORT_PATH, fields=("open_interest",))
+    scan = scan_report(report, compile_market_config(load_market_config(), ranges)).set_index("market")
+
+    for name in currency_mapping:
+        assert scan.loc[name, "classification"] == get_currency_data(name, report, ranges)["classification"]
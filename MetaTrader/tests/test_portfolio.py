@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from portfolio import MIN_WEEKS, Portfolio, RollingCovariance, exposure_matrix, size_positions
+
+PAIRS = ["EURUSD", "GBPUSD", "USDJPY"]
+
+
+def _closes(weeks, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumprod(1 + rng.normal(0, 0.01, size=(weeks, len(PAIRS))), axis=0)
+
+
+def _dates(weeks):
+    return [str(np.datetime64("2024-01-05") + np.timedelta64(7 * week, "D")) for week in range(weeks)]
+
+
+def _volatility(weights, covariance):
+    return np.sqrt(weights @ covariance @ weights * 52)
+
+
+@pytest.mark.parametrize("weeks", [4, 10, 30])
+def test_rolling_covariance_matches_np_cov_over_the_window(weeks):
+    closes = _closes(weeks)
+    rolling = RollingCovariance(PAIRS, window=12)
+    for date, row in zip(_dates(weeks), closes):
+        rolling.update(date, row)
+
+    # L'ultima settimana resta aperta: i rendimenti nella finestra si fermano alla penultima
+    returns = (closes[1:] / closes[:-1] - 1)[:-1][-12:]
+    assert rolling.count == len(returns)
+    np.testing.assert_allclose(rolling.covariance(), np.cov(returns, rowvar=False), rtol=1e-9, atol=1e-15)
+
+    restored = RollingCovariance.from_dict(rolling.to_dict())
+    np.testing.assert_allclose(restored.covariance(), rolling.covariance(), rtol=1e-12)
+
+
+def test_open_week_is_replaced_and_missing_prices_are_skipped():
+    closes = _closes(8)
+    closes[3, 1] = np.nan
+    rolling = RollingCovariance(PAIRS)
+    for date, row in zip(_dates(8), closes):
+        assert rolling.update(date, row)
+    # Stessa data: nuova chiusura della settimana aperta; data precedente: ignorata
+    assert not rolling.update(_dates(8)[-1], closes[-1] * 1.01)
+    assert not rolling.update(_dates(8)[0], closes[0])
+    rolling.update("2099-01-01", closes[-1])
+
+    closes[-1] = closes[-1] * 1.01
+    returns = closes[1:] / closes[:-1] - 1
+    returns = returns[np.all(np.isfinite(returns), axis=1)]
+    assert rolling.count == len(returns) == 5
+    np.testing.assert_allclose(rolling.covariance(), np.cov(returns, rowvar=False), rtol=1e-9, atol=1e-15)
+
+
+def test_positions_follow_the_score_sign_and_hit_the_target_volatility():
+    rolling = RollingCovariance(PAIRS)
+    for date, row in zip(_dates(40), _closes(40, seed=1)):
+        rolling.update(date, row)
+    covariance = rolling.covariance()
+
+    for scores in ([3, -2, 1], [-1, 0, 2], [0, 0, -3]):
+        weights, volatility = size_positions(scores, covariance, target_volatility=0.15)
+        assert np.all((np.sign(weights) == np.sign(scores)) | (weights == 0))
+        assert volatility == 0.15
+        assert _volatility(weights, covariance) == pytest.approx(0.15)
+
+    weights, volatility = size_positions([0, 0, 0], covariance)
+    assert not weights.any() and volatility == 0.0
+
+
+def test_weight_flipped_by_the_inversion_is_zeroed():
+    # Coppie molto correlate, la seconda più volatile: Σ⁻¹ · punteggi le dà segno opposto al suo BUY
+    covariance = np.array([[1.0, 1.8], [1.8, 4.0]]) * 1e-4
+    shrunk = 0.7 * covariance + 0.3 * np.diag(np.diag(covariance))
+    assert np.linalg.solve(shrunk, [1, 1])[1] < 0
+
+    weights, volatility = size_positions([1, 1], covariance, shrinkage=0.3)
+    assert weights[0] > 0 and weights[1] == 0
+    assert _volatility(weights, covariance) == pytest.approx(volatility)
+
+
+@pytest.mark.parametrize("shrinkage", [0.0, 0.3])
+def test_singular_covariance_gives_finite_weights(shrinkage):
+    # Due coppie identiche e una ferma per tutta la finestra
+    covariance = np.array([[1.0, 1.0, 0.0], [1.0, 1.0, 0.0], [0.0, 0.0, 0.0]]) * 1e-4
+    weights, volatility = size_positions([1, 1, 1], covariance, target_volatility=0.1, shrinkage=shrinkage)
+
+    assert np.all(np.isfinite(weights))
+    assert weights[0] == pytest.approx(weights[1]) and weights[0] > 0 and weights[2] == 0
+    assert _volatility(weights, covariance) == pytest.approx(volatility) == 0.1
+
+
+def test_portfolio_sizes_signals_and_nets_currencies(tmp_path):
+    state = str(tmp_path / "portfolio_state.json")
+    portfolio = Portfolio(state, PAIRS)
+    with pytest.raises(ValueError, match="insufficiente"):
+        portfolio.size([])
+
+    portfolio.update_prices(_dates(MIN_WEEKS + 2), _closes(MIN_WEEKS + 2))
+    portfolio.save()
+    sized = Portfolio(state).size([{"pair": "EURUSD", "score": 2}, {"pair": "USDJPY", "score": -1},
+                                   {"pair": "EURGBP", "score": 3}])
+
+    assert [pair["score"] for pair in sized["pairs"]] == [2, 0, -1]
+    assert sized["pairs"][0]["weight"] > 0 and sized["pairs"][2]["weight"] < 0
+    currencies, matrix = exposure_matrix(PAIRS)
+    weights = np.array([pair["weight"] for pair in sized["pairs"]])
+    assert [currency["currency"] for currency in sized["currencies"]] == currencies
+    np.testing.assert_allclose([currency["weight"] for currency in sized["currencies"]], weights @ matrix, atol=2e-4)
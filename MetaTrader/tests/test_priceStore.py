@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from priceStore import PriceStore
+
+
+def _tick_export(path, count, per_second=3, start=0):
+    lines = ["<DATE>\t<TIME>\t<BID>\t<ASK>"]
+    for tick in range(start, start + count):
+        second, part = divmod(tick, per_second)
+        lines.append(f"2025.06.10\t10:00:{second:02d}.{part * 100:03d}\t{1.1 + tick / 10000:.5f}\t{1.1002 + tick / 10000:.5f}")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def _bar_export(path, minutes):
+    lines = ["<DATE>\t<TIME>\t<OPEN>\t<HIGH>\t<LOW>\t<CLOSE>\t<TICKVOL>"]
+    for minute in minutes:
+        lines.append(f"2025.06.10\t10:{minute:02d}:00\t1.1\t1.2\t1.0\t1.15\t{minute + 1}")
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, 4, 100])
+def test_tick_import_across_chunks_keeps_ticks_sharing_a_second(tmp_path, chunk_rows):
+    store = PriceStore(str(tmp_path / "store"))
+    added = store.import_mt5(_tick_export(tmp_path / "EURUSD_TICKS.csv", 10), chunk_rows=chunk_rows)
+
+    bars = store.bars("EURUSD")
+    assert added == 10 and len(bars["time"]) == 10
+    assert np.allclose(bars["close"], [1.1 + tick / 10000 for tick in range(10)])
+    assert (np.diff(bars["time"]) >= 0).all()
+
+
+def test_reimport_skips_rows_already_stored(tmp_path):
+    store = PriceStore(str(tmp_path / "store"))
+    store.import_mt5(_bar_export(tmp_path / "EURUSD_M1.csv", range(0, 5)), chunk_rows=2)
+    added = store.import_mt5(_bar_export(tmp_path / "EURUSD_M1.csv", range(3, 9)), chunk_rows=2)
+
+    bars = store.bars("EURUSD")
+    assert added == 4
+    assert (bars["volume"] == np.arange(1, 10)).all()
+    assert store.bars("EURUSD", "2025-06-10T10:02", "2025-06-10T10:04")["volume"].tolist() == [3, 4, 5]
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from conftest import REPORT_PATH
+from cotReport import load_report
+from getData import CURRENCY_RANGES, analyze_pairs, currency_mapping, get_currency_data
+from profiles import _base_key, compile_profile, profile_signals, score_profiles
+
+
+@pytest.fixture(scope="module")
+def report():
+    return load_report(REPORT_PATH)
+
+
+def test_default_profile_matches_get_data(report):
+    scored = score_profiles(report, {"default": {}})
+    currencies_data = {name: get_currency_data(name, report) for name in currency_mapping}
+    expected = {pair["pair"]: pair["score"] for pair in analyze_pairs(currencies_data)}
+
+    assert {signal["pair"]: signal["score"] for signal in profile_signals(scored, "default")} == expected
+
+
+def test_partial_override_keeps_the_other_levels():
+    symbols, thresholds, _, _ = compile_profile({"ranges": {"EUR": {"positive": {"medium": [9000, 20000]}}}})
+    _, defaults, _, _ = compile_profile({})
+    row = symbols.index("EUR")
+
+    assert thresholds[row].tolist() == [-18102.4, -6282.6, 8045.12, 20000]
+    changed = np.zeros(thresholds.shape, dtype=bool)
+    changed[row, 3] = True
+    assert (thresholds[~changed] == defaults[~changed]).all()
+
+
+def test_override_of_a_new_currency_must_be_complete():
+    with pytest.raises(ValueError, match="XAU incomplete"):
+        compile_profile({"ranges": {"XAU": {"positive": {"low": [0, 10]}}}})
+
+
+@pytest.mark.parametrize("profile, message", [
+    ({"ranges": {"EUR": {"up": {"low": [0, 1]}}}}, "lato 'up'"),
+    ({"ranges": {"EUR": {"positive": {"extreme": 1}}}}, "livelli sconosciuti"),
+    ({"ranges": {"EUR": {"positive": {"low": 100}}}}, "EUR.positive.low"),
+    ({"ranges": {"EUR": {"positive": {"low": [0, 20000]}}}}, "non crescenti"),
+    ({"scale": 0}, "scale"),
+    ({"pair_cutoffs": [1, 3]}, "pair_cutoffs"),
+    ({"pair_cutoffs": [1, 3, 5, 7]}, "pair_cutoffs"),
+    ({"pair_cutoffs": [3, 1, 5]}, "pair_cutoffs"),
+    ({"pair_cutoffs": [0, 1, 2]}, "pair_cutoffs"),
+    ({"pair_cutoffs": ["uno", 3, 5]}, "pair_cutoffs"),
+], ids=["side", "level", "shape", "order", "scale", "cutoffs-short", "cutoffs-long", "cutoffs-order",
+        "cutoffs-zero", "cutoffs-text"])
+def test_invalid_profiles_name_the_profile(report, profile, message):
+    with pytest.raises(ValueError, match=message) as error:
+        score_profiles(report, {"ok": {}, "mario": profile})
+    assert "Profilo 'mario'" in str(error.value)
+
+
+def test_recalibrated_base_ranges_are_used():
+    ranges = dict(CURRENCY_RANGES)
+    ranges["EUR"] = {"positive": {"low": (0, 1), "medium": (1, 2), "high": 2},
+                     "negative": {"low": (-1.5, -1), "medium": (-2, -1.5), "high": -2}}
+    symbols, thresholds, _, _ = compile_profile({"scale": 2}, _base_key(ranges))
+
+    assert thresholds[symbols.index("EUR")].tolist() == [-4, -3, 2, 4]
+    assert CURRENCY_RANGES["EUR"]["positive"]["high"] == 14254.48
+
+
+XAU = {"positive": {"low": [0, 100], "medium": [100, 200], "high": 200},
+       "negative": {"low": [-100, -1], "medium": [-200, -100], "high": -200}}
+XAU_PERCENT = {"positive": {"low": [0, 2], "medium": [2, 5], "high": 5},
+               "negative": {"low": [-2, 0], "medium": [-5, -2], "high": -5}}
+
+
+@pytest.mark.parametrize("order", [("a", "b"), ("b", "a")], ids=["default-first", "extra-first"])
+def test_profile_adding_a_currency_scores_with_the_others(report, order):
+    settings = {"a": {}, "b": {"ranges": {"XAU": XAU}, "ranges_percent": {"XAU": XAU_PERCENT}}}
+    scored = score_profiles(report, {name: settings[name] for name in order})
+    alone = score_profiles(report, {"a": {}})
+
+    assert "XAU" in compile_profile(settings["b"])[0]
+    assert scored["currencies"] == alone["currencies"]
+    for name in order:
+        row = scored["profiles"].index(name)
+        assert (scored["pair_scores"][row] == alone["pair_scores"][0]).all()
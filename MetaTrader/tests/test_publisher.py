@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+from publisher import Publisher, write_atomic
+
+PAIRS = [{"pair": "EURUSD", "score": 3}, {"pair": "GBPJPY", "score": -2}, {"pair": "AUDNZD", "score": 0}]
+
+
+def _leftovers(folder):
+    return [name for name in os.listdir(folder) if name.endswith(".tmp")]
+
+
+def test_write_atomic_replaces_the_target(tmp_path):
+    path = tmp_path / "pair_signals.csv"
+    path.write_bytes(b"old")
+    write_atomic(str(path), b"new")
+
+    assert path.read_bytes() == b"new"
+    assert not _leftovers(tmp_path)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="permessi POSIX")
+@pytest.mark.parametrize("umask", [0o022, 0o027, 0o077])
+def test_write_atomic_applies_the_current_umask(tmp_path, umask):
+    # La umask in vigore al momento della scrittura, non quella all'import del modulo
+    previous = os.umask(umask)
+    try:
+        write_atomic(str(tmp_path / "signals.bin"), b"data")
+    finally:
+        os.umask(previous)
+    assert os.stat(tmp_path / "signals.bin").st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path):
+    path = tmp_path / "pair_signals.csv"
+    path.write_bytes(b"old")
+    with pytest.raises(TypeError):
+        write_atomic(str(path), "non bytes")
+
+    assert path.read_bytes() == b"old"
+    assert not _leftovers(tmp_path)
+
+
+def test_failed_replace_leaves_no_temp_file(tmp_path):
+    # Una cartella con il nome del target fa fallire os.replace
+    target = tmp_path / "pair_signals.csv"
+    target.mkdir()
+    (target / "keep").write_bytes(b"")
+    with pytest.raises(OSError):
+        write_atomic(str(target), b"new")
+
+    assert not _leftovers(tmp_path)
+
+
+def test_publisher_formats_and_skips_unchanged_targets(tmp_path):
+    targets = [str(tmp_path / name) for name in ("pair_signals.csv", "signals.json", "signals.bin")]
+    publisher = Publisher(targets)
+
+    assert set(publisher.publish(PAIRS, "2025-06-10").values()) == {"scritto"}
+    assert (tmp_path / "pair_signals.csv").read_text().splitlines() == \
+        ["Pair,Signal,Score", "EURUSD,BUY,3", "GBPJPY,SELL,-2", "AUDNZD,NEUTRAL,0"]
+    assert set(publisher.publish(PAIRS, "2025-06-10").values()) == {"invariato"}
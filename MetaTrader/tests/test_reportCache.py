@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from benchmark import LocalResponse, LocalSession
+from reportCache import DownloadError, ReportCache, fetch_report
+
+URL = "https://www.cftc.gov/dea/newcot/deacot.txt"
+
+
+class RecordingSession(LocalSession):
+    """LocalSession che registra gli header di ogni richiesta"""
+
+    def __init__(self, content):
+        super().__init__(content)
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.requests.append(dict(headers or {}))
+        return super().get(url, headers, stream, timeout)
+
+
+class StatusSession:
+    """Sessione che risponde sempre con lo stesso codice e nessun corpo"""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        return LocalResponse(self.status_code)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReportCache(str(tmp_path / "cot_cache"))
+
+
+def test_200_parses_and_writes_the_cache(cache, report_bytes):
+    session = RecordingSession(report_bytes)
+    report, changed = fetch_report(URL, cache, session=session)
+
+    assert changed
+    assert report.report_date == "2025-06-10" and len(report) > 0
+    assert session.requests == [{}]
+    with open(cache.meta_path) as file:
+        meta = json.load(file)
+    assert meta == {"url": URL, "etag": session.etag, "last_modified": None, "report_date": "2025-06-10"}
+    assert cache.load_report().names == report.names
+
+
+def test_304_returns_the_cached_report(cache, report_bytes):
+    session = RecordingSession(report_bytes)
+    first, _ = fetch_report(URL, cache, session=session)
+    report, changed = fetch_report(URL, cache, session=session)
+
+    assert not changed
+    assert session.requests[1] == {"If-None-Match": session.etag}
+    assert report.names == first.names and report.report_date == first.report_date
+    for field, column in first.columns.items():
+        assert (report.columns[field] == column).all()
+
+
+def test_200_with_the_same_report_date_is_not_a_change(cache, report_bytes):
+    fetch_report(URL, cache, session=LocalSession(report_bytes))
+    # Stesso report ma contenuto diverso (ETag nuovo): il server risponde 200
+    session = LocalSession(report_bytes + b"\n")
+    report, changed = fetch_report(URL, cache, session=session)
+
+    assert not changed
+    assert report.report_date == "2025-06-10"
+    assert cache.load_meta()["etag"] == session.etag
+
+
+def test_other_url_is_always_a_change(cache, report_bytes):
+    fetch_report(URL, cache, session=LocalSession(report_bytes))
+    _, changed = fetch_report(URL.replace("deacot", "deafut"), cache, session=LocalSession(report_bytes))
+
+    assert changed
+
+
+@pytest.mark.parametrize("status_code", [404, 500, 503])
+def test_error_status_raises_download_error(cache, report_bytes, status_code):
+    fetch_report(URL, cache, session=LocalSession(report_bytes))
+    meta = cache.load_meta()
+
+    with pytest.raises(DownloadError, match=str(status_code)):
+        fetch_report(URL, cache, session=StatusSession(status_code))
+    assert cache.load_meta() == meta
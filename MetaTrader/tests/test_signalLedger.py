@@ -0,0 +1,77 @@
+import pytest
+
+from signalLedger import SignalLedger
+
+
+def _result(report_date, signals, eur_delta=100):
+    """Risultato minimo nel formato di getData.make_result: coppia -> (punteggio, segnale)"""
+    return {
+        "report_date": report_date,
+        "currencies": {"EUR": {"simple_delta": eur_delta, "classification": "🟡 BASSO POSITIVO"},
+                       "USD": {"simple_delta": -eur_delta, "classification": "🔵 BASSO NEGATIVO"}},
+        "pairs": [{"pair": pair, "base_currency": pair[:3], "quote_currency": pair[3:],
+                   "score": score, "signal": signal, "strength": ""}
+                  for pair, (score, signal) in signals.items()]
+    }
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    with SignalLedger(str(tmp_path / "signal_ledger.db")) as ledger:
+        yield ledger
+
+
+def test_flip_across_two_reports(ledger):
+    assert ledger.record(_result("2025-06-03", {"EURUSD": (2, "BUY"), "USDJPY": (-1, "SELL")}), recorded_at=1)
+    assert ledger.record(_result("2025-06-10", {"EURUSD": (-2, "SELL"), "USDJPY": (-3, "SELL")}), recorded_at=2)
+
+    flips = ledger.flips()
+    assert [(row["pair"], row["previous_signal"], row["signal"], row["report_date"]) for row in flips] == \
+        [("EURUSD", "BUY", "SELL", "2025-06-10")]
+    assert ledger.flips(from_signal="BUY", to_signal="SELL") == flips
+    assert ledger.flips(from_signal="SELL") == []
+    assert [row["signal"] for row in ledger.pair_history("eurusd")] == ["BUY", "SELL"]
+    assert [row["simple_delta"] for row in ledger.currency_history("usd", start="2025-06-10")] == [-100]
+
+
+def test_diff_lists_new_and_changed_pairs(ledger):
+    ledger.record(_result("2025-06-03", {"EURUSD": (2, "BUY"), "USDJPY": (-1, "SELL")}))
+    # Il primo report: tutte le coppie sono nuove (nessun segnale precedente)
+    assert [row["pair"] for row in ledger.diff()] == ["EURUSD", "USDJPY"]
+
+    ledger.record(_result("2025-06-10", {"EURUSD": (-2, "SELL"), "USDJPY": (-1, "SELL"), "GBPUSD": (3, "BUY")}))
+    diff = ledger.diff()
+    assert [(row["pair"], row["previous_signal"], row["signal"]) for row in diff] == \
+        [("GBPUSD", None, "BUY"), ("EURUSD", "BUY", "SELL")]
+    assert [row["pair"] for row in ledger.diff("2025-06-03")] == ["EURUSD", "USDJPY"]
+
+
+def test_same_date_is_not_recorded_twice(ledger):
+    result = _result("2025-06-10", {"EURUSD": (2, "BUY")})
+    assert ledger.record(result)
+    assert not ledger.record(result)
+    assert ledger.dates() == ["2025-06-10"]
+    assert len(ledger.pair_history("EURUSD")) == 1
+
+
+def test_out_of_order_date_is_rejected(ledger):
+    ledger.record(_result("2025-06-10", {"EURUSD": (2, "BUY")}))
+    with pytest.raises(ValueError, match="2025-06-03 precede"):
+        ledger.record(_result("2025-06-03", {"EURUSD": (-2, "SELL")}))
+    with pytest.raises(ValueError):
+        ledger.record(_result(None, {}))
+    assert ledger.dates() == ["2025-06-10"]
+
+
+def test_flips_limited_to_recent_weeks_and_persisted(tmp_path):
+    path = str(tmp_path / "signal_ledger.db")
+    signals = ["BUY", "SELL", "BUY", "BUY"]
+    with SignalLedger(path) as ledger:
+        for week, signal in enumerate(signals):
+            ledger.record(_result(f"2025-06-{week * 7 + 3:02d}", {"EURUSD": (1, signal)}))
+
+    with SignalLedger(path) as ledger:
+        assert [row["report_date"] for row in ledger.flips()] == ["2025-06-10", "2025-06-17"]
+        assert [row["report_date"] for row in ledger.flips(weeks=3)] == ["2025-06-10", "2025-06-17"]
+        assert [row["report_date"] for row in ledger.flips(weeks=2)] == ["2025-06-17"]
+        assert ledger.latest_date() == "2025-06-24"
@@ -0,0 +1,109 @@
+import datetime
+
+import pytest
+
+import getData
+from conftest import REPORT_PATH
+from cotReport import CotReport, load_report
+from signalService import RETRY_DELAYS, RELEASE_TZ, SignalService, next_release
+
+# Venerdì successivo alla pubblicazione del report incluso (as of 2025-06-10):
+# il report atteso è quello del 2025-06-17, quindi quello incluso è in ritardo
+FRIDAY = datetime.datetime(2025, 6, 20, 16, 0, tzinfo=RELEASE_TZ).timestamp()
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class StandInSource:
+    """Sorgente del report: restituisce il report vecchio finché `fresh` non diventa True"""
+
+    def __init__(self):
+        self.stale = load_report(REPORT_PATH)
+        self.current = CotReport(self.stale.names, self.stale.columns, self.stale.dates + 7)
+        self.fresh = False
+        self.failing = False
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError("CFTC non raggiungibile")
+        return (self.current, True) if self.fresh else (self.stale, self.calls == 1)
+
+
+@pytest.fixture
+def service(tmp_path):
+    source = StandInSource()
+    clock = FakeClock(FRIDAY)
+    service = SignalService(source, output=str(tmp_path / "pair_signals.csv"), metatrader=None, clock=clock,
+                            sleep=lambda seconds: None, ranges_file=str(tmp_path / "currency_ranges.json"))
+    return service, source, clock
+
+
+def _advance(service, clock):
+    clock.now = service.next_refresh
+    return service.tick()
+
+
+def test_up_to_date_report_waits_for_next_release(service):
+    service, source, clock = service
+    source.fresh = True
+    next_refresh = service.tick()
+
+    assert service.result["report_date"] == "2025-06-17"
+    assert service.attempt == 0
+    assert next_refresh == next_release(FRIDAY)
+    # Prima del prossimo venerdì tick() non scarica nulla
+    clock.now += 3600
+    assert service.tick() == next_refresh and source.calls == 1
+
+
+def test_late_report_is_retried_on_the_capped_delay_until_it_arrives(service):
+    service, source, clock = service
+    delays = []
+    for _ in range(len(RETRY_DELAYS) + 5):
+        delays.append(_advance(service, clock) - clock.now)
+
+    assert service.result["report_date"] == "2025-06-10"
+    assert delays == list(RETRY_DELAYS) + [RETRY_DELAYS[-1]] * 5
+    assert service.attempt == len(delays)
+
+    source.fresh = True
+    _advance(service, clock)
+    assert service.result["report_date"] == "2025-06-17"
+    assert service.attempt == 0
+    assert service.next_refresh == next_release(clock.now)
+
+
+def test_fetch_errors_are_retried_and_reported(service):
+    service, source, clock = service
+    source.failing = True
+    for _ in range(len(RETRY_DELAYS) + 2):
+        _advance(service, clock)
+
+    assert service.result is None
+    assert "non raggiungibile" in service.last_error
+    assert service.next_refresh == clock.now + RETRY_DELAYS[-1]
+    assert b"non raggiungibile" in service.payload("/health")
+
+
+def test_ranges_are_loaded_once(tmp_path, monkeypatch):
+    loads = []
+    original = getData.load_currency_ranges
+    monkeypatch.setattr(getData, "load_currency_ranges", lambda path: loads.append(path) or original(path))
+    source, clock = StandInSource(), FakeClock(FRIDAY)
+    service = SignalService(source, output=str(tmp_path / "pair_signals.csv"), metatrader=None, clock=clock,
+                            ranges_file=str(tmp_path / "currency_ranges.json"))
+    for _ in range(3):
+        _advance(service, clock)
+    source.fresh = True
+    _advance(service, clock)
+
+    assert loads == [str(tmp_path / "currency_ranges.json")]
+    assert source.calls == 4
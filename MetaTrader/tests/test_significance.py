@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from getData import interpret_pair_score
+from significance import BUCKET_LABELS, POOLED, TASK_RESAMPLES, score_buckets, significance_study
+
+PAIRS = ["EURUSD", "USDJPY", "AUDUSD"]
+
+
+def _study_inputs(weeks=60, seed=3):
+    # Punteggi interi come quelli di backtest.pair_scores (differenze di punteggi di valuta), con buchi
+    rng = np.random.default_rng(seed)
+    scores = rng.integers(-6, 7, size=(weeks, len(PAIRS))).astype(np.float64)
+    returns = 0.002 * np.sign(scores) + rng.normal(0, 0.01, size=scores.shape)
+    scores[rng.random(scores.shape) < 0.05] = np.nan
+    returns[rng.random(scores.shape) < 0.05] = np.nan
+    return scores, returns
+
+
+def test_buckets_match_interpret_pair_score():
+    scores = np.arange(-12, 13, dtype=np.float64)
+    buckets = score_buckets(scores)
+    assert [BUCKET_LABELS[bucket] for bucket in buckets] == [interpret_pair_score(score) for score in scores]
+    assert score_buckets(np.array([np.nan, 2.0])).tolist() == [-1, 4]
+
+
+@pytest.fixture(scope="module")
+def study():
+    scores, returns = _study_inputs()
+    # Più di TASK_RESAMPLES ricampionamenti: ogni unità è divisa in più task
+    resamples = TASK_RESAMPLES + 500
+    return scores, returns, significance_study(scores, returns, PAIRS, resamples, seed=11, workers=1)
+
+
+def test_same_seed_gives_the_same_results_with_one_or_two_workers(study):
+    scores, returns, serial = study
+    parallel = significance_study(scores, returns, PAIRS, TASK_RESAMPLES + 500, seed=11, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel, check_exact=True)
+
+    other_seed = significance_study(scores, returns, PAIRS, TASK_RESAMPLES + 500, seed=12, workers=1)
+    assert not np.array_equal(serial["ci_low"].to_numpy(), other_seed["ci_low"].to_numpy())
+    np.testing.assert_array_equal(serial["mean_return"].to_numpy(), other_seed["mean_return"].to_numpy())
+
+
+def test_bucket_rows_match_interpret_pair_score(study):
+    scores, returns, results = study
+    valid = ~np.isnan(scores) & ~np.isnan(returns)
+    labels = np.array([[interpret_pair_score(score) if not np.isnan(score) else None for score in row]
+                       for row in scores], dtype=object)
+
+    for unit, pair in enumerate(PAIRS + [POOLED]):
+        rows = results[results["pair"] == pair]
+        columns = slice(None) if pair == POOLED else unit
+        unit_labels = labels[:, columns][valid[:, columns]]
+        unit_returns = returns[:, columns][valid[:, columns]]
+        # Una riga per ogni fascia presente, con le settimane e il rendimento medio di quella fascia
+        assert set(rows["label"]) == set(unit_labels)
+        for row in rows.itertuples():
+            selected = unit_returns[unit_labels == row.label]
+            assert BUCKET_LABELS[row.bucket] == row.label
+            assert row.weeks == len(selected)
+            assert row.mean_return == pytest.approx(selected.mean())
+            assert row.ci_low <= row.ci_high
+            assert 0 < row.p_value <= 1